@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark the SQL statement lexer on large generated migration scripts.
+
+Prints one JSON object per script size with throughput figures, so runs can be
+compared across releases. Throughput should stay flat as the size grows; a
+drop indicates the scan is no longer linear.
+
+    python benchmarks/bench_lexer.py --sizes 1 4 16
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from schemaflux.lexer import iter_statements
+
+STATEMENT_TEMPLATES = [
+    "INSERT INTO audit_log (id, message, payload) VALUES ({n}, 'row {n}; it''s fine', E'tab\\t;{n}')",
+    "-- line; comment\nUPDATE accounts SET note = \"weird;column\" || '{n}' WHERE id = {n}",
+    "/* block; comment /* nested; */ */ DELETE FROM sessions WHERE id = {n}",
+    "CREATE OR REPLACE FUNCTION f_{n}() RETURNS int AS $body$ BEGIN RETURN {n}; END; $body$ LANGUAGE plpgsql",
+]
+
+
+def generate_script(target_bytes: int) -> str:
+    """Build a SQL script of roughly ``target_bytes`` mixing every quoting style."""
+    parts = []
+    size = 0
+    n = 0
+    while size < target_bytes:
+        statement = STATEMENT_TEMPLATES[n % len(STATEMENT_TEMPLATES)].format(n=n) + ";\n"
+        parts.append(statement)
+        size += len(statement)
+        n += 1
+    return ''.join(parts)
+
+
+def run(size_mb: float, repeat: int) -> dict:
+    script = generate_script(int(size_mb * 1024 * 1024))
+    best = float('inf')
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in iter_statements(script))
+        best = min(best, time.perf_counter() - start)
+    return {
+        'benchmark': 'lexer.iter_statements',
+        'size_mb': size_mb,
+        'statements': count,
+        'seconds': round(best, 4),
+        'mb_per_second': round(size_mb / best, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1, 4, 16],
+                        help='Script sizes to benchmark, in megabytes.')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per size; the fastest run is reported.')
+    args = parser.parse_args()
+
+    for size_mb in args.sizes:
+        print(json.dumps(run(size_mb, args.repeat)))
+
+
+if __name__ == '__main__':
+    main()
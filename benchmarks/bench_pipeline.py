@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Benchmark the migration pipeline on a generated migrations directory.
+
+Measures file discovery, parsing, statement splitting, applying every
+migration, status and the analytics summary, and prints one JSON object per
+step with the fastest of ``--repeat`` runs, so runs can be compared across
+releases. By default the database is an in-process fake that keeps the
+migration history in memory and answers every other statement instantly,
+which isolates SchemaFlux's own overhead; with ``--dsn`` the same suite runs
+against a real PostgreSQL, inside a throwaway ``schemaflux_bench`` schema.
+
+    python benchmarks/bench_pipeline.py --files 1000 --large-mb 10
+    python benchmarks/bench_pipeline.py --dsn postgresql://localhost/bench
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from schemaflux.analytics import MigrationAnalytics
+from schemaflux.connectors.base import BaseConnector
+from schemaflux.connectors.pool import ConnectorPool
+from schemaflux.core import MigrationManager
+from schemaflux.version import POSTGRESQL_HISTORY_VERSION
+
+BENCH_SCHEMA = 'schemaflux_bench'
+
+MIGRATION_TEMPLATE = """-- Generated by bench_pipeline.py
+-- UP
+CREATE TABLE bench_{n} (id integer PRIMARY KEY, note text);
+-- seed rows; this comment has a semicolon
+{inserts}
+COMMENT ON TABLE bench_{n} IS 'generated; by bench_pipeline';
+
+-- DOWN
+DROP TABLE bench_{n};
+"""
+
+INSERT_TEMPLATE = "INSERT INTO bench_{n} (id, note) VALUES ({i}, 'it''s; row {i}'), ({j}, $q$dollar; {j}$q$);"
+
+
+class FakeCursor:
+    """Result of a ``FakeConnector.execute`` call, shaped like a DB-API cursor."""
+
+    def __init__(self, rows=(), rowcount=0):
+        self.rows = list(rows)
+        self.rowcount = rowcount
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeConnector(BaseConnector):
+    """In-process PostgreSQL stand-in for benchmarks.
+
+    Answers the history queries ``VersionControl`` and the advisory lock
+    send from an in-memory dict, and treats every other statement as
+    instant, affecting one row. ``latency`` adds a sleep per statement to
+    model a network round trip.
+    """
+
+    dialect = 'postgresql'
+
+    def __init__(self, history=None, latency=0.0):
+        super().__init__()
+        self.history = {} if history is None else history
+        self.latency = latency
+
+    def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    def execute(self, operation, params=None):
+        if self.latency:
+            time.sleep(self.latency)
+        self._query_count += 1
+        rows, rowcount = self._answer(operation, params)
+        self._operations_count += rowcount
+        return FakeCursor(rows, rowcount)
+
+    def execute_batch(self, operations):
+        for operation, params in operations:
+            self.execute(operation, params)
+
+    def copy_from_file(self, operation, path):
+        return self.execute(operation).rowcount
+
+    def _answer(self, operation, params):
+        if 'obj_description' in operation:
+            return [(POSTGRESQL_HISTORY_VERSION,)], 1
+        if 'advisory' in operation:
+            return [(True,)], 1
+        if 'INSERT INTO migration_history' in operation:
+            if 'unnest' in operation:
+                self.history.update(zip(params[0], params[1]))
+            elif params[2]:
+                self.history[params[0]] = params[1]
+            return [], 1
+        if 'DELETE FROM migration_history' in operation:
+            versions = params[0] if 'ANY' in operation else [params[0]]
+            for version in versions:
+                self.history.pop(version, None)
+            return [], len(versions)
+        if 'unnest(%s::varchar[]) AS v' in operation:
+            return [(version,) for version in params[0] if version not in self.history], 0
+        if 'FROM migration_history' in operation:
+            rows = sorted(self.history.items(), reverse='DESC' in operation)
+            return (rows[:1] if 'LIMIT 1' in operation else rows), 0
+        return [], 1
+
+
+def generate_migrations(directory, files, statements, large_mb):
+    """Write ``files`` migrations, plus one with a ``large_mb`` megabyte INSERT when asked."""
+    for n in range(files):
+        inserts = '\n'.join(INSERT_TEMPLATE.format(n=n, i=2 * i, j=2 * i + 1) for i in range(statements))
+        with open(os.path.join(directory, f"{20000101000000 + n}_bench_{n}.sql"), 'w') as f:
+            f.write(MIGRATION_TEMPLATE.format(n=n, inserts=inserts))
+
+    if large_mb:
+        n = files
+        target = int(large_mb * 1024 * 1024)
+        values = []
+        size = 0
+        i = 0
+        while size < target:
+            value = f"({i}, 'it''s; row {i}')"
+            values.append(value)
+            size += len(value) + 2
+            i += 1
+        insert = f"INSERT INTO bench_{n} (id, note) VALUES\n" + ',\n'.join(values) + ';'
+        with open(os.path.join(directory, f"{20000101000000 + n}_bench_large.sql"), 'w') as f:
+            f.write(MIGRATION_TEMPLATE.format(n=n, inserts=insert))
+
+
+def best_of(repeat, run, setup=None):
+    """Fastest wall time of ``run`` over ``repeat`` runs, calling ``setup`` untimed before each."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+class Backend:
+    """Builds managers against the fake or a real PostgreSQL, and resets its state."""
+
+    def __init__(self, dsn, latency, workdir):
+        self.dsn = dsn
+        self.latency = latency
+        self.workdir = workdir
+        self.history = {}
+
+    @property
+    def name(self):
+        return 'postgresql' if self.dsn else 'fake'
+
+    def manager(self, migrations_dir, cache_dir=None):
+        options = {'migrations_dir': migrations_dir, 'cache_dir': cache_dir,
+                   'log_dir': os.path.join(self.workdir, 'logs')}
+        if self.dsn:
+            return MigrationManager(connection_options={'dsn': self.dsn, 'schema': BENCH_SCHEMA}, **options)
+        pool = ConnectorPool(lambda: FakeConnector(self.history, self.latency), min_size=0, max_size=4)
+        return MigrationManager(pool=pool, **options)
+
+    def reset(self, recreate=True):
+        """Forget every applied migration, so the next apply starts from scratch."""
+        if not self.dsn:
+            self.history.clear()
+            return
+        from schemaflux.connectors.postgresql import PostgreSQLConnector
+        connector = PostgreSQLConnector(dsn=self.dsn)
+        connector.connect()
+        try:
+            connector.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;")
+            if recreate:
+                connector.execute(f"CREATE SCHEMA {BENCH_SCHEMA};")
+        finally:
+            connector.close()
+
+
+def run_suite(args):
+    workdir = tempfile.mkdtemp(prefix='schemaflux_bench_')
+    try:
+        migrations_dir = os.path.join(workdir, 'migrations')
+        os.makedirs(migrations_dir)
+        generate_migrations(migrations_dir, args.files, args.statements, args.large_mb)
+        total_bytes = sum(os.path.getsize(os.path.join(migrations_dir, name))
+                          for name in os.listdir(migrations_dir))
+        backend = Backend(args.dsn, args.latency, workdir)
+        cache_dir = os.path.join(workdir, 'cache') if args.cache else None
+        manager = backend.manager(migrations_dir, cache_dir)
+        common = {'backend': backend.name, 'cache': args.cache, 'files': len(os.listdir(migrations_dir)),
+                  'mb': round(total_bytes / 1024 / 1024, 2)}
+
+        def report(benchmark, seconds, **extra):
+            print(json.dumps(dict({'benchmark': benchmark, 'seconds': round(seconds, 6)}, **common, **extra)))
+
+        seconds, files = best_of(args.repeat, manager._get_migration_files)
+        report('MigrationSource._get_migration_files', seconds)
+
+        seconds, parsed = best_of(args.repeat, lambda: [manager._parse_migration_file(name) for name in files])
+        report('MigrationSource._parse_migration_file', seconds,
+               per_file_ms=round(seconds * 1000 / len(files), 4))
+
+        seconds, statements = best_of(args.repeat, lambda: sum(
+            len(manager._split_statements(migration['up'])) for migration in parsed
+        ))
+        report('MigrationSource._split_statements', seconds, statements=statements,
+               mb_per_second=round(total_bytes / 1024 / 1024 / seconds, 2))
+
+        def start_over():
+            # Reconnect afterwards, so the history table is set up again
+            manager.close()
+            backend.reset()
+
+        # Applying prints a line per migration; keep the JSON output clean
+        with contextlib.redirect_stdout(io.StringIO()):
+            seconds, entries = best_of(args.repeat, manager.apply_migrations, setup=start_over)
+        report('MigrationManager.apply_migrations', seconds, applied=len(entries),
+               per_file_ms=round(seconds * 1000 / len(files), 4))
+
+        seconds, status = best_of(args.repeat, manager.show_status)
+        report('MigrationManager.show_status', seconds,
+               applied=sum(1 for item in status if item['applied']))
+        manager.close()
+
+        analytics = MigrationAnalytics(os.path.join(workdir, 'logs'))
+        seconds, stats = best_of(args.repeat, analytics.get_migration_stats)
+        report('MigrationAnalytics.get_migration_stats', seconds, logged=stats['total_migrations'])
+    finally:
+        if args.dsn:
+            Backend(args.dsn, 0.0, workdir).reset(recreate=False)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=1000,
+                        help='Number of migration files to generate.')
+    parser.add_argument('--statements', type=int, default=10,
+                        help='INSERT statements per generated migration.')
+    parser.add_argument('--large-mb', type=float, default=10,
+                        help='Size of one extra migration holding a single large INSERT (0 for none).')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per step; the fastest run is reported.')
+    parser.add_argument('--cache', action='store_true',
+                        help='Use the on-disk parse cache, as the CLI does.')
+    parser.add_argument('--dsn',
+                        help='Run against this PostgreSQL instead of the in-process fake.')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds the fake connector sleeps per statement, to model round trips.')
+    args = parser.parse_args()
+    run_suite(args)
+
+
+if __name__ == '__main__':
+    main()
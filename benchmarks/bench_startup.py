@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark CLI startup for commands that should not need a database.
+
+Runs each command in a fresh interpreter and prints one JSON object per
+command with the median time spent on top of bare interpreter startup, plus
+any database drivers the command imported. Exits non-zero when a command
+goes over the budget, loads a driver, or fails, so CI can guard the budget.
+
+    python benchmarks/bench_startup.py --budget-ms 150
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+DRIVERS = ['psycopg2', 'pymongo', 'bson', 'asyncpg', 'motor']
+
+# Runs the CLI like the console script does and reports, on exit, which
+# drivers ended up in sys.modules.
+RUNNER = (
+    "import atexit, json, sys\n"
+    "atexit.register(lambda: sys.stderr.write('\\nDRIVERS ' + json.dumps("
+    "sorted(m for m in {drivers!r} if m in sys.modules))))\n"
+    "from schemaflux.cli import cli\n"
+    "sys.argv[0] = 'schemaflux'\n"
+    "cli()\n"
+)
+
+COMMANDS = {
+    '--help': ['--help'],
+    'create': ['create', 'bench_startup'],
+}
+
+
+def time_process(args, cwd, env):
+    start = time.perf_counter()
+    result = subprocess.run(args, cwd=cwd, env=env, capture_output=True, text=True)
+    return time.perf_counter() - start, result
+
+
+def run(name, argv, repeat, budget_ms):
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(ROOT))
+    # Point the drivers at nothing: a command that tries to connect fails.
+    env.update(PGHOST='/nonexistent', PGCONNECT_TIMEOUT='1', MONGODB_URI='mongodb://127.0.0.1:1')
+    code = RUNNER.format(drivers=DRIVERS)
+
+    with tempfile.TemporaryDirectory() as cwd:
+        baseline = [time_process([sys.executable, '-c', 'pass'], cwd, env)[0] for _ in range(repeat)]
+        samples = []
+        for _ in range(repeat):
+            seconds, result = time_process([sys.executable, '-c', code] + argv, cwd, env)
+            samples.append(seconds)
+
+    loaded = []
+    for line in result.stderr.splitlines():
+        if line.startswith('DRIVERS '):
+            loaded = json.loads(line[len('DRIVERS '):])
+    overhead_ms = (statistics.median(samples) - statistics.median(baseline)) * 1000
+    return {
+        'benchmark': f'startup.{name}',
+        'overhead_ms': round(overhead_ms, 1),
+        'budget_ms': budget_ms,
+        'drivers_loaded': loaded,
+        'exit_code': result.returncode,
+        'ok': result.returncode == 0 and not loaded and overhead_ms <= budget_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=150,
+                        help='Allowed time on top of interpreter startup, in milliseconds.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs per command; the median is reported.')
+    args = parser.parse_args()
+
+    ok = True
+    for name, argv in COMMANDS.items():
+        report = run(name, argv, args.repeat, args.budget_ms)
+        ok = ok and report['ok']
+        print(json.dumps(report))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,25 @@
 """
 A lightweight PostgreSQL migration library.
 """
-from .core import MigrationManager
-from .cli import cli
+import importlib
 
 __version__ = "1.0.0"
-__all__ = ["MigrationManager", "cli"]
+__all__ = ["MigrationManager", "AsyncMigrationManager", "ConnectorPool", "cli"]
+
+# Resolved on first access so ``import schemaflux`` stays cheap for the CLI.
+_EXPORTS = {
+    'MigrationManager': '.core',
+    'AsyncMigrationManager': '.async_core',
+    'ConnectorPool': '.connectors',
+    'cli': '.cli',
+}
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,86 +1,315 @@
 import time
 import json
 import os
+import sqlite3
+from contextlib import closing
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from .sketch import LogHistogram
+
+ROLLBACK_SUFFIX = ' (rollback)'
+
+# Columns added to migration_log after its first release, for upgrading old databases.
+ADDED_COLUMNS = {
+    'timeline': 'TEXT',
+    'lock_timeouts': 'INTEGER NOT NULL DEFAULT 0',
+    'lock_wait_seconds': 'REAL NOT NULL DEFAULT 0',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS migration_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    migration_file TEXT NOT NULL,
+    duration_seconds REAL NOT NULL,
+    success INTEGER NOT NULL,
+    error TEXT,
+    query_count INTEGER NOT NULL DEFAULT 0,
+    total_rows_affected INTEGER NOT NULL DEFAULT 0,
+    timeline TEXT,
+    lock_timeouts INTEGER NOT NULL DEFAULT 0,
+    lock_wait_seconds REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS migration_log_timestamp_idx ON migration_log (timestamp);
+CREATE INDEX IF NOT EXISTS migration_log_file_idx ON migration_log (migration_file);
+CREATE TABLE IF NOT EXISTS migration_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_migrations INTEGER NOT NULL,
+    successful_migrations INTEGER NOT NULL,
+    failed_migrations INTEGER NOT NULL,
+    total_duration REAL NOT NULL,
+    total_queries INTEGER NOT NULL,
+    total_rows_affected INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO migration_stats VALUES (1, 0, 0, 0, 0.0, 0, 0);
+CREATE TABLE IF NOT EXISTS imported_logs (
+    filename TEXT PRIMARY KEY
+);
+"""
 
 class MigrationAnalytics:
+    """Migration analytics backed by an append-only SQLite log.
+
+    Every entry is inserted together with an update of a single-row aggregate
+    table in one transaction, so writers from several threads or processes
+    never lose entries and reading the totals is a single-row lookup.
+    """
+
+    DB_FILE = 'analytics.db'
+
     def __init__(self, log_dir: str = "migration_logs"):
         self.log_dir = log_dir
+        self.db_path = os.path.join(log_dir, self.DB_FILE)
         self._ensure_log_dir()
-        
+        self._init_db()
+        self.import_json_logs()
+
     def _ensure_log_dir(self):
         """Ensure the log directory exists."""
         if not os.path.exists(self.log_dir):
             os.makedirs(self.log_dir)
-            
-    def _get_log_file(self) -> str:
-        """Get the log file path for the current day."""
-        date_str = datetime.now().strftime('%Y%m%d')
-        return os.path.join(self.log_dir, f"migration_log_{date_str}.json")
-    
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        # so concurrent writers queue on the database lock instead of failing.
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _init_db(self):
+        """Create the log and aggregate tables if needed."""
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(migration_log)")}
+            if columns:
+                for column, definition in ADDED_COLUMNS.items():
+                    if column not in columns:
+                        conn.execute(f"ALTER TABLE migration_log ADD COLUMN {column} {definition}")
+            conn.executescript(SCHEMA)
+
+    def _append(self, conn: sqlite3.Connection, entries: List[Dict[str, Any]]) -> None:
+        """Insert entries and fold them into the aggregates; caller holds a transaction."""
+        conn.executemany(
+            """
+            INSERT INTO migration_log (timestamp, migration_file, duration_seconds, success,
+                                       error, query_count, total_rows_affected, timeline,
+                                       lock_timeouts, lock_wait_seconds)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (entry['timestamp'], entry['migration_file'], entry['duration_seconds'],
+                 int(bool(entry['success'])), entry.get('error'), entry.get('query_count', 0),
+                 entry.get('total_rows_affected', 0),
+                 json.dumps(entry['timeline']) if entry.get('timeline') is not None else None,
+                 entry.get('lock_timeouts', 0), entry.get('lock_wait_seconds', 0.0))
+                for entry in entries
+            ]
+        )
+        successful = sum(1 for entry in entries if entry['success'])
+        conn.execute(
+            """
+            UPDATE migration_stats SET
+                total_migrations = total_migrations + ?,
+                successful_migrations = successful_migrations + ?,
+                failed_migrations = failed_migrations + ?,
+                total_duration = total_duration + ?,
+                total_queries = total_queries + ?,
+                total_rows_affected = total_rows_affected + ?
+            WHERE id = 1
+            """,
+            (
+                len(entries), successful, len(entries) - successful,
+                sum(entry['duration_seconds'] for entry in entries),
+                sum(entry.get('query_count', 0) for entry in entries),
+                sum(entry.get('total_rows_affected', 0) for entry in entries),
+            )
+        )
+
     def log_migration(self, migration_file: str, start_time: float, end_time: float,
                      success: bool, error: str = None, query_count: int = 0,
-                     total_rows_affected: int = 0) -> Dict[str, Any]:
-        """Log migration execution details."""
-        duration = end_time - start_time
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'migration_file': migration_file,
-            'duration_seconds': duration,
-            'success': success,
-            'error': error,
-            'query_count': query_count,
-            'total_rows_affected': total_rows_affected
-        }
-        
-        log_file = self._get_log_file()
-        existing_logs = []
-        
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
+                     total_rows_affected: int = 0,
+                     timeline: Optional[List[Dict[str, Any]]] = None,
+                     lock_timeouts: int = 0, lock_wait_seconds: float = 0.0) -> Dict[str, Any]:
+        """Log migration execution details, optionally with a per-statement timeline.
+
+        ``lock_timeouts`` counts statement attempts that gave up waiting for a
+        lock and were retried; ``lock_wait_seconds`` is the time lost to them.
+        """
+        return self.log_migrations([{
+            'migration_file': migration_file, 'start_time': start_time, 'end_time': end_time,
+            'success': success, 'error': error, 'query_count': query_count,
+            'total_rows_affected': total_rows_affected, 'timeline': timeline,
+            'lock_timeouts': lock_timeouts, 'lock_wait_seconds': lock_wait_seconds
+        }])[0]
+
+    def log_migrations(self, runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Log several runs, each given as ``log_migration`` arguments, in one write."""
+        log_entries = [
+            {
+                'timestamp': datetime.now().isoformat(),
+                'migration_file': run['migration_file'],
+                'duration_seconds': run['end_time'] - run['start_time'],
+                'success': run['success'],
+                'error': run.get('error'),
+                'query_count': run.get('query_count', 0),
+                'total_rows_affected': run.get('total_rows_affected', 0),
+                'timeline': run.get('timeline'),
+                'lock_timeouts': run.get('lock_timeouts', 0),
+                'lock_wait_seconds': run.get('lock_wait_seconds', 0.0)
+            }
+            for run in runs
+        ]
+
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._append(conn, log_entries)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return log_entries
+
+    def import_json_logs(self) -> int:
+        """Import legacy ``migration_log_*.json`` files once; returns entries imported.
+
+        Files already imported are found with a single read-only query, so the
+        write lock is only taken when something is actually left to import.
+        """
+        filenames = sorted(
+            filename for filename in os.listdir(self.log_dir)
+            if filename.startswith('migration_log_') and filename.endswith('.json')
+        )
+        if not filenames:
+            return 0
+
+        imported = 0
+        with closing(self._connect()) as conn:
+            done = {row[0] for row in conn.execute("SELECT filename FROM imported_logs")}
+            for filename in filenames:
+                if filename in done:
+                    continue
+                # Checked again under the lock: another process may have
+                # imported the file since the read above.
+                conn.execute("BEGIN IMMEDIATE")
                 try:
-                    existing_logs = json.load(f)
-                except json.JSONDecodeError:
-                    existing_logs = []
-                    
-        existing_logs.append(log_entry)
-        
-        with open(log_file, 'w') as f:
-            json.dump(existing_logs, f, indent=2)
-            
-        return log_entry
-    
+                    done = conn.execute(
+                        "SELECT 1 FROM imported_logs WHERE filename = ?", (filename,)
+                    ).fetchone()
+                    if not done:
+                        with open(os.path.join(self.log_dir, filename), 'r') as f:
+                            try:
+                                entries = json.load(f)
+                            except json.JSONDecodeError:
+                                entries = []
+                        if entries:
+                            self._append(conn, entries)
+                            imported += len(entries)
+                        conn.execute("INSERT INTO imported_logs (filename) VALUES (?)", (filename,))
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        return imported
+
+    def query_stats(self, since: Optional[datetime] = None,
+                    by: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Aggregate log entries in a time window, with duration percentiles.
+
+        Rows are streamed from the database and folded into one mergeable
+        duration sketch per group, so memory stays bounded by the number of
+        groups rather than the number of entries. Results are broken down by
+        kind (apply or rollback) and outcome (success or failure), and with
+        ``by='migration'`` also per migration file.
+        """
+        if by not in (None, 'migration'):
+            raise ValueError(f"Unsupported grouping: {by}")
+
+        sql = """
+            SELECT migration_file, duration_seconds, success, query_count, total_rows_affected,
+                   lock_timeouts, lock_wait_seconds
+            FROM migration_log
+        """
+        params = ()
+        if since is not None:
+            sql += " WHERE timestamp >= ?"
+            params = (since.isoformat(),)
+
+        groups = {}
+        with closing(self._connect()) as conn:
+            for (migration_file, duration, success, queries, rows,
+                 lock_timeouts, lock_wait) in conn.execute(sql, params):
+                kind = 'apply'
+                if migration_file.endswith(ROLLBACK_SUFFIX):
+                    kind = 'rollback'
+                    migration_file = migration_file[:-len(ROLLBACK_SUFFIX)]
+                key = (migration_file if by == 'migration' else 'all', kind,
+                       'success' if success else 'failure')
+
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = {'durations': LogHistogram(), 'total_duration': 0.0,
+                                           'total_queries': 0, 'total_rows_affected': 0,
+                                           'lock_timeouts': 0, 'lock_wait_seconds': 0.0}
+                group['durations'].add(duration)
+                group['total_duration'] += duration
+                group['total_queries'] += queries
+                group['total_rows_affected'] += rows
+                group['lock_timeouts'] += lock_timeouts
+                group['lock_wait_seconds'] += lock_wait
+
+        results = []
+        for (migration, kind, outcome), group in sorted(groups.items()):
+            durations = group['durations']
+            total_duration = group['total_duration']
+            results.append({
+                'migration': migration,
+                'kind': kind,
+                'outcome': outcome,
+                'count': durations.count,
+                'average_duration': total_duration / durations.count,
+                'p50_duration': durations.quantile(0.50),
+                'p95_duration': durations.quantile(0.95),
+                'p99_duration': durations.quantile(0.99),
+                'max_duration': durations.max,
+                'total_queries': group['total_queries'],
+                'total_rows_affected': group['total_rows_affected'],
+                'lock_timeouts': group['lock_timeouts'],
+                'lock_wait_seconds': group['lock_wait_seconds'],
+                'rows_per_second': group['total_rows_affected'] / total_duration if total_duration else 0.0,
+                'queries_per_second': group['total_queries'] / total_duration if total_duration else 0.0,
+            })
+        return results
+
+    def get_timeline(self, migration_file: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the statement timeline of the latest recorded run of a migration."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                """
+                SELECT timeline FROM migration_log
+                WHERE migration_file = ? AND timeline IS NOT NULL
+                ORDER BY id DESC LIMIT 1
+                """,
+                (migration_file,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
     def get_migration_stats(self) -> Dict[str, Any]:
         """Get statistics about migrations."""
-        all_logs = []
-        for filename in os.listdir(self.log_dir):
-            if filename.startswith('migration_log_') and filename.endswith('.json'):
-                with open(os.path.join(self.log_dir, filename), 'r') as f:
-                    try:
-                        logs = json.load(f)
-                        all_logs.extend(logs)
-                    except json.JSONDecodeError:
-                        continue
-                        
-        if not all_logs:
-            return {
-                'total_migrations': 0,
-                'successful_migrations': 0,
-                'failed_migrations': 0,
-                'average_duration': 0,
-                'total_queries': 0,
-                'total_rows_affected': 0
-            }
-            
-        successful = [log for log in all_logs if log['success']]
-        failed = [log for log in all_logs if not log['success']]
-        
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                """
+                SELECT total_migrations, successful_migrations, failed_migrations,
+                       total_duration, total_queries, total_rows_affected
+                FROM migration_stats WHERE id = 1
+                """
+            ).fetchone()
+
+        total, successful, failed, total_duration, total_queries, total_rows = row
         return {
-            'total_migrations': len(all_logs),
-            'successful_migrations': len(successful),
-            'failed_migrations': len(failed),
-            'average_duration': sum(log['duration_seconds'] for log in all_logs) / len(all_logs),
-            'total_queries': sum(log['query_count'] for log in all_logs),
-            'total_rows_affected': sum(log['total_rows_affected'] for log in all_logs)
+            'total_migrations': total,
+            'successful_migrations': successful,
+            'failed_migrations': failed,
+            'average_duration': total_duration / total if total else 0,
+            'total_queries': total_queries,
+            'total_rows_affected': total_rows
         }
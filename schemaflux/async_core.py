@@ -0,0 +1,276 @@
+import asyncio
+import functools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from .analytics import MigrationAnalytics, ROLLBACK_SUFFIX
+from .async_version import AsyncVersionControl
+from .cache import MigrationCache
+from .async_locking import create_async_migration_lock
+from .connectors.async_base import AsyncBaseConnector
+from .core import LOCK_SKIPPED, MigrationSource
+from .locking import LOCK_MODES
+
+class AsyncMigrationManager(MigrationSource):
+    """asyncio counterpart of ``MigrationManager``.
+
+    Reads the same migrations directory (sharing the parse cache), writes
+    the same ``migration_history`` and analytics log, and awaits every
+    database call, so it can run inside an asyncio service or migrate many
+    databases concurrently with ``asyncio.gather``::
+
+        async with AsyncMigrationManager(connection_options={'dsn': dsn}) as manager:
+            await manager.apply_migrations()
+
+    PostgreSQL runs on asyncpg and MongoDB on motor. Only the newest
+    migration can be rolled back at a time. Multi-step and single
+    transaction rollbacks, verify, plan, COPY directives and backfill
+    migrations still need the synchronous ``MigrationManager``.
+    Runs take the same migration lock as the synchronous manager, so sync
+    and async replicas never migrate one database at the same time.
+    """
+
+    def __init__(self, migrations_dir: str = "migrations", db_type: str = "postgresql",
+                 batch_size: int = 1, transactional: bool = True,
+                 cache_dir: Optional[str] = ".schemaflux_cache",
+                 connection_options: Optional[Dict[str, Any]] = None,
+                 log_dir: str = "migration_logs",
+                 record_timeline: bool = False,
+                 lock_timeout: Optional[float] = None, lock_retries: int = 5,
+                 migration_lock: str = 'wait', migration_lock_wait: Optional[float] = None):
+        if migration_lock not in LOCK_MODES:
+            raise ValueError(f"migration_lock must be one of {', '.join(LOCK_MODES)}")
+        self.migrations_dir = migrations_dir
+        self.db_type = db_type.lower()
+        self.connection_options = connection_options or {}
+        self.batch_size = batch_size
+        self.transactional = transactional
+        self.record_timeline = record_timeline
+        self.lock_timeout = lock_timeout
+        self.lock_retries = lock_retries
+        self.migration_lock = migration_lock
+        self.migration_lock_wait = migration_lock_wait
+        self._held_lock = None
+        self.cache = MigrationCache(cache_dir) if cache_dir else None
+        self.connector = self._create_connector(self.db_type)
+        self.version_control = AsyncVersionControl(self.connector)
+        self.analytics = MigrationAnalytics(log_dir)
+
+    def _create_connector(self, db_type: str) -> AsyncBaseConnector:
+        """Create appropriate database connector based on type."""
+        if db_type == "postgresql":
+            from .connectors.async_postgresql import AsyncPostgreSQLConnector
+            return AsyncPostgreSQLConnector(batch_size=self.batch_size, lock_timeout=self.lock_timeout,
+                                            lock_retries=self.lock_retries, **self.connection_options)
+        elif db_type == "mongodb":
+            from .connectors.async_mongodb import AsyncMongoDBConnector
+            return AsyncMongoDBConnector(**self.connection_options)
+        else:
+            raise ValueError(f"Unsupported database type: {db_type}")
+
+    async def connect(self) -> None:
+        """Open the connection and make sure the history table exists."""
+        await self.connector.connect()
+        await self.version_control.init()
+
+    async def close(self) -> None:
+        """Close the database connection."""
+        await self.connector.close()
+
+    async def __aenter__(self) -> 'AsyncMigrationManager':
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @asynccontextmanager
+    async def _migration_lock(self):
+        """Hold the migration lock around a run; yields False when ``skip`` finds it taken."""
+        if self.migration_lock == 'off':
+            yield True
+            return
+        lock = create_async_migration_lock(self.connector)
+        if not await lock.acquire(wait=self.migration_lock == 'wait', timeout=self.migration_lock_wait):
+            if self.migration_lock == 'skip':
+                yield False
+                return
+            raise Exception(f"Timed out after {self.migration_lock_wait}s waiting for the migration lock")
+        self._held_lock = lock
+        try:
+            yield True
+        finally:
+            self._held_lock = None
+            await lock.release()
+
+    def _ensure_lock_held(self) -> None:
+        """Stop the run if its migration lease lapsed or was taken over."""
+        if self._held_lock is not None:
+            self._held_lock.ensure_held()
+
+    async def _log_migration(self, **arguments) -> Dict[str, Any]:
+        """Write an analytics entry without blocking the event loop on SQLite."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.analytics.log_migration, **arguments)
+        )
+
+    async def _run_steps(self, steps: List[Tuple[str, Any]]) -> None:
+        """Execute statement batches in order."""
+        for kind, payload in steps:
+            if kind == 'copy':
+                operation, path = payload
+                await self.connector.copy_from_file(operation, os.path.join(self.migrations_dir, path))
+            else:
+                await self.connector.execute_batch(payload)
+
+    async def _execute_migration(self, migration: Dict[str, Any], steps: List[Tuple[str, Any]],
+                                 on_success: Callable[[], Awaitable[None]]) -> None:
+        """Execute a migration plus its history bookkeeping, atomically when possible."""
+        self._ensure_lock_held()
+        with self._lock_settings(migration, self.connector):
+            if self._runs_in_transaction(migration, steps, self.connector):
+                async with self.connector.transaction():
+                    await self._run_steps(steps)
+                    self._ensure_lock_held()
+                    await on_success()
+            else:
+                await self._run_steps(steps)
+                self._ensure_lock_held()
+                await on_success()
+
+    async def apply_migrations(self) -> List[Dict[str, Any]]:
+        """Apply pending migrations in order and return their analytics entries."""
+        async with self._migration_lock() as acquired:
+            if not acquired:
+                print(LOCK_SKIPPED)
+                return []
+            return await self._apply_pending()
+
+    async def _apply_pending(self) -> List[Dict[str, Any]]:
+        """Apply the baseline (on an empty database) and pending migrations."""
+        try:
+            entries = []
+            baseline = self._find_baseline()
+            if baseline is not None and await self.version_control.get_last_applied() is None:
+                entries.append(await self._apply_baseline(baseline))
+
+            files = self._get_migration_files()
+            pending, _ = self._split_pending(files, await self.version_control.get_pending_versions(
+                filename.split('_')[0] for filename in files
+            ))
+            for filename in pending:
+                entries.append(await self._apply_migration_file(filename))
+            return entries
+        finally:
+            self._save_cache()
+
+    async def _apply_baseline(self, filename: str) -> Dict[str, Any]:
+        """Bring an empty database up to a squash baseline and record every version it covers."""
+        start_time = time.time()
+        self.connector.reset_metrics()
+        timeline = self._start_timeline(self.connector)
+        success = True
+        error_msg = None
+
+        try:
+            migration = self._load_migration(filename)
+            squashed = self._squashed_files(migration)
+            checksums = [self._checksum(name) for name in squashed]
+            await self._execute_migration(
+                migration, migration['up_steps'],
+                lambda: self.version_control.record_migrations(squashed, checksums)
+            )
+            print(f"Applied baseline: {filename} ({len(squashed)} migrations)")
+        except Exception as e:
+            success = False
+            error_msg = str(e)
+            raise Exception(f"Failed to apply baseline {filename}: {str(e)}")
+        finally:
+            entry = await self._log_migration(
+                **self._log_arguments(filename, start_time, success, error_msg, self.connector, timeline)
+            )
+        return entry
+
+    async def _apply_migration_file(self, filename: str) -> Dict[str, Any]:
+        """Apply one migration and log its analytics."""
+        version = filename.split('_')[0]
+        start_time = time.time()
+        self.connector.reset_metrics()
+        timeline = self._start_timeline(self.connector)
+        success = True
+        error_msg = None
+
+        try:
+            migration = self._load_migration(filename)
+            if self._is_backfill(migration):
+                raise Exception("Backfill migrations are not supported by the async engine; use MigrationManager")
+            steps = migration['up_steps']
+            checksum = self._checksum(filename)
+            if steps:
+                await self._execute_migration(
+                    migration, steps,
+                    lambda: self.version_control.record_migration(version, filename, checksum=checksum)
+                )
+                print(f"Applied migration: {filename}")
+        except Exception as e:
+            success = False
+            error_msg = str(e)
+            await self.version_control.record_migration(version, filename, False)
+            raise Exception(f"Failed to apply migration {filename}: {str(e)}")
+        finally:
+            entry = await self._log_migration(
+                **self._log_arguments(filename, start_time, success, error_msg, self.connector, timeline)
+            )
+        return entry
+
+    async def rollback_migration(self) -> None:
+        """Rollback the last migration."""
+        async with self._migration_lock() as acquired:
+            if not acquired:
+                print(LOCK_SKIPPED)
+                return
+            await self._rollback_last()
+
+    async def _rollback_last(self) -> None:
+        """Roll back the newest applied migration and log its analytics."""
+        last = await self.version_control.get_last_applied()
+        if last is None:
+            print("No migrations to rollback")
+            return
+
+        last_version, last_name = last
+        start_time = time.time()
+        self.connector.reset_metrics()
+        timeline = self._start_timeline(self.connector)
+        success = True
+        error_msg = None
+
+        try:
+            migration = self._load_migration(last_name)
+            if not migration['down']:
+                raise Exception("No down migration specified")
+            steps = migration['down_steps']
+            if steps:
+                await self._execute_migration(
+                    migration, steps,
+                    lambda: self.version_control.remove_migration(last_version)
+                )
+                print(f"Rolled back migration: {last_name}")
+        except Exception as e:
+            success = False
+            error_msg = str(e)
+            raise Exception(f"Failed to rollback migration {last_name}: {str(e)}")
+        finally:
+            self._save_cache()
+            await self._log_migration(**self._log_arguments(
+                f"{last_name}{ROLLBACK_SUFFIX}", start_time, success, error_msg, self.connector, timeline
+            ))
+
+    async def show_status(self) -> List[Dict[str, Any]]:
+        """Show migration status."""
+        files = self._get_migration_files()
+        unapplied = await self.version_control.get_pending_versions(filename.split('_')[0] for filename in files)
+        self._save_cache()
+        return [{'file': filename, 'applied': filename.split('_')[0] not in unapplied} for filename in files]
@@ -0,0 +1,111 @@
+import asyncio
+import random
+import time
+from typing import Optional
+from .connectors.async_base import AsyncBaseConnector
+from .locking import ADVISORY_LOCK_NAMESPACE, LEASE_COLLECTION, LeaseState
+
+class AsyncMigrationLock:
+    """asyncio counterpart of ``MigrationLock``, polling with ``asyncio.sleep``."""
+
+    def __init__(self, connector: AsyncBaseConnector, poll_interval: float = 1.0):
+        self.connector = connector
+        self.poll_interval = poll_interval
+
+    async def acquire(self, wait: bool = True, timeout: Optional[float] = None) -> bool:
+        """Take the lock, waiting up to ``timeout`` seconds (forever if None) when ``wait`` is set."""
+        if not wait:
+            return await self._try_acquire()
+        return await self._poll(timeout)
+
+    async def _poll(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not await self._try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            delay = random.uniform(0.5, 1.5) * self.poll_interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            await asyncio.sleep(delay)
+        return True
+
+    async def _try_acquire(self) -> bool:
+        raise NotImplementedError
+
+    def ensure_held(self) -> None:
+        """Raise if the lock was lost since it was acquired; a no-op for session locks."""
+
+    async def release(self) -> None:
+        raise NotImplementedError
+
+class AsyncAdvisoryLock(AsyncMigrationLock):
+    """``AdvisoryLock`` on an asyncpg connection."""
+
+    def _statement(self, function: str) -> str:
+        return f"SELECT {function}({ADVISORY_LOCK_NAMESPACE}, hashtext(current_schema()));"
+
+    async def _poll(self, timeout: Optional[float]) -> bool:
+        if timeout is None:
+            await self.connector.execute(self._statement('pg_advisory_lock'))
+            return True
+        return await super()._poll(timeout)
+
+    async def _try_acquire(self) -> bool:
+        rows = await self.connector.fetch(self._statement('pg_try_advisory_lock'))
+        return bool(rows[0][0])
+
+    async def release(self) -> None:
+        await self.connector.execute(self._statement('pg_advisory_unlock'))
+
+class AsyncMongoLease(LeaseState, AsyncMigrationLock):
+    """``MongoLease`` on motor, renewed from an asyncio task instead of a thread."""
+
+    def __init__(self, connector: AsyncBaseConnector, name: str = 'migrations', ttl: float = 60.0,
+                 poll_interval: float = 1.0):
+        super().__init__(connector, poll_interval)
+        self._init_lease(name, ttl)
+        self._renewer = None
+
+    async def _try_acquire(self) -> bool:
+        from pymongo.errors import DuplicateKeyError
+        collection = self.connector.db[LEASE_COLLECTION]
+        sent_at = time.monotonic()
+        try:
+            await collection.update_one(*self._acquire_arguments(), upsert=True)
+        except DuplicateKeyError:
+            return False
+        self._written(sent_at)
+        self._renewer = asyncio.ensure_future(self._renew())
+        return True
+
+    async def _renew(self) -> None:
+        collection = self.connector.db[LEASE_COLLECTION]
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            sent_at = time.monotonic()
+            try:
+                result = await collection.update_one(*self._renew_arguments())
+            except Exception:
+                continue
+            if result.matched_count == 0:
+                self._lost = True
+                return
+            self._written(sent_at)
+
+    async def release(self) -> None:
+        if self._renewer is not None:
+            self._renewer.cancel()
+            try:
+                await self._renewer
+            except asyncio.CancelledError:
+                pass
+            self._renewer = None
+        await self.connector.db[LEASE_COLLECTION].delete_one({'_id': self.name, 'owner': self.owner})
+
+def create_async_migration_lock(connector: AsyncBaseConnector, poll_interval: float = 1.0) -> AsyncMigrationLock:
+    """Build the migration lock matching an async connector's database."""
+    if connector.dialect == 'postgresql':
+        return AsyncAdvisoryLock(connector, poll_interval)
+    elif connector.dialect == 'mongodb':
+        return AsyncMongoLease(connector, poll_interval=poll_interval)
+    raise ValueError(f"No migration lock for database type: {connector.dialect}")
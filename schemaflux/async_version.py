@@ -0,0 +1,110 @@
+from typing import Iterable, List, Optional, Set, Tuple
+from .connectors.async_base import AsyncBaseConnector
+from .version import (
+    POSTGRESQL_HISTORY_STATE, POSTGRESQL_HISTORY_UPGRADE, POSTGRESQL_HISTORY_VERSION,
+    POSTGRESQL_LAST_APPLIED, MONGODB_APPLIED_QUERY, MONGODB_HISTORY_DUPLICATES, MONGODB_HISTORY_STATE,
+    MONGODB_HISTORY_VERSION, MONGODB_LAST_APPLIED, mongodb_history_upgrade, mongodb_record_operation,
+    split_at_high_water_mark
+)
+
+class AsyncVersionControl:
+    """asyncio counterpart of ``VersionControl``, using the same history table/collection."""
+
+    def __init__(self, connector: AsyncBaseConnector):
+        self.connector = connector
+
+    async def init(self):
+        """Create or upgrade the history table/collection if it is not current."""
+        if self.connector.dialect == 'postgresql':
+            rows = await self.connector.fetch(POSTGRESQL_HISTORY_STATE)
+            if rows[0][0] == POSTGRESQL_HISTORY_VERSION:
+                return
+            async with self.connector.transaction():
+                await self.connector.execute_batch([(statement, None) for statement in POSTGRESQL_HISTORY_UPGRADE])
+        elif self.connector.dialect == 'mongodb':
+            for state in await self.connector.execute(MONGODB_HISTORY_STATE):
+                if state.get('version') == MONGODB_HISTORY_VERSION:
+                    return
+            duplicates = await self.connector.execute(MONGODB_HISTORY_DUPLICATES)
+            for operation in mongodb_history_upgrade(duplicates):
+                await self.connector.execute(operation)
+
+    async def get_applied_migrations(self) -> List[Tuple[str, str]]:
+        """Get list of applied migrations."""
+        if self.connector.dialect == 'postgresql':
+            sql = "SELECT version, name FROM migration_history WHERE success = TRUE ORDER BY version;"
+            return [(row['version'], row['name']) for row in await self.connector.fetch(sql)]
+        elif self.connector.dialect == 'mongodb':
+            result = await self.connector.execute(MONGODB_APPLIED_QUERY)
+            return [(doc['version'], doc['name']) for doc in result]
+
+    async def get_last_applied(self) -> Optional[Tuple[str, str]]:
+        """Get the (version, name) of the newest applied migration, or None."""
+        if self.connector.dialect == 'postgresql':
+            rows = await self.connector.fetch(POSTGRESQL_LAST_APPLIED)
+            return (rows[0]['version'], rows[0]['name']) if rows else None
+        elif self.connector.dialect == 'mongodb':
+            for doc in await self.connector.execute(MONGODB_LAST_APPLIED):
+                return doc['version'], doc['name']
+            return None
+
+    async def get_pending_versions(self, versions: Iterable[str]) -> Set[str]:
+        """Return the versions among ``versions`` that have not been applied (see ``VersionControl``)."""
+        last = await self.get_last_applied()
+        pending, below = split_at_high_water_mark(versions, last[0] if last else None)
+        if not below:
+            return pending
+        if self.connector.dialect == 'postgresql':
+            sql = """
+            SELECT v FROM unnest($1::varchar[]) AS v
+            WHERE NOT EXISTS (SELECT 1 FROM migration_history h WHERE h.version = v AND h.success);
+            """
+            pending.update(row[0] for row in await self.connector.fetch(sql, (below,)))
+        elif self.connector.dialect == 'mongodb':
+            applied = await self.connector.execute(('find', 'migration_history', {
+                'filter': {'version': {'$in': below}, 'success': True}, 'projection': {'version': 1}
+            }))
+            pending.update(set(below) - {doc['version'] for doc in applied})
+        return pending
+
+    async def record_migration(self, version: str, name: str, success: bool = True,
+                               checksum: Optional[str] = None):
+        """Record a migration execution, with the SHA-256 of the file that ran."""
+        if self.connector.dialect == 'postgresql':
+            sql = """
+            INSERT INTO migration_history (version, name, success, checksum)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (version) DO UPDATE
+            SET name = EXCLUDED.name, success = EXCLUDED.success, checksum = EXCLUDED.checksum,
+                applied_at = CURRENT_TIMESTAMP;
+            """
+            await self.connector.execute(sql, (version, name, success, checksum))
+        elif self.connector.dialect == 'mongodb':
+            await self.connector.execute(mongodb_record_operation(version, name, success, checksum))
+
+    async def record_migrations(self, names: List[str], checksums: Optional[List[Optional[str]]] = None):
+        """Record many migration files as applied at once, e.g. those a baseline squashed."""
+        versions = [name.split('_')[0] for name in names]
+        checksums = checksums or [None] * len(names)
+        if self.connector.dialect == 'postgresql':
+            sql = """
+            INSERT INTO migration_history (version, name, success, checksum)
+            SELECT version, name, TRUE, checksum
+            FROM unnest($1::varchar[], $2::varchar[], $3::varchar[]) AS squashed(version, name, checksum)
+            ON CONFLICT (version) DO UPDATE
+            SET name = EXCLUDED.name, success = TRUE, checksum = EXCLUDED.checksum,
+                applied_at = CURRENT_TIMESTAMP;
+            """
+            await self.connector.execute(sql, (versions, names, checksums))
+        elif self.connector.dialect == 'mongodb':
+            await self.connector.execute_batch([
+                (mongodb_record_operation(version, name, True, checksum), None)
+                for version, name, checksum in zip(versions, names, checksums)
+            ])
+
+    async def remove_migration(self, version: str):
+        """Remove a migration record during rollback."""
+        if self.connector.dialect == 'postgresql':
+            await self.connector.execute("DELETE FROM migration_history WHERE version = $1;", (version,))
+        elif self.connector.dialect == 'mongodb':
+            await self.connector.execute(('delete_many', 'migration_history', {'filter': {'version': version}}))
@@ -0,0 +1,150 @@
+import time
+from typing import Any, Callable, Dict, Optional
+from psycopg2 import sql as pgsql
+from .connectors.base import BaseConnector
+
+PROGRESS_TABLE = """
+CREATE TABLE IF NOT EXISTS migration_backfill_progress (
+    version VARCHAR(255) PRIMARY KEY,
+    last_key BIGINT NOT NULL,
+    rows_done BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+REPLICATION_LAG_QUERY = """
+SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication;
+"""
+
+class BackfillRunner:
+    """Run a data migration over a large table in primary-key chunks.
+
+    ``statement`` is executed once per chunk with ``%(start)s`` and
+    ``%(end)s`` bound to the chunk's key range (start inclusive, end
+    exclusive), and each chunk commits on its own so locks stay short and
+    vacuum can keep up. Progress is checkpointed in
+    ``migration_backfill_progress`` in the same transaction as the chunk, so
+    an interrupted backfill resumes after the last committed chunk.
+
+    Throughput can be capped with ``max_rows_per_second``, and with
+    ``max_replication_lag`` (seconds) the runner pauses while any replica
+    lags further behind than that.
+    """
+
+    def __init__(self, connector: BaseConnector, version: str, statement: str,
+                 table: str, key: str = 'id', chunk_size: int = 10000,
+                 max_rows_per_second: Optional[float] = None,
+                 max_replication_lag: Optional[float] = None,
+                 lag_poll_interval: float = 1.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        if connector.dialect != 'postgresql':
+            raise Exception("Backfill migrations are only supported for PostgreSQL")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self.connector = connector
+        self.version = version
+        self.statement = statement
+        self.table = table
+        self.key = key
+        self.chunk_size = chunk_size
+        self.max_rows_per_second = max_rows_per_second
+        self.max_replication_lag = max_replication_lag
+        self.lag_poll_interval = lag_poll_interval
+        self.sleep = sleep
+
+    @classmethod
+    def from_headers(cls, connector: BaseConnector, version: str, statement: str,
+                     headers: Dict[str, str]) -> 'BackfillRunner':
+        """Build a runner from ``-- TABLE:``/``-- KEY:``/... migration headers."""
+        if 'TABLE' not in headers:
+            raise Exception("Backfill migrations need a '-- TABLE:' header")
+
+        def number(name: str, convert: Callable[[str], Any]) -> Any:
+            return convert(headers[name]) if headers.get(name) else None
+
+        return cls(
+            connector, version, statement,
+            table=headers['TABLE'],
+            key=headers.get('KEY') or 'id',
+            chunk_size=number('CHUNK_SIZE', int) or 10000,
+            max_rows_per_second=number('MAX_ROWS_PER_SECOND', float),
+            max_replication_lag=number('MAX_REPLICATION_LAG', float),
+        )
+
+    def _identifier(self, name: str) -> pgsql.Composable:
+        """Quote a possibly schema-qualified name."""
+        return pgsql.SQL('.').join(pgsql.Identifier(part) for part in name.split('.'))
+
+    def _fetch_one(self, query: Any, params: Any = None) -> Any:
+        return self.connector.execute(query, params).fetchone()
+
+    def _key_bounds(self):
+        query = pgsql.SQL("SELECT MIN({key}), MAX({key}) FROM {table}").format(
+            key=pgsql.Identifier(self.key), table=self._identifier(self.table)
+        )
+        return self._fetch_one(query)
+
+    def _chunk_end(self, start: int, max_key: int) -> int:
+        """Key just past the next ``chunk_size`` rows, so sparse keys still give full chunks."""
+        query = pgsql.SQL(
+            "SELECT {key} FROM {table} WHERE {key} >= %s ORDER BY {key} OFFSET %s LIMIT 1"
+        ).format(key=pgsql.Identifier(self.key), table=self._identifier(self.table))
+        row = self._fetch_one(query, (start, self.chunk_size))
+        return row[0] if row else max_key + 1
+
+    def _checkpoint(self):
+        return self._fetch_one(
+            "SELECT last_key, rows_done FROM migration_backfill_progress WHERE version = %s;",
+            (self.version,)
+        )
+
+    def _wait_for_replicas(self) -> None:
+        if self.max_replication_lag is None:
+            return
+        while float(self._fetch_one(REPLICATION_LAG_QUERY)[0]) > self.max_replication_lag:
+            self.sleep(self.lag_poll_interval)
+
+    def run(self) -> int:
+        """Process every remaining chunk and return the rows updated in this run."""
+        self.connector.execute(PROGRESS_TABLE)
+        min_key, max_key = self._key_bounds()
+        if min_key is None:
+            return 0
+
+        checkpoint = self._checkpoint()
+        start, rows_done = checkpoint if checkpoint else (min_key, 0)
+        rows_this_run = 0
+        started_at = time.monotonic()
+
+        while start <= max_key:
+            end = self._chunk_end(start, max_key)
+            with self.connector.transaction():
+                cursor = self.connector.execute(self.statement, {'start': start, 'end': end})
+                rows = max(cursor.rowcount, 0)
+                rows_done += rows
+                self.connector.execute(
+                    """
+                    INSERT INTO migration_backfill_progress (version, last_key, rows_done, updated_at)
+                    VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                    ON CONFLICT (version) DO UPDATE
+                    SET last_key = EXCLUDED.last_key, rows_done = EXCLUDED.rows_done,
+                        updated_at = EXCLUDED.updated_at;
+                    """,
+                    (self.version, end, rows_done)
+                )
+            rows_this_run += rows
+            start = end
+
+            if self.max_rows_per_second:
+                ahead = rows_this_run / self.max_rows_per_second - (time.monotonic() - started_at)
+                if ahead > 0:
+                    self.sleep(ahead)
+            self._wait_for_replicas()
+
+        return rows_this_run
+
+    def finish(self) -> None:
+        """Drop the checkpoint once the migration has been recorded as applied."""
+        self.connector.execute(
+            "DELETE FROM migration_backfill_progress WHERE version = %s;", (self.version,)
+        )
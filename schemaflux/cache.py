@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+
+# Entry keys become file names, so only ``<namespace>-<sha256>`` is accepted
+ENTRY_KEY = re.compile(r'^\w+-[0-9a-f]{64}$')
+
+def file_checksum(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content, read in chunks so large files never sit in memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _encode(value: Any) -> Any:
+    """Make a cached value JSON-safe, tagging tuples and BSON types so they round-trip."""
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        if not all(isinstance(key, str) for key in value):
+            raise TypeError("Cached dicts must have string keys")
+        return {key: _encode(item) for key, item in value.items()}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    # Dates, ObjectIds and the like from JSON migrations
+    from bson import json_util
+    return {'__bson__': json_util.dumps(value)}
+
+def _decode(value: Any) -> Any:
+    """Reverse ``_encode``."""
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, dict):
+        if set(value) == {'__tuple__'} and isinstance(value['__tuple__'], list):
+            return tuple(_decode(item) for item in value['__tuple__'])
+        if set(value) == {'__bson__'} and isinstance(value['__bson__'], str):
+            from bson import json_util
+            return json_util.loads(value['__bson__'])
+        return {key: _decode(item) for key, item in value.items()}
+    return value
+
+def _is_signature(value: Any) -> bool:
+    return (isinstance(value, list) and len(value) == 2
+            and all(isinstance(item, int) and not isinstance(item, bool) for item in value))
+
+class MigrationCache:
+    """On-disk cache of parsed migration files.
+
+    Files are looked up by path, modification time and size. When those change
+    the content hash is compared before re-parsing, so a file that was merely
+    touched costs one read but no parse. Least recently used entries are
+    evicted once ``max_entries`` is exceeded. Content checksums are kept
+    under the same signature, so verifying unchanged files reads nothing.
+
+    Everything is stored as JSON and the index is validated on load: the
+    cache usually sits inside the checkout, so its content is untrusted and
+    must never be able to run code.
+    """
+
+    FORMAT_VERSION = 5
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, cache_dir: str = ".schemaflux_cache", max_entries: int = 10000):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._index = self._load_index()
+        self._dirty = False
+
+    def _empty_index(self) -> Dict[str, Any]:
+        return {'format': self.FORMAT_VERSION, 'clock': 0, 'files': {}, 'entries': {}, 'dirs': {},
+                'checksums': {}}
+
+    def _load_index(self) -> Dict[str, Any]:
+        """Load the cache index, starting afresh if it is missing, unreadable or malformed."""
+        try:
+            with open(os.path.join(self.cache_dir, self.INDEX_FILE), 'r') as f:
+                index = json.load(f)
+            if self._valid_index(index):
+                return index
+        except Exception:
+            # A broken cache must never break a migration run
+            pass
+        return self._empty_index()
+
+    def _valid_index(self, index: Any) -> bool:
+        """Check every field of a loaded index, so later lookups can trust its shape."""
+        if not isinstance(index, dict) or set(index) != set(self._empty_index()):
+            return False
+        if index['format'] != self.FORMAT_VERSION or not isinstance(index['clock'], int):
+            return False
+        if not all(isinstance(index[field], dict) for field in ('files', 'entries', 'dirs', 'checksums')):
+            return False
+        entries = index['entries']
+        return (
+            all(ENTRY_KEY.match(key) and isinstance(used, int) for key, used in entries.items())
+            and all(isinstance(record, list) and len(record) == 2 and _is_signature(record[0])
+                    and record[1] in entries
+                    for record in index['files'].values())
+            and all(isinstance(record, list) and len(record) == 2 and isinstance(record[0], int)
+                    and isinstance(record[1], list) and all(isinstance(name, str) for name in record[1])
+                    for record in index['dirs'].values())
+            and all(isinstance(record, list) and len(record) == 3 and _is_signature(record[0])
+                    and isinstance(record[1], str) and isinstance(record[2], int)
+                    for record in index['checksums'].values())
+        )
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_entry(self, key: str, validate: Optional[Callable[[Any], bool]] = None) -> Any:
+        try:
+            with open(self._entry_path(key), 'r') as f:
+                value = _decode(json.load(f))
+        except Exception:
+            return None
+        if validate is not None and not validate(value):
+            return None
+        return value
+
+    def _write_atomic(self, path: str, value: Any) -> None:
+        """Write JSON so concurrent readers never observe a partial file."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(value, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _touch(self, key: str) -> None:
+        """Mark an entry as most recently used."""
+        self._index['clock'] += 1
+        self._index['entries'][key] = self._index['clock']
+        self._dirty = True
+
+    def get_listing(self, directory: str, list_files: Callable[[], List[str]],
+                    namespace: str = '') -> List[str]:
+        """Return the migration files of a directory, re-listing only when it changed.
+
+        ``namespace`` separates listings that depend on more than the
+        directory, such as the database type.
+        """
+        mtime = os.stat(directory).st_mtime_ns
+        key = f"{namespace}:{os.path.abspath(directory)}"
+        cached = self._index['dirs'].get(key)
+        if cached and cached[0] == mtime:
+            return list(cached[1])
+
+        files = list_files()
+        self._index['dirs'][key] = [mtime, list(files)]
+        self._dirty = True
+        return files
+
+    def load(self, path: str, namespace: str, parse: Callable[[str], Any],
+             validate: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return the parsed form of a file, calling ``parse`` only on a cache miss.
+
+        ``namespace`` separates entries whose parse result depends on more
+        than the file content, such as the database type. Cached values that
+        ``validate`` rejects are parsed again.
+        """
+        stat = os.stat(path)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        file_key = f"{namespace}:{os.path.abspath(path)}"
+
+        record = self._index['files'].get(file_key)
+        if record and record[0] == signature and record[1] in self._index['entries']:
+            value = self._read_entry(record[1], validate)
+            if value is not None:
+                self._touch(record[1])
+                return value
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        checksum = hashlib.sha256(raw).hexdigest()
+        self._remember_checksum(os.path.abspath(path), signature, checksum)
+        key = f"{namespace}-{checksum}"
+
+        value = self._read_entry(key, validate) if key in self._index['entries'] else None
+        if value is None:
+            value = parse(raw.decode('utf-8'))
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._write_atomic(self._entry_path(key), _encode(value))
+            except (OSError, TypeError, ValueError):
+                return value
+
+        self._index['files'][file_key] = [signature, key]
+        self._touch(key)
+        return value
+
+    def checksum(self, path: str) -> str:
+        """Return a file's SHA-256, hashing it again only when its mtime or size changed."""
+        stat = os.stat(path)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        file_key = os.path.abspath(path)
+        record = self._index['checksums'].get(file_key)
+        checksum = record[1] if record and record[0] == signature else file_checksum(path)
+        self._remember_checksum(file_key, signature, checksum)
+        return checksum
+
+    def _remember_checksum(self, file_key: str, signature: List[int], checksum: str) -> None:
+        """Store a checksum and mark it most recently used."""
+        self._index['clock'] += 1
+        self._index['checksums'][file_key] = [signature, checksum, self._index['clock']]
+        self._dirty = True
+
+    def _evict(self) -> None:
+        """Drop least recently used entries and checksums beyond ``max_entries``."""
+        checksums = self._index['checksums']
+        if len(checksums) > self.max_entries:
+            kept = sorted(checksums, key=lambda file_key: checksums[file_key][2])[-self.max_entries:]
+            self._index['checksums'] = {file_key: checksums[file_key] for file_key in kept}
+
+        entries = self._index['entries']
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+
+        evicted = set(sorted(entries, key=entries.get)[:excess])
+        for key in evicted:
+            del entries[key]
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+        self._index['files'] = {
+            file_key: record for file_key, record in self._index['files'].items()
+            if record[1] not in evicted
+        }
+
+    def save(self) -> None:
+        """Persist the index if anything changed since it was loaded."""
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._evict()
+            self._write_atomic(os.path.join(self.cache_dir, self.INDEX_FILE), self._index)
+            self._dirty = False
+        except OSError:
+            # Caching is best effort; a read-only checkout still migrates fine
+            pass
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        for key in list(self._index['entries']):
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+        self._index = self._empty_index()
+        self._dirty = True
+        self.save()
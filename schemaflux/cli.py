@@ -1,5 +1,8 @@
 import click
 from .core import MigrationManager
+from .fleet import FleetRunner, load_targets
+from .locking import LOCK_MODES
+from .utils import parse_duration, parse_since
 
 ASCII_BANNER = """
 ╔═══╗             ╔╗        ╔═══╗      ╔═══╗ ╔╗  
@@ -32,29 +35,195 @@ def create(name):
                click.style(filename, fg='bright_white', bold=True))
 
 @cli.command()
-def up():
-    """Apply pending migrations."""
+@click.option('--until', required=True,
+              help='Squash every migration up to and including this version.')
+def squash(until):
+    """Squash old migrations into a baseline for fresh databases."""
     try:
         manager = MigrationManager()
+        filename = manager.squash_migrations(until)
+        click.echo(click.style(f"🗜️  Created baseline: ", fg='green') +
+                   click.style(filename, fg='bright_white', bold=True))
+        click.echo("Empty databases now start from the baseline; existing ones are unaffected.")
+    except Exception as e:
+        click.echo(click.style(f"❌ Error: {str(e)}", fg='red', bold=True), err=True)
+
+def apply_fleet(targets_file, jobs, continue_on_error, parallel, **manager_options):
+    """Apply migrations to every target in a targets file and print a summary."""
+    try:
+        runner = FleetRunner(load_targets(targets_file), jobs=jobs,
+                             fail_fast=not continue_on_error, parallel=parallel,
+                             **manager_options)
+        summary = runner.apply()
+    except Exception as e:
+        click.echo(click.style(f"❌ Error: {str(e)}", fg='red', bold=True), err=True)
+        return
+
+    click.echo("\n" + click.style("🌐 Fleet Migration Results", fg='blue', bold=True))
+    click.echo(click.style("═" * 50, fg='blue'))
+    for result in summary['targets']:
+        if result['success']:
+            icon = click.style("✓", fg='green', bold=True)
+            detail = f"{len(result['applied'])} applied in {result['duration_seconds']:.2f}s"
+        else:
+            icon = click.style("✗", fg='red', bold=True)
+            detail = click.style(result['error'], fg='red')
+        click.echo(f"{icon} {click.style(result['target'], fg='bright_white')}: {detail}")
+
+    click.echo(click.style("─" * 50, fg='blue'))
+    click.echo(f"Targets: {summary['successful_targets']}/{summary['total_targets']} succeeded, "
+               f"{summary['migrations_applied']} migrations applied, "
+               f"{summary['total_queries']} queries, "
+               f"{summary['total_rows_affected']} rows affected")
+    if summary['failed_targets']:
+        raise SystemExit(1)
+
+def warn_approximate_rows(batch_size):
+    """Warn that batched sends under-report rows affected in analytics."""
+    if batch_size > 1:
+        click.echo(click.style("⚠️  With --batch-size above 1 only the last statement of each batch reports "
+                               "its row count, so analytics under-report rows affected.", fg='yellow'), err=True)
+
+@cli.command()
+@click.option('--batch-size', default=1, show_default=True,
+              help='Number of statements sent to the database per round trip '
+                   '(row counts are exact only at 1).')
+@click.option('--transaction/--no-transaction', default=True, show_default=True,
+              help='Run each migration inside a single transaction.')
+@click.option('--parallel', default=1, show_default=True,
+              help='Connections used to run independent migrations (see DEPENDS headers).')
+@click.option('--targets', type=click.Path(exists=True, dir_okay=False),
+              help='YAML or JSON file listing databases/schemas to migrate.')
+@click.option('--jobs', default=4, show_default=True,
+              help='Number of targets migrated concurrently with --targets.')
+@click.option('--continue-on-error', is_flag=True,
+              help='Keep migrating other targets after one fails.')
+@click.option('--timeline', is_flag=True,
+              help='Record per-statement timings with the analytics entry.')
+@click.option('--explain', is_flag=True,
+              help='Dry run: print query plans for pending DML without applying anything.')
+@click.option('--lock-timeout',
+              help='Give up waiting for DDL locks after this long (e.g. 2s) and retry.')
+@click.option('--lock-retries', default=5, show_default=True,
+              help='Retries for DDL that hit --lock-timeout, with jittered exponential backoff.')
+@click.option('--migration-lock', type=click.Choice(LOCK_MODES), default='wait', show_default=True,
+              help='When another process is migrating: wait for it, skip this run, or take no lock.')
+@click.option('--migration-lock-wait',
+              help='Give up waiting for the migration lock after this long (e.g. 10min).')
+def up(batch_size, transaction, parallel, targets, jobs, continue_on_error, timeline, explain,
+       lock_timeout, lock_retries, migration_lock, migration_lock_wait):
+    """Apply pending migrations."""
+    try:
+        lock_options = {
+            'lock_timeout': parse_duration(lock_timeout) if lock_timeout else None,
+            'lock_retries': lock_retries,
+            'migration_lock': migration_lock,
+            'migration_lock_wait': parse_duration(migration_lock_wait) if migration_lock_wait else None,
+        }
+    except ValueError as e:
+        click.echo(click.style(f"❌ Error: {str(e)}", fg='red', bold=True), err=True)
+        return
+    if not explain:
+        warn_approximate_rows(batch_size)
+    if targets:
+        apply_fleet(targets, jobs, continue_on_error, parallel,
+                    batch_size=batch_size, transactional=transaction,
+                    record_timeline=timeline, **lock_options)
+        return
+    try:
+        manager = MigrationManager(batch_size=batch_size, transactional=transaction,
+                                   record_timeline=timeline, **lock_options)
+        if explain:
+            print_plans(manager.explain_migrations())
+            return
         with click.progressbar(length=1, label='Applying migrations') as bar:
-            manager.apply_migrations()
+            manager.apply_migrations(jobs=parallel)
             bar.update(1)
         click.echo(click.style("✅ Migrations completed successfully", fg='green', bold=True))
     except Exception as e:
         click.echo(click.style(f"❌ Error: {str(e)}", fg='red', bold=True), err=True)
 
 @cli.command()
-def down():
-    """Rollback the last migration."""
+@click.option('--batch-size', default=1, show_default=True,
+              help='Number of statements sent to the database per round trip '
+                   '(row counts are exact only at 1).')
+@click.option('--transaction/--no-transaction', default=True, show_default=True,
+              help='Run each migration inside a single transaction.')
+@click.option('--lock-timeout',
+              help='Give up waiting for DDL locks after this long (e.g. 2s) and retry.')
+@click.option('--lock-retries', default=5, show_default=True,
+              help='Retries for DDL that hit --lock-timeout, with jittered exponential backoff.')
+@click.option('--migration-lock', type=click.Choice(LOCK_MODES), default='wait', show_default=True,
+              help='When another process is migrating: wait for it, skip this run, or take no lock.')
+@click.option('--migration-lock-wait',
+              help='Give up waiting for the migration lock after this long (e.g. 10min).')
+@click.option('--steps', type=click.IntRange(min=1),
+              help='Number of migrations to roll back, newest first (default 1).')
+@click.option('--to', 'to_version',
+              help='Roll back every migration applied after this version.')
+@click.option('--single-transaction', is_flag=True,
+              help='Roll back all of them in one transaction: all or nothing.')
+def down(batch_size, transaction, lock_timeout, lock_retries, migration_lock, migration_lock_wait,
+         steps, to_version, single_transaction):
+    """Rollback the last migration, or several with --steps/--to."""
+    warn_approximate_rows(batch_size)
     try:
-        manager = MigrationManager()
-        with click.progressbar(length=1, label='Rolling back migration') as bar:
-            manager.rollback_migration()
+        manager = MigrationManager(batch_size=batch_size, transactional=transaction,
+                                   lock_timeout=parse_duration(lock_timeout) if lock_timeout else None,
+                                   lock_retries=lock_retries, migration_lock=migration_lock,
+                                   migration_lock_wait=parse_duration(migration_lock_wait)
+                                   if migration_lock_wait else None)
+        with click.progressbar(length=1, label='Rolling back migrations') as bar:
+            manager.rollback_migrations(steps=steps if steps or to_version else 1, to=to_version,
+                                        single_transaction=single_transaction)
             bar.update(1)
         click.echo(click.style("✅ Rollback completed successfully", fg='green', bold=True))
     except Exception as e:
         click.echo(click.style(f"❌ Error: {str(e)}", fg='red', bold=True), err=True)
 
+@cli.command()
+@click.option('--database', default=':memory:', show_default=True,
+              help='SQLite database to validate against.')
+@click.option('--strict', is_flag=True,
+              help='Fail when statements were skipped or rolling back left objects behind.')
+def validate(database, strict):
+    """Apply, roll back and reapply every migration on SQLite, without a server."""
+    import shutil
+    import tempfile
+    log_dir = tempfile.mkdtemp(prefix='schemaflux_validate_')
+    try:
+        # A throwaway analytics log keeps validation runs out of the real one
+        manager = MigrationManager(db_type='sqlite', connection_options={'database': database},
+                                   log_dir=log_dir)
+        applied = manager.apply_migrations()
+        leftovers = []
+        if applied:
+            manager.rollback_migrations(steps=len(manager.version_control.get_applied_migrations()))
+            leftovers = manager.connector.schema_objects()
+            manager.apply_migrations()
+        skipped = list(dict.fromkeys(' '.join(statement.split())[:100] for statement in manager.connector.skipped))
+        manager.close()
+
+        click.echo(click.style(f"✅ {len(applied)} migrations applied, rolled back and reapplied",
+                               fg='green', bold=True))
+        if leftovers:
+            click.echo(click.style(f"⚠️  {len(leftovers)} objects were still there after rolling everything back:",
+                                   fg='yellow'))
+            for kind, name in leftovers:
+                click.echo(f"  {kind} {name}")
+        if skipped:
+            click.echo(click.style(f"⚠️  {len(skipped)} statements have no SQLite equivalent and were skipped:",
+                                   fg='yellow'))
+            for statement in skipped:
+                click.echo(f"  {statement}")
+        if strict and (leftovers or skipped):
+            raise SystemExit(1)
+    except Exception as e:
+        click.echo(click.style(f"❌ Error: {str(e)}", fg='red', bold=True), err=True)
+        raise SystemExit(1)
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+
 @cli.command()
 def status():
     """Show migration status."""
@@ -79,11 +248,144 @@ def status():
     except Exception as e:
         click.echo(click.style(f"❌ Error: {str(e)}", fg='red', bold=True), err=True)
 
+VERIFY_MESSAGES = {
+    'changed': ('red', "edited after it was applied"),
+    'missing': ('red', "applied but the file is gone"),
+    'renamed': ('yellow', "applied as {recorded_name}"),
+    'unrecorded': ('yellow', "applied before checksums were recorded"),
+}
+
+@cli.command()
+def verify():
+    """Check applied migration files against the checksums recorded when they ran."""
+    try:
+        manager = MigrationManager()
+        issues = manager.verify_migrations()
+
+        click.echo("\n" + click.style("🔎 Migration Checksums", fg='blue', bold=True))
+        click.echo(click.style("═" * 50, fg='blue'))
+        if not issues:
+            click.echo(click.style("✓ Applied migrations match their recorded checksums", fg='green'))
+            return
+        for issue in issues:
+            color, message = VERIFY_MESSAGES[issue['issue']]
+            click.echo(click.style(f"{issue['issue'].upper():<11}", fg=color, bold=True) +
+                       f"{click.style(issue['file'], fg='bright_white')}  {message.format(**issue)}")
+    except Exception as e:
+        click.echo(click.style(f"❌ Error: {str(e)}", fg='red', bold=True), err=True)
+        raise SystemExit(1)
+    if any(issue['issue'] in ('changed', 'missing') for issue in issues):
+        raise SystemExit(1)
+
+def print_plans(plans):
+    """Print EXPLAIN output captured for pending migrations."""
+    click.echo("\n" + click.style("🔍 Query Plans for Pending Migrations", fg='blue', bold=True))
+    click.echo(click.style("═" * 50, fg='blue'))
+    if not plans:
+        click.echo(click.style("No pending DML statements to explain", fg='yellow', italic=True))
+        return
+    for entry in plans:
+        click.echo(click.style(entry['file'], fg='bright_white', bold=True) + ": " +
+                   ' '.join(entry['statement'].split())[:100])
+        if entry['error']:
+            click.echo(click.style(f"  ⚠️  {entry['error']}", fg='yellow'))
+        else:
+            for line in entry['plan'].splitlines():
+                click.echo(f"  {line}")
+
+RISK_COLORS = {'high': 'red', 'medium': 'yellow', 'low': 'green'}
+
+@cli.command()
+def plan():
+    """Estimate runtime and locks of pending migrations, apply nothing."""
+    try:
+        manager = MigrationManager()
+        plans = manager.plan_migrations()
+
+        click.echo("\n" + click.style("🗺️  Plan for Pending Migrations", fg='blue', bold=True))
+        click.echo(click.style("═" * 50, fg='blue'))
+        if not plans:
+            click.echo(click.style("No pending migrations", fg='yellow', italic=True))
+            return
+        for entry in plans:
+            risk = click.style(f"{entry['risk'].upper():<6}", fg=RISK_COLORS[entry['risk']], bold=True)
+            measured = entry['measured_seconds']
+            history = f", took {measured:.1f}s before" if measured is not None else ""
+            scope = "one transaction" if entry['transactional'] else "no transaction"
+            click.echo(f"{risk} {click.style(entry['file'], fg='bright_white', bold=True)}  "
+                       f"~{entry['estimated_seconds']:.1f}s{history} ({scope})")
+            for statement in entry['statements']:
+                table = statement['table'] or '-'
+                if statement['new_table']:
+                    table += ' (new)'
+                click.echo(f"  {statement['kind']:<9} {table:<24} {statement['rows']:>12,} rows "
+                           f"~{statement['seconds']:>7.1f}s  {' '.join(statement['statement'].split())[:60]}")
+            for lock in entry['locks']:
+                color = 'red' if lock['blocks'] in ('writes', 'reads and writes') else 'cyan'
+                click.echo(click.style(f"  🔒 {lock['lock']} on {lock['table']} for ~{lock['seconds']:.1f}s "
+                                       f"(blocks {lock['blocks']})", fg=color))
+    except Exception as e:
+        click.echo(click.style(f"❌ Error: {str(e)}", fg='red', bold=True), err=True)
+
+@cli.command()
+@click.argument('migration_file')
+@click.option('--top', default=10, show_default=True, help='Number of slowest statements to show.')
+def timeline(migration_file, top):
+    """Show the slowest statements recorded for a migration (see up --timeline)."""
+    try:
+        manager = MigrationManager()
+        entries = manager.get_timeline(migration_file)
+
+        click.echo("\n" + click.style(f"⏱️  Statement Timeline: {migration_file}", fg='blue', bold=True))
+        click.echo(click.style("═" * 50, fg='blue'))
+        if not entries:
+            click.echo(click.style("No timeline recorded; apply with --timeline", fg='yellow', italic=True))
+            return
+        for entry in sorted(entries, key=lambda e: e['duration_seconds'], reverse=True)[:top]:
+            color = 'red' if entry['error'] else 'cyan'
+            duration = click.style(f"{entry['duration_seconds']:>9.3f}s", fg=color, bold=True)
+            click.echo(f"{duration} @{entry['offset_seconds']:>8.3f}s  "
+                       f"{entry['rows']:>8} rows  {entry['statement']}")
+    except Exception as e:
+        click.echo(click.style(f"❌ Error: {str(e)}", fg='red', bold=True), err=True)
+
+def print_analytics_breakdown(rows):
+    """Print windowed analytics rows as an aligned table."""
+    click.echo("\n" + click.style("📈 Migration Analytics Breakdown", fg='blue', bold=True))
+    click.echo(click.style("═" * 122, fg='blue'))
+    if not rows:
+        click.echo(click.style("No migrations logged in this window", fg='yellow', italic=True))
+        return
+
+    width = max(len('Migration'), *(len(row['migration']) for row in rows))
+    header = (f"{'Migration':<{width}}  {'Kind':<8} {'Outcome':<8} {'Runs':>5} "
+              f"{'p50 (s)':>9} {'p95 (s)':>9} {'p99 (s)':>9} {'Rows/s':>11} {'Queries/s':>10} "
+              f"{'Lock retries':>12}")
+    click.echo(click.style(header, bold=True))
+    for row in rows:
+        color = 'green' if row['outcome'] == 'success' else 'red'
+        outcome = click.style(f"{row['outcome']:<8}", fg=color)
+        click.echo(
+            f"{row['migration']:<{width}}  {row['kind']:<8} "
+            f"{outcome} {row['count']:>5} "
+            f"{row['p50_duration']:>9.3f} {row['p95_duration']:>9.3f} {row['p99_duration']:>9.3f} "
+            f"{row['rows_per_second']:>11.1f} {row['queries_per_second']:>10.1f} "
+            f"{row['lock_timeouts']:>12}"
+        )
+
 @cli.command()
-def analytics():
+@click.option('--since', help='Only include runs in this window, e.g. 7d, 12h or 2024-11-05.')
+@click.option('--by', type=click.Choice(['migration']),
+              help='Break the statistics down per migration file.')
+def analytics(since, by):
     """Show migration analytics and performance statistics."""
     try:
         manager = MigrationManager()
+        if since or by:
+            print_analytics_breakdown(manager.get_analytics_breakdown(
+                since=parse_since(since) if since else None, by=by
+            ))
+            return
         stats = manager.get_analytics()
         
         click.echo("\n" + click.style("📈 Migration Analytics", fg='blue', bold=True))
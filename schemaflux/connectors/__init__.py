@@ -1,5 +1,26 @@
-from .base import BaseConnector
-from .postgresql import PostgreSQLConnector
-from .mongodb import MongoDBConnector
+import importlib
 
-__all__ = ['BaseConnector', 'PostgreSQLConnector', 'MongoDBConnector']
+# Connectors are imported on first access so that importing the package only
+# loads the database driver that is actually used.
+_EXPORTS = {
+    'BaseConnector': '.base',
+    'PostgreSQLConnector': '.postgresql',
+    'MongoDBConnector': '.mongodb',
+    'SQLiteConnector': '.sqlite',
+    'ConnectorPool': '.pool',
+    'AsyncBaseConnector': '.async_base',
+    'AsyncPostgreSQLConnector': '.async_postgresql',
+    'AsyncMongoDBConnector': '.async_mongodb',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
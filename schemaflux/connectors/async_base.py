@@ -0,0 +1,65 @@
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from .base import ConnectorMetrics
+
+class AsyncBaseConnector(ConnectorMetrics, ABC):
+    """asyncio counterpart of ``BaseConnector``.
+
+    Same contract, metrics and hooks, but every call that talks to the
+    database is a coroutine and ``transaction()`` is an async context
+    manager, so migrations can run inside an event loop without blocking it.
+    """
+
+    dialect: Optional[str] = None
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Establish database connection."""
+        pass
+
+    @abstractmethod
+    async def execute(self, operation: Any, params: Any = None) -> Any:
+        """Execute a single operation."""
+        pass
+
+    @abstractmethod
+    async def execute_batch(self, operations: List[Tuple[Any, Any]]) -> None:
+        """Execute multiple operations in a batch."""
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close database connection."""
+        pass
+
+    async def ping(self) -> bool:
+        """Check that the connection is still usable."""
+        return True
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Run the enclosed operations atomically where the backend supports it."""
+        yield
+
+    def can_run_in_transaction(self, operation: Any) -> bool:
+        """Check whether an operation may run inside a transaction block."""
+        return True
+
+    async def _run_hooked(self, operation: str, run: Callable[[], Awaitable[int]]) -> int:
+        """Await an operation, reporting it to the attached hooks (see ``BaseConnector``)."""
+        for hook in self._hooks:
+            hook.before_statement(operation)
+        start = time.perf_counter()
+        try:
+            rows = await run()
+        except Exception as e:
+            duration = time.perf_counter() - start
+            for hook in self._hooks:
+                hook.after_statement(operation, duration, 0, str(e))
+            raise
+        duration = time.perf_counter() - start
+        for hook in self._hooks:
+            hook.after_statement(operation, duration, rows)
+        return rows
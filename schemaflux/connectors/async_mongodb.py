@@ -0,0 +1,118 @@
+import inspect
+import os
+from typing import Any, Iterable, List, Optional, Tuple, Union
+from pymongo.errors import BulkWriteError
+from .async_base import AsyncBaseConnector
+from .mongodb import MongoOperations
+from ..mongo_ops import Operation
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    AsyncIOMotorClient = None
+
+class AsyncMongoDBConnector(MongoOperations, AsyncBaseConnector):
+    """MongoDB connector on motor, mirroring ``MongoDBConnector``."""
+
+    dialect = 'mongodb'
+
+    def __init__(self, uri: Optional[str] = None, database: Optional[str] = None,
+                 batch_size: int = 1000, ordered: bool = True):
+        super().__init__()
+        self.client = None
+        self.db = None
+        self.uri = uri
+        self.database = database
+        self.batch_size = max(1, batch_size)
+        self.ordered = ordered
+
+    async def connect(self):
+        """Establish MongoDB connection using explicit settings or environment variables."""
+        if AsyncIOMotorClient is None:
+            raise Exception("The async MongoDB connector requires motor (pip install motor)")
+        try:
+            mongo_uri = self.uri or os.environ.get('MONGODB_URI', 'mongodb://localhost:27017')
+            db_name = self.database or os.environ.get('MONGODB_DATABASE', 'migrations')
+            self.client = AsyncIOMotorClient(mongo_uri)
+            self.db = self.client[db_name]
+        except Exception as e:
+            raise Exception(f"MongoDB connection failed: {str(e)}")
+
+    async def execute(self, operation: Union[str, Operation], params: Any = None) -> Any:
+        """Execute single MongoDB operation, given as a string or precompiled tuple."""
+        try:
+            if not self._hooks:
+                return await self._execute_operation(operation, params)
+
+            result = None
+
+            async def run() -> int:
+                nonlocal result
+                result = await self._execute_operation(operation, params)
+                return self._count_rows(result)
+
+            await self._run_hooked(self._describe(operation), run)
+            return result
+        except Exception as e:
+            raise Exception(f"MongoDB operation failed: {str(e)}")
+
+    async def _execute_operation(self, operation: Union[str, Operation], params: Any) -> Any:
+        """Run one operation, folding its result into the metrics."""
+        op_type, collection, query = self._parse_operation(operation)
+        query = self._replace_params(query, params)
+
+        result = getattr(self.db[collection], op_type)(**query)
+        if inspect.isawaitable(result):
+            result = await result
+        elif hasattr(result, 'to_list'):
+            # find/aggregate hand back a cursor; drain it like the sync driver's iteration would
+            result = await result.to_list(length=None)
+
+        self._query_count += 1
+        self._operations_count += self._count_rows(result)
+        return result
+
+    async def execute_batch(self, operations: Iterable[Tuple[Union[str, Operation], Any]]) -> None:
+        """Execute multiple MongoDB operations, grouping writes into ``bulk_write`` calls."""
+        try:
+            for step in self._plan_batch(operations):
+                if step[0] == 'bulk':
+                    await self._flush_bulk(*step[1:])
+                else:
+                    await self.execute(*step[1:])
+        except Exception as e:
+            raise Exception(f"MongoDB batch operation failed: {str(e)}")
+
+    async def _flush_bulk(self, collection: str, requests: List[Any], count: int) -> None:
+        """Send grouped requests with one ``bulk_write`` and merge its counts."""
+        async def run() -> int:
+            try:
+                result = await self.db[collection].bulk_write(requests, ordered=self.ordered)
+            except BulkWriteError as e:
+                self._query_count += count
+                self._operations_count += self._count_bulk_error(e)
+                raise
+            rows = self._count_rows(result)
+            self._query_count += count
+            self._operations_count += rows
+            return rows
+
+        if self._hooks:
+            await self._run_hooked(f"bulk_write:{collection} ({len(requests)} requests)", run)
+        else:
+            await run()
+
+    async def ping(self) -> bool:
+        """Check that the server is reachable."""
+        if self.client is None:
+            return False
+        try:
+            await self.client.admin.command('ping')
+            return True
+        except Exception:
+            return False
+
+    async def close(self):
+        """Close MongoDB connection."""
+        if self.client:
+            self.client.close()
@@ -0,0 +1,202 @@
+import asyncio
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Iterable, List, Optional, Tuple
+from .async_base import AsyncBaseConnector
+from .postgresql import DDL_PATTERN, LOCK_GUARD_SAVEPOINT, NON_TRANSACTIONAL_PATTERN
+from ..lexer import batch_statements
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+# Command tags that end in a row count, e.g. "UPDATE 12" or "INSERT 0 5".
+ROW_COUNT_TAG = re.compile(r'^(?:INSERT \d+|UPDATE|DELETE|SELECT|MERGE|COPY|MOVE|FETCH) (\d+)$')
+
+class AsyncPostgreSQLConnector(AsyncBaseConnector):
+    """PostgreSQL connector on asyncpg, mirroring ``PostgreSQLConnector``.
+
+    Parameterised queries use asyncpg's ``$1`` placeholders. Migration
+    statements carry no parameters and go through the simple query
+    protocol, so several can be sent in one round trip with ``batch_size``.
+    """
+
+    dialect = 'postgresql'
+
+    def __init__(self, batch_size: int = 1, dsn: Optional[str] = None,
+                 schema: Optional[str] = None, lock_timeout: Optional[float] = None,
+                 lock_retries: int = 5, lock_retry_delay: float = 0.5,
+                 lock_retry_max_delay: float = 30.0):
+        super().__init__()
+        self.conn = None
+        self.batch_size = max(1, batch_size)
+        self.dsn = dsn
+        self.schema = schema
+        self.lock_timeout = lock_timeout
+        self.lock_retries = lock_retries
+        self.lock_retry_delay = lock_retry_delay
+        self.lock_retry_max_delay = lock_retry_max_delay
+
+    async def connect(self):
+        """Establish the connection; without a DSN asyncpg reads the PG* environment variables."""
+        if asyncpg is None:
+            raise Exception("The async PostgreSQL connector requires asyncpg (pip install asyncpg)")
+        try:
+            self.conn = await asyncpg.connect(self.dsn)
+            if self.schema:
+                quoted = '"' + self.schema.replace('"', '""') + '"'
+                await self.conn.execute(f"SET search_path TO {quoted}")
+        except (asyncpg.PostgresError, OSError) as e:
+            raise Exception(f"PostgreSQL connection failed: {str(e)}")
+
+    def _row_count(self, status: str) -> int:
+        match = ROW_COUNT_TAG.match(status or '')
+        return int(match.group(1)) if match else 0
+
+    async def execute(self, operation: str, params: tuple = None) -> str:
+        """Execute a single SQL statement and return its command status."""
+        try:
+            return await self._execute_one(operation, params)
+        except asyncpg.PostgresError as e:
+            raise Exception(f"Query execution failed: {str(e)}")
+
+    async def fetch(self, operation: str, params: tuple = None) -> List[Any]:
+        """Run a query and return its rows."""
+        try:
+            self._query_count += 1
+            return await self.conn.fetch(operation, *(params or ()))
+        except asyncpg.PostgresError as e:
+            raise Exception(f"Query execution failed: {str(e)}")
+
+    async def execute_batch(self, operations: Iterable[Tuple[str, tuple]]) -> None:
+        """Execute multiple SQL statements, ``batch_size`` per round trip.
+
+        As with ``PostgreSQLConnector``, a batched send only reports the row
+        count of its last statement, and guarded DDL and statements that
+        cannot run in a transaction block are always sent alone.
+        """
+        try:
+            pending = []
+            for operation, params in operations:
+                if (self.batch_size == 1 or params or self._needs_lock_guard(operation)
+                        or NON_TRANSACTIONAL_PATTERN.match(operation)):
+                    for group in batch_statements(pending, self.batch_size):
+                        await self._execute_group(group)
+                    pending = []
+                    await self._execute_one(operation, params)
+                else:
+                    pending.append(operation)
+            for group in batch_statements(pending, self.batch_size):
+                await self._execute_group(group)
+        except asyncpg.PostgresError as e:
+            raise Exception(f"Batch execution failed: {str(e)}")
+
+    async def _execute_one(self, operation: str, params: tuple) -> str:
+        if not params and self._needs_lock_guard(operation):
+            return await self._execute_with_lock_guard(operation)
+
+        status = None
+
+        async def run() -> int:
+            nonlocal status
+            status = await self.conn.execute(operation, *(params or ()))
+            self._query_count += 1
+            rows = self._row_count(status)
+            self._operations_count += rows
+            return rows
+
+        if self._hooks:
+            await self._run_hooked(operation, run)
+        else:
+            await run()
+        return status
+
+    async def _execute_group(self, group: List[str]) -> None:
+        """Send parameterless statements to the server in one round trip."""
+        sql = '\n;\n'.join(group)
+
+        async def run() -> int:
+            status = await self.conn.execute(sql)
+            self._query_count += len(group)
+            rows = self._row_count(status)
+            self._operations_count += rows
+            self._operations_count_approximate |= len(group) > 1
+            return rows
+
+        if self._hooks:
+            await self._run_hooked(sql, run)
+        else:
+            await run()
+
+    def _needs_lock_guard(self, operation: str) -> bool:
+        """Check whether a statement should run under ``lock_timeout``."""
+        return (self.lock_timeout is not None and DDL_PATTERN.match(operation) is not None
+                and not NON_TRANSACTIONAL_PATTERN.match(operation))
+
+    async def _execute_with_lock_guard(self, operation: str) -> str:
+        """Run DDL with a short ``lock_timeout``, retrying like ``PostgreSQLConnector`` does."""
+        timeout = f"SET LOCAL lock_timeout = '{max(1, int(self.lock_timeout * 1000))}ms';\n"
+        in_transaction = self.conn.is_in_transaction()
+        if in_transaction:
+            sql = (f"SAVEPOINT {LOCK_GUARD_SAVEPOINT};\n{timeout}{operation}\n;\n"
+                   f"SET LOCAL lock_timeout = DEFAULT;\nRELEASE SAVEPOINT {LOCK_GUARD_SAVEPOINT}")
+        else:
+            sql = timeout + operation
+
+        async def run() -> int:
+            await self.conn.execute(sql)
+            self._query_count += 1
+            return 0
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                if self._hooks:
+                    await self._run_hooked(operation, run)
+                else:
+                    await run()
+                return 'OK'
+            except asyncpg.exceptions.LockNotAvailableError:
+                # Only the failed attempt counts: it spent its time queued for the lock
+                self._lock_wait_seconds += time.perf_counter() - started
+                self._lock_timeouts += 1
+                if attempt >= self.lock_retries:
+                    raise
+                if in_transaction:
+                    await self.conn.execute(f"ROLLBACK TO SAVEPOINT {LOCK_GUARD_SAVEPOINT}")
+                attempt += 1
+                cap = min(self.lock_retry_max_delay, self.lock_retry_delay * 2 ** (attempt - 1))
+                await asyncio.sleep(random.uniform(0, cap))
+
+    async def copy_from_file(self, operation: str, path: str) -> int:
+        """COPY directives need the synchronous engine for now."""
+        raise Exception("COPY directives are not supported by the async engine; use MigrationManager")
+
+    async def ping(self) -> bool:
+        """Check that the connection is still usable with a trivial query."""
+        if self.conn is None or self.conn.is_closed():
+            return False
+        try:
+            await self.conn.fetchval("SELECT 1")
+            return True
+        except (asyncpg.PostgresError, OSError):
+            return False
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Run the enclosed statements in a single transaction."""
+        async with self.conn.transaction():
+            yield
+
+    def can_run_in_transaction(self, operation: str) -> bool:
+        """Check whether a statement may run inside a transaction block."""
+        return not NON_TRANSACTIONAL_PATTERN.match(operation)
+
+    async def close(self):
+        """Close the connection."""
+        if self.conn is not None:
+            await self.conn.close()
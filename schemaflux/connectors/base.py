@@ -1,10 +1,55 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Any, List, Tuple, Dict
+from contextlib import contextmanager
+from typing import Any, Callable, List, Optional, Tuple, Dict
+
+class ConnectorMetrics:
+    """Metrics and hook bookkeeping shared by the sync and async connectors."""
 
-class BaseConnector(ABC):
     def __init__(self):
         self._query_count = 0
         self._operations_count = 0
+        self._lock_timeouts = 0
+        self._lock_wait_seconds = 0.0
+        # Set once a multi-statement send reported only its last row count
+        self._operations_count_approximate = False
+        self._hooks = []
+
+    def add_hook(self, hook) -> None:
+        """Attach a ``StatementHook`` that observes every executed operation."""
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook) -> None:
+        """Detach a previously attached hook."""
+        self._hooks.remove(hook)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get operation execution metrics.
+
+        ``operations_count_approximate`` is True when statements were sent
+        several per round trip, which only reports the row count of the last
+        one; ``operations_count`` is then a lower bound.
+        """
+        return {
+            'query_count': self._query_count,
+            'operations_count': self._operations_count,
+            'operations_count_approximate': self._operations_count_approximate,
+            'lock_timeouts': self._lock_timeouts,
+            'lock_wait_seconds': self._lock_wait_seconds
+        }
+
+    def reset_metrics(self) -> None:
+        """Reset operation metrics."""
+        self._query_count = 0
+        self._operations_count = 0
+        self._lock_timeouts = 0
+        self._lock_wait_seconds = 0.0
+        self._operations_count_approximate = False
+
+class BaseConnector(ConnectorMetrics, ABC):
+    # Database family ('postgresql', 'mongodb', 'sqlite'). Callers branch on this rather
+    # than on isinstance, which would import every connector's driver.
+    dialect: Optional[str] = None
 
     @abstractmethod
     def connect(self) -> None:
@@ -26,14 +71,37 @@ class BaseConnector(ABC):
         """Close database connection."""
         pass
 
-    def get_metrics(self) -> Dict[str, int]:
-        """Get operation execution metrics."""
-        return {
-            'query_count': self._query_count,
-            'operations_count': self._operations_count
-        }
+    def ping(self) -> bool:
+        """Check that the connection is still usable."""
+        return True
 
-    def reset_metrics(self) -> None:
-        """Reset operation metrics."""
-        self._query_count = 0
-        self._operations_count = 0
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed operations atomically where the backend supports it."""
+        yield
+
+    def can_run_in_transaction(self, operation: str) -> bool:
+        """Check whether an operation may run inside a transaction block."""
+        return True
+
+    def _run_hooked(self, operation: str, run: Callable[[], int]) -> int:
+        """Run an operation, reporting it to the attached hooks.
+
+        ``run`` performs the operation and returns the number of rows it
+        affected. Subclasses only route through here while hooks are
+        attached.
+        """
+        for hook in self._hooks:
+            hook.before_statement(operation)
+        start = time.perf_counter()
+        try:
+            rows = run()
+        except Exception as e:
+            duration = time.perf_counter() - start
+            for hook in self._hooks:
+                hook.after_statement(operation, duration, 0, str(e))
+            raise
+        duration = time.perf_counter() - start
+        for hook in self._hooks:
+            hook.after_statement(operation, duration, rows)
+        return rows
@@ -1,72 +1,229 @@
 import os
-from typing import Any, List, Tuple
-from pymongo import MongoClient
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
+from pymongo import MongoClient, InsertOne, UpdateOne, UpdateMany, ReplaceOne, DeleteOne, DeleteMany
+from pymongo.errors import BulkWriteError
 from .base import BaseConnector
+from ..mongo_ops import Operation, parse_operation_string
 
-class MongoDBConnector(BaseConnector):
-    def __init__(self):
+# Write operations execute_batch can fold into bulk_write, with the request
+# class each one maps to and the keyword arguments that request accepts.
+BULK_OPERATIONS = {
+    'insert_one': (InsertOne, ('document',)),
+    'update_one': (UpdateOne, ('filter', 'update', 'upsert', 'collation', 'array_filters', 'hint')),
+    'update_many': (UpdateMany, ('filter', 'update', 'upsert', 'collation', 'array_filters', 'hint')),
+    'replace_one': (ReplaceOne, ('filter', 'replacement', 'upsert', 'collation', 'hint')),
+    'delete_one': (DeleteOne, ('filter', 'collation', 'hint')),
+    'delete_many': (DeleteMany, ('filter', 'collation', 'hint')),
+}
+
+class MongoOperations:
+    """Operation parsing and bulk grouping shared by the sync and async MongoDB connectors."""
+
+    def _describe(self, operation: Union[str, Operation]) -> str:
+        """Text reported to hooks for an operation."""
+        if isinstance(operation, tuple):
+            return f"{operation[0]}:{operation[1]}:{operation[2]!r}"
+        return operation
+
+    def can_run_in_transaction(self, operation: Union[str, Operation]) -> bool:
+        """MongoDB operations always run on their own; there is no transaction to join."""
+        return False
+
+    def _count_rows(self, result: Any) -> int:
+        """Number of documents an operation result reports as affected."""
+        if hasattr(result, 'bulk_api_result'):
+            return (result.inserted_count + result.modified_count +
+                    result.deleted_count + result.upserted_count)
+        elif hasattr(result, 'modified_count'):
+            return result.modified_count + (getattr(result, 'upserted_id', None) is not None)
+        elif hasattr(result, 'inserted_ids'):
+            return len(result.inserted_ids)
+        elif hasattr(result, 'inserted_id'):
+            return 1
+        elif hasattr(result, 'deleted_count'):
+            return result.deleted_count
+        return 0
+
+    def _count_bulk_error(self, error: BulkWriteError) -> int:
+        """Documents written by a ``bulk_write`` that failed part way."""
+        details = error.details
+        return (details.get('nInserted', 0) + details.get('nModified', 0) +
+                details.get('nRemoved', 0) + details.get('nUpserted', 0))
+
+    def _plan_batch(self, operations: Iterable[Tuple[Union[str, Operation], Any]]) -> Iterator[Tuple]:
+        """Group a batch into ``('bulk', collection, requests, count)`` and ``('single', operation, params)`` steps.
+
+        Consecutive write operations on the same collection are grouped, up
+        to ``batch_size`` requests per group; ``count`` is the number of
+        migration operations a group covers.
+        """
+        collection = None
+        requests = []
+        count = 0
+        for operation, params in operations:
+            op_type, name, query = self._parse_operation(operation)
+            bulk = self._bulk_requests(op_type, self._replace_params(query, params))
+            if bulk is None or name != collection:
+                if requests:
+                    yield 'bulk', collection, requests, count
+                collection, requests, count = None, [], 0
+                if bulk is None:
+                    yield 'single', operation, params
+                    continue
+                collection = name
+
+            requests.extend(bulk)
+            count += 1
+            if len(requests) >= self.batch_size:
+                yield 'bulk', collection, requests, count
+                requests, count = [], 0
+        if requests:
+            yield 'bulk', collection, requests, count
+
+    def _bulk_requests(self, op_type: str, query: dict) -> Optional[List[Any]]:
+        """Turn one parsed write operation into ``bulk_write`` requests.
+
+        Returns ``None`` for operations that have to run on their own: reads,
+        DDL, and writes using options a bulk request cannot express.
+        """
+        if op_type == 'insert_many':
+            if set(query) != {'documents'}:
+                return None
+            return [InsertOne(document) for document in query['documents']]
+        if op_type not in BULK_OPERATIONS:
+            return None
+        request_class, accepted = BULK_OPERATIONS[op_type]
+        if not set(query) <= set(accepted):
+            return None
+        return [request_class(**query)]
+
+    def _parse_operation(self, operation: Union[str, Operation]) -> Operation:
+        """Parse MongoDB operation string into components.
+
+        Migrations hand over operations already compiled by ``mongo_ops``,
+        which pass straight through.
+        """
+        if isinstance(operation, tuple):
+            return operation
+        try:
+            # Example format: "insert_many:users:{'documents': []}"
+            return parse_operation_string(operation)
+        except ValueError as e:
+            raise Exception(str(e))
+
+    def _replace_params(self, query: dict, params: Any) -> dict:
+        """Replace parameters in the query with actual values."""
+        if not params:
+            return query
+        
+        # If params is a dict, merge it into a copy so compiled operations stay intact
+        if isinstance(params, dict):
+            return {**query, **params}
+        return query
+
+class MongoDBConnector(MongoOperations, BaseConnector):
+    dialect = 'mongodb'
+
+    def __init__(self, uri: Optional[str] = None, database: Optional[str] = None,
+                 batch_size: int = 1000, ordered: bool = True):
         super().__init__()
         self.client = None
         self.db = None
+        self.uri = uri
+        self.database = database
+        self.batch_size = max(1, batch_size)
+        self.ordered = ordered
 
     def connect(self):
-        """Establish MongoDB connection using environment variables."""
+        """Establish MongoDB connection using explicit settings or environment variables."""
         try:
-            mongo_uri = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017')
-            db_name = os.environ.get('MONGODB_DATABASE', 'migrations')
+            mongo_uri = self.uri or os.environ.get('MONGODB_URI', 'mongodb://localhost:27017')
+            db_name = self.database or os.environ.get('MONGODB_DATABASE', 'migrations')
             self.client = MongoClient(mongo_uri)
             self.db = self.client[db_name]
         except Exception as e:
             raise Exception(f"MongoDB connection failed: {str(e)}")
 
-    def execute(self, operation: str, params: Any = None) -> Any:
-        """Execute single MongoDB operation."""
+    def execute(self, operation: Union[str, Operation], params: Any = None) -> Any:
+        """Execute single MongoDB operation, given as a string or precompiled tuple."""
         try:
-            # Parse and execute MongoDB operation
-            op_type, collection, query = self._parse_operation(operation)
-            query = self._replace_params(query, params)
-            
-            coll = self.db[collection]
-            result = getattr(coll, op_type)(**query)
-            
-            self._query_count += 1
-            if hasattr(result, 'modified_count'):
-                self._operations_count += result.modified_count
-            elif hasattr(result, 'inserted_ids'):
-                self._operations_count += len(result.inserted_ids)
+            if not self._hooks:
+                return self._execute_operation(operation, params)
+
+            result = None
+
+            def run() -> int:
+                nonlocal result
+                result = self._execute_operation(operation, params)
+                return self._count_rows(result)
+
+            self._run_hooked(self._describe(operation), run)
             return result
         except Exception as e:
             raise Exception(f"MongoDB operation failed: {str(e)}")
 
-    def execute_batch(self, operations: List[Tuple[str, Any]]) -> None:
-        """Execute multiple MongoDB operations in a batch."""
+    def _execute_operation(self, operation: Union[str, Operation], params: Any) -> Any:
+        """Parse and run one operation, folding its result into the metrics."""
+        op_type, collection, query = self._parse_operation(operation)
+        query = self._replace_params(query, params)
+        
+        coll = self.db[collection]
+        result = getattr(coll, op_type)(**query)
+        
+        self._query_count += 1
+        self._operations_count += self._count_rows(result)
+        return result
+
+    def execute_batch(self, operations: Iterable[Tuple[Union[str, Operation], Any]]) -> None:
+        """Execute multiple MongoDB operations in a batch.
+
+        Consecutive write operations on the same collection are sent together
+        with ``bulk_write``, up to ``batch_size`` requests per call, so
+        millions of single-document writes cost thousands of round trips
+        rather than millions. ``ordered=False`` lets the server continue past
+        failed writes and apply the rest of a batch. Other operations run on
+        their own, in order.
+        """
         try:
-            for operation, params in operations:
-                self.execute(operation, params)
+            for step in self._plan_batch(operations):
+                if step[0] == 'bulk':
+                    self._flush_bulk(*step[1:])
+                else:
+                    self.execute(*step[1:])
         except Exception as e:
             raise Exception(f"MongoDB batch operation failed: {str(e)}")
 
+    def _flush_bulk(self, collection: str, requests: List[Any], count: int) -> None:
+        """Send grouped requests with one ``bulk_write`` and merge its counts."""
+        def run() -> int:
+            try:
+                result = self.db[collection].bulk_write(requests, ordered=self.ordered)
+            except BulkWriteError as e:
+                # Writes before (or, unordered, around) the failure were applied
+                self._query_count += count
+                self._operations_count += self._count_bulk_error(e)
+                raise
+            rows = self._count_rows(result)
+            self._query_count += count
+            self._operations_count += rows
+            return rows
+
+        if self._hooks:
+            self._run_hooked(f"bulk_write:{collection} ({len(requests)} requests)", run)
+        else:
+            run()
+
+    def ping(self) -> bool:
+        """Check that the server is reachable."""
+        if self.client is None:
+            return False
+        try:
+            self.client.admin.command('ping')
+            return True
+        except Exception:
+            return False
+
     def close(self):
         """Close MongoDB connection."""
         if self.client:
             self.client.close()
-
-    def _parse_operation(self, operation: str) -> Tuple[str, str, dict]:
-        """Parse MongoDB operation string into components."""
-        try:
-            # Example format: "insert_many:users:{'documents': []}"
-            op_type, collection, query = operation.split(':', 2)
-            query = eval(query)  # Convert string representation to dict
-            return op_type, collection, query
-        except Exception as e:
-            raise Exception(f"Invalid MongoDB operation format: {str(e)}")
-
-    def _replace_params(self, query: dict, params: Any) -> dict:
-        """Replace parameters in the query with actual values."""
-        if not params:
-            return query
-        
-        # If params is a dict, update the query with it
-        if isinstance(params, dict):
-            query.update(params)
-        return query
@@ -0,0 +1,141 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+from .base import BaseConnector
+
+class ConnectorPool:
+    """Thread-safe pool of connected database connectors.
+
+    ``factory`` builds an unconnected connector, e.g.
+    ``lambda: PostgreSQLConnector(dsn=...)``. The pool opens ``min_size``
+    connectors up front and never holds more than ``max_size``. Connectors
+    idle for longer than ``idle_timeout`` seconds are closed, down to
+    ``min_size``, whenever the pool is used. Connectors idle for longer than
+    ``health_check_interval`` seconds are pinged before being handed out, and
+    replaced if the ping fails.
+    """
+
+    def __init__(self, factory: Callable[[], BaseConnector], min_size: int = 1,
+                 max_size: int = 10, idle_timeout: float = 300.0,
+                 health_check_interval: float = 30.0, acquire_timeout: float = 30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self._condition = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._closed = False
+
+        for _ in range(min_size):
+            self._idle.append((self._connect_new(), time.monotonic()))
+            self._size += 1
+
+    def _connect_new(self) -> BaseConnector:
+        connector = self.factory()
+        connector.connect()
+        return connector
+
+    def _close_quietly(self, connector: BaseConnector) -> None:
+        try:
+            connector.close()
+        except Exception:
+            pass
+
+    def _prune_idle(self) -> None:
+        """Close connectors idle past ``idle_timeout``, keeping ``min_size`` open.
+
+        Must be called with the pool lock held.
+        """
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._idle and self._size > self.min_size and self._idle[0][1] < cutoff:
+            connector, _ = self._idle.pop(0)
+            self._size -= 1
+            self._close_quietly(connector)
+
+    def acquire(self, timeout: Optional[float] = None) -> BaseConnector:
+        """Borrow a healthy connector, waiting up to ``timeout`` seconds for one."""
+        deadline = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise Exception("Connector pool is closed")
+                    self._prune_idle()
+                    if self._idle:
+                        # Most recently used first, so the oldest ones can age out
+                        connector, idle_since = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        connector, idle_since = None, None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Exception(
+                            f"Timed out waiting for a pooled connection (max_size={self.max_size})"
+                        )
+                    self._condition.wait(remaining)
+
+            if connector is None:
+                try:
+                    return self._connect_new()
+                except Exception:
+                    self._forget()
+                    raise
+
+            if time.monotonic() - idle_since < self.health_check_interval or connector.ping():
+                return connector
+            self._close_quietly(connector)
+            self._forget()
+
+    def _forget(self) -> None:
+        """Account for a connector that left the pool for good."""
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def release(self, connector: BaseConnector, discard: bool = False) -> None:
+        """Return a borrowed connector; ``discard`` closes it instead of reusing it."""
+        if discard or self._closed:
+            self._close_quietly(connector)
+            self._forget()
+            return
+        connector.reset_metrics()
+        with self._condition:
+            self._idle.append((connector, time.monotonic()))
+            self._prune_idle()
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connector for the duration of a ``with`` block."""
+        connector = self.acquire()
+        try:
+            yield connector
+        except Exception:
+            self.release(connector, discard=not connector.ping())
+            raise
+        else:
+            self.release(connector)
+
+    def close(self) -> None:
+        """Close idle connectors and refuse further borrowing."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connector, _ in idle:
+            self._close_quietly(connector)
+
+    def __enter__(self) -> 'ConnectorPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
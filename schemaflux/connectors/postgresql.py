@@ -1,54 +1,278 @@
 import os
+import random
+import re
+import time
 import psycopg2
+from contextlib import contextmanager
+from itertools import groupby
+from psycopg2 import errors, sql as pgsql
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from typing import Any, List, Tuple
+from typing import Any, Iterable, List, Optional, Tuple
 from .base import BaseConnector
+from ..lexer import batch_statements
+
+LEADING_COMMENTS = r'^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*'
+
+# Statements PostgreSQL refuses to run inside a transaction block. Leading
+# comments are skipped so annotated statements are still recognised.
+NON_TRANSACTIONAL_PATTERN = re.compile(
+    LEADING_COMMENTS +
+    r'(?:(?:CREATE\s+(?:UNIQUE\s+)?|DROP\s+)INDEX\s+CONCURRENTLY'
+    r'|REINDEX\b[^;]*\bCONCURRENTLY'
+    r'|ALTER\s+TABLE\b[^;]*\bDETACH\s+PARTITION\b[^;]*\bCONCURRENTLY'
+    r'|VACUUM\b'
+    r'|(?:CREATE|DROP)\s+(?:DATABASE|TABLESPACE)\b'
+    r'|ALTER\s+SYSTEM\b)',
+    re.IGNORECASE | re.DOTALL
+)
+
+# DDL that takes strong table locks and runs under the lock timeout guard.
+DDL_PATTERN = re.compile(
+    LEADING_COMMENTS + r'(?:ALTER|CREATE|DROP|TRUNCATE|LOCK|COMMENT|GRANT|REVOKE|REINDEX|CLUSTER)\b',
+    re.IGNORECASE | re.DOTALL
+)
+
+LOCK_GUARD_SAVEPOINT = 'schemaflux_lock_guard'
 
 class PostgreSQLConnector(BaseConnector):
-    def __init__(self):
+    dialect = 'postgresql'
+
+    # Bytes read from a data file per COPY message, bounding memory use.
+    copy_chunk_size = 1024 * 1024
+
+    def __init__(self, batch_size: int = 1, dsn: Optional[str] = None,
+                 schema: Optional[str] = None, lock_timeout: Optional[float] = None,
+                 lock_retries: int = 5, lock_retry_delay: float = 0.5,
+                 lock_retry_max_delay: float = 30.0):
         super().__init__()
         self.conn = None
         self.cursor = None
+        self.batch_size = max(1, batch_size)
+        self.dsn = dsn
+        self.schema = schema
+        # With a lock_timeout (seconds), DDL gives up waiting for its lock
+        # quickly and is retried, instead of queueing behind a long-running
+        # query while blocking every other query on the table.
+        self.lock_timeout = lock_timeout
+        self.lock_retries = lock_retries
+        self.lock_retry_delay = lock_retry_delay
+        self.lock_retry_max_delay = lock_retry_max_delay
 
     def connect(self):
-        """Establish PostgreSQL connection using environment variables."""
+        """Establish PostgreSQL connection using the DSN or environment variables."""
         try:
-            self.conn = psycopg2.connect(
-                host=os.environ.get('PGHOST'),
-                database=os.environ.get('PGDATABASE'),
-                user=os.environ.get('PGUSER'),
-                password=os.environ.get('PGPASSWORD'),
-                port=os.environ.get('PGPORT')
-            )
+            if self.dsn:
+                self.conn = psycopg2.connect(self.dsn)
+            else:
+                self.conn = psycopg2.connect(
+                    host=os.environ.get('PGHOST'),
+                    database=os.environ.get('PGDATABASE'),
+                    user=os.environ.get('PGUSER'),
+                    password=os.environ.get('PGPASSWORD'),
+                    port=os.environ.get('PGPORT')
+                )
             self.conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
             self.cursor = self.conn.cursor()
+            if self.schema:
+                self.cursor.execute(
+                    pgsql.SQL("SET search_path TO {}").format(pgsql.Identifier(self.schema))
+                )
         except psycopg2.Error as e:
             raise Exception(f"PostgreSQL connection failed: {str(e)}")
 
     def execute(self, operation: str, params: tuple = None) -> Any:
         """Execute single SQL query with optional parameters."""
         try:
-            self.cursor.execute(operation, params)
-            self._query_count += 1
-            if self.cursor.rowcount >= 0:
-                self._operations_count += self.cursor.rowcount
+            self._execute_one(operation, params)
             return self.cursor
         except psycopg2.Error as e:
             self.conn.rollback()
             raise Exception(f"Query execution failed: {str(e)}")
 
-    def execute_batch(self, operations: List[Tuple[str, tuple]]) -> None:
-        """Execute multiple SQL statements in a batch."""
+    def execute_batch(self, operations: Iterable[Tuple[str, tuple]]) -> None:
+        """Execute multiple SQL statements in a batch.
+
+        With ``batch_size`` greater than one, consecutive statements are sent
+        to the server together as a single multi-statement query, so a batch
+        costs one round trip instead of one per statement. ``query_count``
+        still counts every statement, but psycopg2 only exposes the row count
+        of the last statement in a send, so ``operations_count`` is exact
+        only with ``batch_size=1`` (``get_metrics()`` flags it as
+        approximate otherwise). Statements under the lock timeout guard
+        and statements that cannot run in a transaction block are always
+        sent on their own: a multi-statement query runs as one implicit
+        transaction, which ``CREATE INDEX CONCURRENTLY`` and friends refuse.
+        """
         try:
-            for operation, params in operations:
-                self.cursor.execute(operation, params)
-                self._query_count += 1
-                if self.cursor.rowcount >= 0:
-                    self._operations_count += self.cursor.rowcount
+            if self.batch_size == 1:
+                if self._hooks or self.lock_timeout is not None:
+                    for operation, params in operations:
+                        self._execute_one(operation, params)
+                else:
+                    for operation, params in operations:
+                        self._execute_statement(operation, params)
+                return
+
+            for alone, run in groupby(operations, key=lambda op: self._sent_alone(op[0])):
+                if alone:
+                    for operation, params in run:
+                        self._execute_one(operation, params)
+                else:
+                    for group in batch_statements(run, self.batch_size):
+                        self._execute_group(group)
         except psycopg2.Error as e:
             self.conn.rollback()
             raise Exception(f"Batch execution failed: {str(e)}")
 
+    def _execute_one(self, operation: str, params: tuple) -> None:
+        """Run one statement, through the lock guard and hooks when they apply."""
+        if self._needs_lock_guard(operation):
+            self._execute_with_lock_guard(operation, params)
+        elif self._hooks:
+            self._run_hooked(operation, lambda: self._execute_statement(operation, params))
+        else:
+            self._execute_statement(operation, params)
+
+    def _sent_alone(self, operation: str) -> bool:
+        """Check whether a statement must not share a multi-statement send."""
+        return self._needs_lock_guard(operation) or NON_TRANSACTIONAL_PATTERN.match(operation) is not None
+
+    def _needs_lock_guard(self, operation: str) -> bool:
+        """Check whether a statement should run under ``lock_timeout``.
+
+        ``CONCURRENTLY`` and other non-transactional statements are left
+        alone: a timed-out ``CREATE INDEX CONCURRENTLY`` leaves an invalid
+        index behind, so it cannot simply be retried.
+        """
+        return (self.lock_timeout is not None and DDL_PATTERN.match(operation) is not None
+                and not NON_TRANSACTIONAL_PATTERN.match(operation))
+
+    def _execute_with_lock_guard(self, operation: str, params: tuple) -> int:
+        """Run DDL with a short ``lock_timeout``, retrying with jittered exponential backoff.
+
+        The timeout is set with ``SET LOCAL`` in the same round trip as the
+        statement, so it never leaks to other statements. Inside a migration
+        transaction each attempt runs in a savepoint, so a timed-out attempt
+        is undone without aborting the migration. Timed-out attempts and the
+        time they spent queued for the lock are counted in the metrics and
+        reported to hooks; the backoff pauses between attempts are not.
+        """
+        statement = self.cursor.mogrify(operation, params)
+        timeout = f"SET LOCAL lock_timeout = '{max(1, int(self.lock_timeout * 1000))}ms';\n".encode()
+        in_transaction = not self.conn.autocommit
+        if in_transaction:
+            sql = (f"SAVEPOINT {LOCK_GUARD_SAVEPOINT};\n".encode() + timeout + statement +
+                   f"\n;\nSET LOCAL lock_timeout = DEFAULT;\nRELEASE SAVEPOINT {LOCK_GUARD_SAVEPOINT}".encode())
+        else:
+            # A multi-statement query runs as one implicit transaction
+            sql = timeout + statement
+
+        def run() -> int:
+            self.cursor.execute(sql)
+            self._query_count += 1
+            return 0
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                if self._hooks:
+                    return self._run_hooked(operation, run)
+                return run()
+            except errors.LockNotAvailable:
+                # Only the failed attempt counts: it spent its time queued for the lock
+                self._lock_wait_seconds += time.perf_counter() - started
+                self._lock_timeouts += 1
+                if attempt >= self.lock_retries:
+                    raise
+                if in_transaction:
+                    self.cursor.execute(f"ROLLBACK TO SAVEPOINT {LOCK_GUARD_SAVEPOINT}")
+                attempt += 1
+                cap = min(self.lock_retry_max_delay, self.lock_retry_delay * 2 ** (attempt - 1))
+                time.sleep(random.uniform(0, cap))
+
+    def _execute_statement(self, operation: str, params: tuple) -> int:
+        """Run one statement and fold its row count into the metrics."""
+        self.cursor.execute(operation, params)
+        self._query_count += 1
+        rows = self.cursor.rowcount
+        if rows >= 0:
+            self._operations_count += rows
+        return max(rows, 0)
+
+    def _execute_group(self, group: List[Tuple[str, tuple]]) -> None:
+        """Send a group of statements to the server in one round trip."""
+        # Parameters are bound client side so the whole group can travel as
+        # one query string. The separator sits on its own line so a trailing
+        # line comment in one statement cannot swallow the next one.
+        sql = b'\n;\n'.join(self.cursor.mogrify(operation, params) for operation, params in group)
+
+        def run() -> int:
+            self.cursor.execute(sql)
+            self._query_count += len(group)
+            rows = max(self.cursor.rowcount, 0)
+            self._operations_count += rows
+            self._operations_count_approximate |= len(group) > 1
+            return rows
+
+        if self._hooks:
+            self._run_hooked(sql.decode('utf-8', 'replace'), run)
+        else:
+            run()
+
+    def copy_from_file(self, operation: str, path: str) -> int:
+        """Stream a data file into the database with a ``COPY ... FROM STDIN`` statement."""
+        try:
+            def run() -> int:
+                with open(path, 'rb') as data:
+                    self.cursor.copy_expert(operation, data, size=self.copy_chunk_size)
+                self._query_count += 1
+                rows = max(self.cursor.rowcount, 0)
+                self._operations_count += rows
+                return rows
+
+            return self._run_hooked(operation, run) if self._hooks else run()
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            raise Exception(f"COPY from {path} failed: {str(e)}")
+
+    def explain(self, operation: str, params: tuple = None) -> str:
+        """Return the query plan PostgreSQL would use, without running the statement."""
+        try:
+            self.cursor.execute(f"EXPLAIN {operation}", params)
+            return '\n'.join(row[0] for row in self.cursor.fetchall())
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            raise Exception(f"EXPLAIN failed: {str(e)}")
+
+    def ping(self) -> bool:
+        """Check that the connection is still usable with a trivial query."""
+        if self.conn is None or self.conn.closed:
+            return False
+        try:
+            self.cursor.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed statements in a single transaction."""
+        self.conn.autocommit = False
+        try:
+            yield
+            self.conn.commit()
+        except BaseException:
+            # Includes KeyboardInterrupt, so an interrupted chunk never half-commits
+            self.conn.rollback()
+            raise
+        finally:
+            self.conn.autocommit = True
+
+    def can_run_in_transaction(self, operation: str) -> bool:
+        """Check whether a statement may run inside a transaction block."""
+        return not NON_TRANSACTIONAL_PATTERN.match(operation)
+
     def close(self):
         """Close PostgreSQL connection."""
         if self.cursor:
@@ -0,0 +1,166 @@
+import re
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Iterable, List, Optional, Tuple
+from .base import BaseConnector
+
+LEADING_COMMENTS = r'^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*'
+
+# PostgreSQL statements with no SQLite equivalent that matters for checking
+# a migration chain: permissions, comments, maintenance, server-side code
+# and ALTER TABLE actions SQLite cannot perform. They are skipped, not failed.
+UNSUPPORTED_PATTERN = re.compile(
+    LEADING_COMMENTS +
+    r'(?:COMMENT|GRANT|REVOKE|SET|RESET|VACUUM|ANALYZE|CLUSTER|LOCK|REINDEX|DO)\b'
+    r'|' + LEADING_COMMENTS +
+    r'(?:CREATE|DROP|ALTER)\s+(?:OR\s+REPLACE\s+)?'
+    r'(?:EXTENSION|SCHEMA|FUNCTION|PROCEDURE|TYPE|DOMAIN|SEQUENCE|POLICY|ROLE|USER|MATERIALIZED\s+VIEW'
+    r'|(?:CONSTRAINT\s+)?TRIGGER)\b'
+    r'|' + LEADING_COMMENTS +
+    r'ALTER\s+TABLE\b(?!\s+(?:IF\s+EXISTS\s+)?[\w."]+\s+'
+    r'(?:RENAME\b|ADD\s+(?!CONSTRAINT\b|PRIMARY\b|UNIQUE\b|FOREIGN\b|CHECK\b|EXCLUDE\b)|DROP\s+COLUMN\b)[^,]*$)',
+    re.IGNORECASE | re.DOTALL
+)
+
+DOLLAR_QUOTED = re.compile(r'\$(\w*)\$(.*?)\$\1\$', re.DOTALL)
+
+# (pattern, replacement) pairs turning PostgreSQL syntax into SQLite's.
+REWRITES = [
+    (r'\b(?:BIG|SMALL)?INT(?:EGER|[248])?\s+GENERATED\s+(?:ALWAYS|BY\s+DEFAULT)\s+AS\s+IDENTITY\b', 'INTEGER'),
+    (r'\b(?:BIG|SMALL)?SERIAL[248]?\b', 'INTEGER'),
+    (r'::\s*(?:"[^"]+"|\w+)(?:\s*\([^)]*\))?(?:\[\])*', ''),
+    (r'\b(\w+)\s*\[\]', r'\1'),
+    (r'\bNOW\s*\(\s*\)', 'CURRENT_TIMESTAMP'),
+    (r'\bCONCURRENTLY\s+', ''),
+    (r'\bpublic\s*\.\s*', ''),
+    (r'\bILIKE\b', 'LIKE'),
+    (r'\bCOLLATE\s+"C"', 'COLLATE BINARY'),
+    (r'(\bON\s+[\w."]+\s+)USING\s+\w+\s*', r'\1'),
+    (r'^(\s*)TRUNCATE\s+(?:TABLE\s+)?(?:ONLY\s+)?', r'\1DELETE FROM '),
+    (r'^(\s*DROP\b.*?)\s+(?:CASCADE|RESTRICT)\s*$', r'\1'),
+]
+REWRITES = [(re.compile(pattern, re.IGNORECASE | re.DOTALL | re.MULTILINE), replacement)
+            for pattern, replacement in REWRITES]
+
+NAMED_PARAMETER = re.compile(r'%\((\w+)\)s')
+
+def translate_statement(operation: str, params: Any = None) -> Optional[str]:
+    """Translate a PostgreSQL statement to SQLite, or return None to skip it.
+
+    This is a shim for checking migration chains offline, not a full
+    translator: it covers common DDL and DML (serial and identity columns,
+    casts, array types, dollar quoting, ``NOW()``, ``CONCURRENTLY``,
+    ``public.`` prefixes, ``TRUNCATE``) and psycopg2 placeholders.
+    """
+    if UNSUPPORTED_PATTERN.match(operation):
+        return None
+    sql = DOLLAR_QUOTED.sub(lambda m: "'" + m.group(2).replace("'", "''") + "'", operation)
+    for pattern, replacement in REWRITES:
+        sql = pattern.sub(replacement, sql)
+    if params is not None:
+        sql = NAMED_PARAMETER.sub(r':\1', sql).replace('%s', '?').replace('%%', '%')
+    return sql
+
+class SQLiteConnector(BaseConnector):
+    """Runs PostgreSQL-style migrations against SQLite, in memory by default.
+
+    Meant for validating a migrations directory in CI without a server:
+    statements go through ``translate_statement`` and those SQLite cannot
+    express are collected in ``skipped`` instead of failing. Each in-memory
+    connector is its own empty database, so parallel test processes never
+    share state.
+    """
+
+    dialect = 'sqlite'
+
+    def __init__(self, database: str = ':memory:', batch_size: int = 1):
+        super().__init__()
+        self.database = database
+        # Statements run one at a time; accepted for interface compatibility
+        self.batch_size = max(1, batch_size)
+        self.conn = None
+        self.cursor = None
+        self.skipped: List[str] = []
+
+    def connect(self):
+        """Open the SQLite database in autocommit mode."""
+        try:
+            self.conn = sqlite3.connect(self.database, isolation_level=None, check_same_thread=False)
+            self.conn.execute("PRAGMA foreign_keys = ON")
+            self.cursor = self.conn.cursor()
+        except sqlite3.Error as e:
+            raise Exception(f"SQLite connection failed: {str(e)}")
+
+    def execute(self, operation: str, params: Any = None) -> Any:
+        """Execute a single statement after translating it to SQLite."""
+        try:
+            self._execute_one(operation, params)
+            return self.cursor
+        except sqlite3.Error as e:
+            raise Exception(f"Query execution failed: {str(e)}")
+
+    def execute_batch(self, operations: Iterable[Tuple[str, Any]]) -> None:
+        """Execute multiple statements in order."""
+        try:
+            for operation, params in operations:
+                self._execute_one(operation, params)
+        except sqlite3.Error as e:
+            raise Exception(f"Batch execution failed: {str(e)}")
+
+    def _execute_one(self, operation: str, params: Any) -> None:
+        sql = translate_statement(operation, params)
+        if sql is None:
+            self.skipped.append(operation)
+            return
+        if self._hooks:
+            self._run_hooked(operation, lambda: self._execute_statement(sql, params))
+        else:
+            self._execute_statement(sql, params)
+
+    def _execute_statement(self, sql: str, params: Any) -> int:
+        """Run one translated statement and fold its row count into the metrics."""
+        self.cursor.execute(sql, params if params is not None else ())
+        self._query_count += 1
+        rows = max(self.cursor.rowcount, 0)
+        self._operations_count += rows
+        return rows
+
+    def copy_from_file(self, operation: str, path: str) -> int:
+        """COPY data is not loaded; the directive is reported in ``skipped``."""
+        self.skipped.append(f"{operation} -- {path}")
+        return 0
+
+    def schema_objects(self) -> List[Tuple[str, str]]:
+        """Tables, indexes, views and triggers other than the migration history, as ``(type, name)``."""
+        return self.conn.execute(
+            "SELECT type, name FROM sqlite_master "
+            "WHERE tbl_name <> 'migration_history' AND name NOT LIKE 'sqlite_%' ORDER BY type, name"
+        ).fetchall()
+
+    def ping(self) -> bool:
+        """Check that the database is still open."""
+        if self.conn is None:
+            return False
+        try:
+            self.conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed statements in a single transaction."""
+        self.conn.execute("BEGIN")
+        try:
+            yield
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        """Close the SQLite database; an in-memory one is discarded."""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+            self.cursor = None
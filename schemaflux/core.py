@@ -1,35 +1,71 @@
 import os
+import queue
 import re
 import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from .connectors import BaseConnector, PostgreSQLConnector, MongoDBConnector
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
+from .connectors.base import BaseConnector
+from .connectors.pool import ConnectorPool
 from .version import VersionControl
-from .analytics import MigrationAnalytics
+from .analytics import MigrationAnalytics, ROLLBACK_SUFFIX
+from .lexer import split_statements
+from .cache import MigrationCache, file_checksum
+from .scheduler import build_dependency_graph, run_in_dependency_order
+from .instrumentation import StatementTimeline
+from .locking import LOCK_MODES, create_migration_lock
+from .utils import parse_duration
 
-class MigrationManager:
-    def __init__(self, migrations_dir: str = "migrations", db_type: str = "postgresql"):
-        self.migrations_dir = migrations_dir
-        self.connector = self._create_connector(db_type)
-        self.connector.connect()
-        self.version_control = VersionControl(self.connector)
-        self.analytics = MigrationAnalytics()
-        
-    def _create_connector(self, db_type: str) -> BaseConnector:
-        """Create appropriate database connector based on type."""
-        if db_type.lower() == "postgresql":
-            return PostgreSQLConnector()
-        elif db_type.lower() == "mongodb":
-            return MongoDBConnector()
-        else:
-            raise ValueError(f"Unsupported database type: {db_type}")
+# ``-- COPY table [(columns)] FROM 'file' [WITH (options)]`` lines inside a SQL
+# migration load a data file that lives next to the migration.
+COPY_DIRECTIVE = re.compile(
+    r"^-- COPY\s+(?P<target>.+?)\s+(?i:FROM)\s+'(?P<path>[^']+)'"
+    r"(?:\s+(?i:WITH)\s+(?P<options>\(.*\)))?\s*;?\s*$",
+    re.MULTILINE
+)
+
+# Statements EXPLAIN accepts, after any leading comments.
+EXPLAINABLE = re.compile(
+    r'^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*(?:SELECT|INSERT|UPDATE|DELETE|MERGE|WITH|VALUES)\b',
+    re.IGNORECASE | re.DOTALL
+)
+
+COPY_FORMATS = {
+    '.csv': '(FORMAT csv)',
+    '.bin': '(FORMAT binary)',
+}
+
+# Squash baselines live in this subdirectory of the migrations directory.
+BASELINES_DIR = 'baselines'
+
+LOCK_SKIPPED = "Another process holds the migration lock; skipping"
+
+class MigrationSource:
+    """Migration file discovery, parsing and caching shared by the sync and async managers.
+
+    Expects ``migrations_dir``, ``db_type``, ``cache``, ``transactional`` and
+    ``record_timeline`` attributes and an ``analytics`` log on the instance.
+    """
 
     def _get_migration_files(self) -> List[str]:
         """Get sorted list of migration files."""
         if not os.path.exists(self.migrations_dir):
             return []
-        
-        files = [f for f in os.listdir(self.migrations_dir) if f.endswith('.sql') or f.endswith('.js')]
+        if self.cache is not None:
+            return self.cache.get_listing(self.migrations_dir, self._list_migration_files, self.db_type)
+        return self._list_migration_files()
+
+    def _migration_extensions(self) -> Tuple[str, ...]:
+        """File extensions that hold migrations for ``db_type``.
+
+        ``.json`` is only a migration format for MongoDB; in SQL projects such
+        files are usually COPY data and must never be executed.
+        """
+        return ('.sql', '.js', '.json') if self.db_type == 'mongodb' else ('.sql', '.js')
+
+    def _list_migration_files(self) -> List[str]:
+        """List migration files on disk, sorted by version."""
+        files = [f for f in os.listdir(self.migrations_dir) if f.endswith(self._migration_extensions())]
         return sorted(files)
 
     def _parse_migration_file(self, filename: str) -> Dict[str, str]:
@@ -37,40 +73,314 @@ class MigrationManager:
         path = os.path.join(self.migrations_dir, filename)
         with open(path, 'r') as f:
             content = f.read()
+        return self._parse_migration_content(filename, content)
 
+    def _parse_migration_content(self, filename: str, content: str) -> Dict[str, Any]:
+        """Parse migration content according to the file type."""
         if filename.endswith('.sql'):
             return self._parse_sql_migration(content)
         elif filename.endswith('.js'):
             return self._parse_js_migration(content)
+        elif filename.endswith('.json'):
+            from .mongo_ops import parse_json_migration
+            return parse_json_migration(content)
         
         raise ValueError(f"Unsupported migration file type: {filename}")
 
-    def _parse_sql_migration(self, content: str) -> Dict[str, str]:
+    def _parse_sql_migration(self, content: str) -> Dict[str, Any]:
         """Parse SQL migration content."""
         up_match = re.search(r'-- UP\n(.*?)(?=-- DOWN|$)', content, re.DOTALL)
         down_match = re.search(r'-- DOWN\n(.*?)$', content, re.DOTALL)
         
         return {
             'up': up_match.group(1).strip() if up_match else '',
-            'down': down_match.group(1).strip() if down_match else ''
+            'down': down_match.group(1).strip() if down_match else '',
+            'headers': self._parse_headers(content, '--')
         }
 
-    def _parse_js_migration(self, content: str) -> Dict[str, str]:
+    def _parse_js_migration(self, content: str) -> Dict[str, Any]:
         """Parse JavaScript/MongoDB migration content."""
         up_match = re.search(r'// UP\n(.*?)(?=// DOWN|$)', content, re.DOTALL)
         down_match = re.search(r'// DOWN\n(.*?)$', content, re.DOTALL)
         
         return {
             'up': up_match.group(1).strip() if up_match else '',
-            'down': down_match.group(1).strip() if down_match else ''
+            'down': down_match.group(1).strip() if down_match else '',
+            'headers': self._parse_headers(content, '//')
+        }
+
+    def _load_migration(self, filename: str) -> Dict[str, Any]:
+        """Parse a migration file and split both blocks into executable steps.
+
+        Results are served from the on-disk cache when the file is unchanged.
+        """
+        if self.cache is None:
+            return self._compile_migration(filename, self._parse_migration_file(filename))
+
+        path = os.path.join(self.migrations_dir, filename)
+        return self.cache.load(
+            path, self.db_type,
+            lambda content: self._compile_migration(
+                filename, self._parse_migration_content(filename, content)
+            ),
+            validate=self._is_compiled_migration
+        )
+
+    @staticmethod
+    def _is_compiled_migration(value: Any) -> bool:
+        """Check the shape of a compiled migration read back from the cache."""
+        if not isinstance(value, dict) or not {'up', 'down', 'headers', 'up_steps', 'down_steps'} <= set(value):
+            return False
+        if not isinstance(value['headers'], dict) or not all(
+            isinstance(key, str) and isinstance(item, str) for key, item in value['headers'].items()
+        ):
+            return False
+        for steps in (value['up_steps'], value['down_steps']):
+            if not isinstance(steps, list):
+                return False
+            for step in steps:
+                if not (isinstance(step, tuple) and len(step) == 2):
+                    return False
+                kind, payload = step
+                if kind == 'copy':
+                    if not (isinstance(payload, tuple) and len(payload) == 2
+                            and all(isinstance(item, str) for item in payload)):
+                        return False
+                elif kind != 'sql' or not isinstance(payload, list) or not all(
+                    isinstance(item, tuple) and len(item) == 2 for item in payload
+                ):
+                    return False
+        return True
+
+    def _checksum(self, filename: str) -> Optional[str]:
+        """SHA-256 of a migration file, or None once it has been deleted.
+
+        With a cache, files whose mtime and size are unchanged are not read.
+        """
+        path = os.path.join(self.migrations_dir, filename)
+        if not os.path.isfile(path):
+            return None
+        if self.cache is not None:
+            return self.cache.checksum(path)
+        return file_checksum(path)
+
+    def _compile_migration(self, filename: str, migration: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach the executable steps of both blocks to a parsed migration."""
+        migration['up_steps'] = self._build_steps(migration['up'])
+        migration['down_steps'] = self._build_steps(migration['down'])
+        return migration
+
+    def _parse_headers(self, content: str, comment: str) -> Dict[str, str]:
+        """Parse ``KEY: value`` comment lines that precede the UP section."""
+        header = content.split(f'{comment} UP', 1)[0]
+        pattern = rf'^{re.escape(comment)} ([A-Za-z_]+):(.*)$'
+        return {
+            match.group(1).upper(): match.group(2).strip()
+            for match in re.finditer(pattern, header, re.MULTILINE)
         }
 
-    def _split_statements(self, sql: str) -> List[str]:
-        """Split migration content into individual statements."""
-        if isinstance(self.connector, PostgreSQLConnector):
-            return [stmt.strip() for stmt in sql.split(';') if stmt.strip()]
-        elif isinstance(self.connector, MongoDBConnector):
-            return [stmt.strip() for stmt in sql.split('\n') if stmt.strip()]
+    def _build_steps(self, sql: Union[str, List[Any]]) -> List[Tuple[str, Any]]:
+        """Turn a migration block into statement batches and COPY loads, in order."""
+        if isinstance(sql, list):
+            # JSON migrations arrive as already validated operations
+            return [('sql', [(operation, None) for operation in sql])] if sql else []
+
+        steps = []
+        position = 0
+        if self.db_type in ('postgresql', 'sqlite'):
+            for match in COPY_DIRECTIVE.finditer(sql):
+                steps.append(('sql', sql[position:match.start()]))
+                steps.append(('copy', self._copy_step(match)))
+                position = match.end()
+        steps.append(('sql', sql[position:]))
+
+        return [
+            (kind, [(stmt, None) for stmt in self._split_statements(payload)] if kind == 'sql' else payload)
+            for kind, payload in steps
+            if kind == 'copy' or payload.strip()
+        ]
+
+    def _copy_step(self, match: re.Match) -> Tuple[str, str]:
+        """Build the ``COPY ... FROM STDIN`` statement and data path for a directive.
+
+        The path stays relative to the migrations directory so compiled steps
+        can be cached independently of where the directory lives.
+        """
+        path = match.group('path')
+        options = match.group('options') or COPY_FORMATS.get(os.path.splitext(path)[1].lower(), '')
+        return f"COPY {match.group('target')} FROM STDIN {options}".strip(), path
+
+    def _runs_in_transaction(self, migration: Dict[str, Any], steps: List[Tuple[str, Any]],
+                             connector: BaseConnector) -> bool:
+        """Decide whether a migration can be applied inside one transaction."""
+        if not self.transactional:
+            return False
+        if migration['headers'].get('TRANSACTION', '').lower() in ('off', 'false', 'no', 'none'):
+            return False
+        return all(
+            connector.can_run_in_transaction(stmt)
+            for kind, payload in steps if kind == 'sql'
+            for stmt, _ in payload
+        )
+
+    @contextmanager
+    def _lock_settings(self, migration: Dict[str, Any], connector: BaseConnector):
+        """Apply a migration's ``LOCK_TIMEOUT``/``LOCK_RETRIES`` headers while it runs.
+
+        ``-- LOCK_TIMEOUT: 2s`` overrides the manager-wide ``lock_timeout``
+        for one migration; ``-- LOCK_TIMEOUT: off`` disables the guard.
+        """
+        headers = migration['headers']
+        if not hasattr(connector, 'lock_timeout') or not (
+                'LOCK_TIMEOUT' in headers or 'LOCK_RETRIES' in headers):
+            yield
+            return
+
+        saved = connector.lock_timeout, connector.lock_retries
+        try:
+            if 'LOCK_TIMEOUT' in headers:
+                value = headers['LOCK_TIMEOUT'].lower()
+                connector.lock_timeout = (
+                    None if value in ('off', 'false', 'no', 'none') else parse_duration(value)
+                )
+            if 'LOCK_RETRIES' in headers:
+                connector.lock_retries = int(headers['LOCK_RETRIES'])
+            yield
+        finally:
+            connector.lock_timeout, connector.lock_retries = saved
+
+    def _split_pending(self, files: List[str], unapplied: Set[str]) -> Tuple[List[str], Set[str]]:
+        """Split migration files into the pending ones and the applied versions."""
+        pending = [filename for filename in files if filename.split('_')[0] in unapplied]
+        applied = {filename.split('_')[0] for filename in files} - unapplied
+        return pending, applied
+
+    def _is_backfill(self, migration: Dict[str, Any]) -> bool:
+        """Check for a ``-- TYPE: backfill`` header."""
+        return migration['headers'].get('TYPE', '').lower() == 'backfill'
+
+    def _split_statements(self, sql: str) -> List[Any]:
+        """Split migration content into individual statements.
+
+        MongoDB operation lines are compiled and validated here, once per
+        file change, so executing them involves no string parsing.
+        """
+        if self.db_type in ('postgresql', 'sqlite'):
+            return split_statements(sql)
+        elif self.db_type == 'mongodb':
+            from .mongo_ops import parse_operation_string
+            return [
+                parse_operation_string(line.strip()) for line in sql.split('\n')
+                if line.strip() and not line.strip().startswith('//')
+            ]
+
+    def _find_baseline(self) -> Optional[str]:
+        """Return the newest squash baseline, relative to the migrations directory."""
+        directory = os.path.join(self.migrations_dir, BASELINES_DIR)
+        if not os.path.isdir(directory):
+            return None
+        extension = '.json' if self.db_type == 'mongodb' else '.sql'
+        names = sorted(f for f in os.listdir(directory) if f.endswith(extension))
+        return os.path.join(BASELINES_DIR, names[-1]) if names else None
+
+    def _squashed_files(self, migration: Dict[str, Any]) -> List[str]:
+        """Migration files a baseline replaces, from its ``SQUASHED`` header."""
+        return [name for name in re.split(r'[\s,]+', migration['headers'].get('SQUASHED', '')) if name]
+
+    def squash_migrations(self, until: str) -> str:
+        """Write a baseline with the combined UP blocks of every migration up to ``until``.
+
+        An empty database is brought up to the baseline in one step and all
+        squashed versions are recorded as applied at once. The baseline
+        extends the previous one, so squashed files may be deleted once every
+        environment has applied them. Backfills are left out: a fresh
+        database has no rows for them to rewrite. The baseline always runs
+        in one transaction together with its history rows, so statements
+        that refuse a transaction block are rewritten or rejected, see
+        ``_transactional_baseline_sql``.
+        """
+        squashed, up = [], []
+        after = None
+        previous = self._find_baseline()
+        if previous is not None:
+            baseline = self._load_migration(previous)
+            squashed = self._squashed_files(baseline)
+            after = max(name.split('_')[0] for name in squashed)
+            if until <= after:
+                raise Exception(f"Migrations up to {after} are already squashed in {previous}")
+            up.append(self._transactional_baseline_sql(previous, baseline['up']))
+
+        included = [
+            filename for filename in self._get_migration_files()
+            if (after is None or filename.split('_')[0] > after) and filename.split('_')[0] <= until
+        ]
+        if not included:
+            raise Exception(f"No migrations to squash up to {until}")
+
+        for filename in included:
+            migration = self._load_migration(filename)
+            squashed.append(filename)
+            if self._is_backfill(migration):
+                if self.db_type == 'postgresql':
+                    up.append(f"-- {filename}: backfill left out of the baseline")
+            elif self.db_type == 'mongodb':
+                operations = migration['up']
+                up.append(operations if isinstance(operations, list) else self._split_statements(operations))
+            elif isinstance(migration['up'], str):
+                up.append(f"-- {filename}\n{self._transactional_baseline_sql(filename, migration['up']).strip()}\n;")
+            else:
+                raise Exception(f"Cannot squash {filename} into a {self.db_type} baseline")
+
+        directory = os.path.join(self.migrations_dir, BASELINES_DIR)
+        os.makedirs(directory, exist_ok=True)
+        if self.db_type == 'mongodb':
+            from bson import json_util
+            filename = f"{until}_baseline.json"
+            content = json_util.dumps({
+                'headers': {'squashed': squashed},
+                'up': [
+                    {'op': op_type, 'collection': collection, 'args': args}
+                    for operations in up for op_type, collection, args in operations
+                ],
+                'down': []
+            }, indent=2)
+        else:
+            filename = f"{until}_baseline.sql"
+            content = f"-- SQUASHED: {', '.join(squashed)}\n-- UP\n" + '\n'.join(up) + "\n\n-- DOWN\n"
+        with open(os.path.join(directory, filename), 'w') as f:
+            f.write(content)
+        return os.path.join(BASELINES_DIR, filename)
+
+    def _transactional_baseline_sql(self, filename: str, sql: str) -> str:
+        """Make a squashed UP block safe to run inside the baseline's transaction.
+
+        An empty database has nothing to build concurrently or vacuum, so
+        ``CONCURRENTLY`` is dropped and ``VACUUM`` left out. Other
+        non-transactional statements, such as ``ALTER SYSTEM``, cannot be
+        squashed at all.
+        """
+        from .connectors.postgresql import LEADING_COMMENTS, NON_TRANSACTIONAL_PATTERN
+
+        parts = []
+        position = 0
+        for statement in self._split_statements(sql):
+            start = sql.index(statement, position)
+            parts.append(sql[position:start])
+            position = start + len(statement)
+            if not NON_TRANSACTIONAL_PATTERN.match(statement):
+                parts.append(statement)
+            elif re.search(r'\bCONCURRENTLY\b', statement, re.IGNORECASE):
+                parts.append(re.sub(r'\s+CONCURRENTLY\b', '', statement, count=1, flags=re.IGNORECASE))
+            elif re.match(LEADING_COMMENTS + r'VACUUM\b', statement, re.IGNORECASE | re.DOTALL):
+                # The newline keeps whatever follows on the line out of the comment
+                parts.append(f"-- {filename}: VACUUM left out of the baseline\n")
+            else:
+                raise Exception(
+                    f"Cannot squash {filename}: '{' '.join(statement.split())[:60]}' "
+                    "cannot run inside the baseline's transaction"
+                )
+        parts.append(sql[position:])
+        return ''.join(parts)
 
     def create_migration(self, name: str, db_type: Optional[str] = None) -> str:
         """Create a new migration file."""
@@ -94,99 +404,640 @@ class MigrationManager:
             
         return filename
 
-    def apply_migrations(self) -> None:
-        """Apply pending migrations."""
-        applied = set(version for version, _ in self.version_control.get_applied_migrations())
-        files = self._get_migration_files()
-        
-        for filename in files:
-            version = filename.split('_')[0]
-            if version not in applied:
-                start_time = time.time()
-                self.connector.reset_metrics()
-                success = True
-                error_msg = None
-                
+    def _start_timeline(self, connector: BaseConnector) -> Optional[StatementTimeline]:
+        """Attach a statement timeline to a connector when timelines are enabled."""
+        if not self.record_timeline:
+            return None
+        timeline = StatementTimeline()
+        connector.add_hook(timeline)
+        return timeline
+
+    def _stop_timeline(self, connector: BaseConnector,
+                       timeline: Optional[StatementTimeline]) -> Optional[List[Dict[str, Any]]]:
+        """Detach a statement timeline and return what it recorded."""
+        if timeline is None:
+            return None
+        connector.remove_hook(timeline)
+        return timeline.entries
+
+    def _log_arguments(self, migration_file: str, start_time: float, success: bool,
+                       error: Optional[str], connector: Any,
+                       timeline: Optional[StatementTimeline]) -> Dict[str, Any]:
+        """Collect a run's metrics into ``MigrationAnalytics.log_migration`` arguments."""
+        metrics = connector.get_metrics()
+        return {
+            'migration_file': migration_file,
+            'start_time': start_time,
+            'end_time': time.time(),
+            'success': success,
+            'error': error,
+            'query_count': metrics['query_count'],
+            'total_rows_affected': metrics['operations_count'],
+            'lock_timeouts': metrics['lock_timeouts'],
+            'lock_wait_seconds': metrics['lock_wait_seconds'],
+            'timeline': self._stop_timeline(connector, timeline),
+        }
+
+    def _save_cache(self) -> None:
+        """Persist cached listings and parsed migrations."""
+        if self.cache is not None:
+            self.cache.save()
+
+    def get_analytics(self) -> Dict[str, Any]:
+        """Get migration analytics and statistics."""
+        return self.analytics.get_migration_stats()
+
+    def get_timeline(self, migration_file: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the statement timeline recorded for the latest run of a migration."""
+        return self.analytics.get_timeline(migration_file)
+
+    def get_analytics_breakdown(self, since: Optional[datetime] = None,
+                                by: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get windowed analytics with duration percentiles and throughput."""
+        return self.analytics.query_stats(since=since, by=by)
+
+class MigrationManager(MigrationSource):
+    def __init__(self, migrations_dir: str = "migrations", db_type: str = "postgresql",
+                 batch_size: int = 1, transactional: bool = True,
+                 cache_dir: Optional[str] = ".schemaflux_cache",
+                 connection_options: Optional[Dict[str, Any]] = None,
+                 log_dir: str = "migration_logs",
+                 pool: Optional[ConnectorPool] = None,
+                 record_timeline: bool = False,
+                 lock_timeout: Optional[float] = None, lock_retries: int = 5,
+                 migration_lock: str = 'wait', migration_lock_wait: Optional[float] = None):
+        if migration_lock not in LOCK_MODES:
+            raise ValueError(f"migration_lock must be one of {', '.join(LOCK_MODES)}")
+        if pool is not None and (batch_size != 1 or lock_timeout is not None or lock_retries != 5
+                                 or connection_options):
+            # Pooled connectors are built by the pool's factory, never by the manager
+            raise ValueError("batch_size, lock_timeout, lock_retries and connection_options "
+                             "cannot be combined with pool; pass them to the pool's factory")
+        self.migrations_dir = migrations_dir
+        self.db_type = db_type.lower()
+        self.connection_options = connection_options or {}
+        self.batch_size = batch_size
+        self.transactional = transactional
+        self.record_timeline = record_timeline
+        self.lock_timeout = lock_timeout
+        self.lock_retries = lock_retries
+        self.cache = MigrationCache(cache_dir) if cache_dir else None
+        self.pool = pool
+        self.migration_lock = migration_lock
+        self.migration_lock_wait = migration_lock_wait
+        self.log_dir = log_dir
+        self._connector = None
+        self._version_control = None
+        self._analytics = None
+        self._held_lock = None
+
+    @property
+    def connector(self) -> BaseConnector:
+        """The manager's connector, connected on first use."""
+        if self._connector is None:
+            self._connector = self._open_connector()
+        return self._connector
+
+    @property
+    def version_control(self) -> VersionControl:
+        """History tracking for the manager's connector, created on first use."""
+        if self._version_control is None:
+            self._version_control = VersionControl(self.connector)
+        return self._version_control
+
+    @property
+    def analytics(self) -> MigrationAnalytics:
+        """The analytics log, opened on first use."""
+        if self._analytics is None:
+            self._analytics = MigrationAnalytics(self.log_dir)
+        return self._analytics
+
+    @contextmanager
+    def _migration_lock(self):
+        """Hold the migration lock around a run; yields False when ``skip`` finds it taken."""
+        if self.migration_lock == 'off':
+            yield True
+            return
+        lock = create_migration_lock(self.connector)
+        if not lock.acquire(wait=self.migration_lock == 'wait', timeout=self.migration_lock_wait):
+            if self.migration_lock == 'skip':
+                yield False
+                return
+            raise Exception(f"Timed out after {self.migration_lock_wait}s waiting for the migration lock")
+        self._held_lock = lock
+        try:
+            yield True
+        finally:
+            self._held_lock = None
+            lock.release()
+
+    def _ensure_lock_held(self) -> None:
+        """Stop the run if its migration lease lapsed or was taken over."""
+        if self._held_lock is not None:
+            self._held_lock.ensure_held()
+
+    def _create_connector(self, db_type: str) -> BaseConnector:
+        """Create appropriate database connector based on type.
+
+        Connector modules are imported here so only the driver for
+        ``db_type`` is ever loaded.
+        """
+        if db_type.lower() == "postgresql":
+            from .connectors.postgresql import PostgreSQLConnector
+            return PostgreSQLConnector(batch_size=self.batch_size, lock_timeout=self.lock_timeout,
+                                       lock_retries=self.lock_retries, **self.connection_options)
+        elif db_type.lower() == "mongodb":
+            from .connectors.mongodb import MongoDBConnector
+            return MongoDBConnector(**self.connection_options)
+        elif db_type.lower() == "sqlite":
+            from .connectors.sqlite import SQLiteConnector
+            return SQLiteConnector(batch_size=self.batch_size, **self.connection_options)
+        else:
+            raise ValueError(f"Unsupported database type: {db_type}")
+
+    def _open_connector(self) -> BaseConnector:
+        """Borrow a connector from the pool, or open a dedicated one."""
+        if self.pool is not None:
+            return self.pool.acquire()
+        connector = self._create_connector(self.db_type)
+        connector.connect()
+        return connector
+
+    def _close_connector(self, connector: BaseConnector) -> None:
+        """Return a connector to the pool, or close it."""
+        if self.pool is not None:
+            self.pool.release(connector)
+        else:
+            connector.close()
+
+    def _run_steps(self, steps: List[Tuple[str, Any]], connector: BaseConnector) -> None:
+        """Execute statement batches and COPY loads in order."""
+        for kind, payload in steps:
+            if kind == 'copy':
+                operation, path = payload
+                path = os.path.join(self.migrations_dir, path)
+                if not os.path.isfile(path):
+                    raise FileNotFoundError(f"COPY data file not found: {path}")
+                connector.copy_from_file(operation, path)
+            else:
+                connector.execute_batch(payload)
+
+    def _execute_migration(self, migration: Dict[str, Any], steps: List[Tuple[str, Any]],
+                           on_success, connector: Optional[BaseConnector] = None) -> None:
+        """Execute a migration plus its history bookkeeping, atomically when possible.
+
+        Migrations containing statements that cannot run in a transaction block
+        (``CREATE INDEX CONCURRENTLY`` and friends) or carrying a
+        ``-- TRANSACTION: off`` header run statement by statement instead.
+        """
+        connector = connector or self.connector
+        self._ensure_lock_held()
+        with self._lock_settings(migration, connector):
+            if self._runs_in_transaction(migration, steps, connector):
+                with connector.transaction():
+                    self._run_steps(steps, connector)
+                    self._ensure_lock_held()
+                    on_success()
+            else:
+                self._run_steps(steps, connector)
+                self._ensure_lock_held()
+                on_success()
+
+    def _run_backfill(self, version: str, migration: Dict[str, Any], on_success,
+                      connector: BaseConnector) -> None:
+        """Apply a ``-- TYPE: backfill`` migration in committed key-range chunks."""
+        steps = migration['up_steps']
+        if len(steps) != 1 or steps[0][0] != 'sql' or len(steps[0][1]) != 1:
+            raise Exception("Backfill migrations must contain exactly one UP statement")
+        from .backfill import BackfillRunner
+        runner = BackfillRunner.from_headers(connector, version, steps[0][1][0][0], migration['headers'])
+        self._ensure_lock_held()
+        runner.run()
+        self._ensure_lock_held()
+        with connector.transaction():
+            on_success()
+            runner.finish()
+
+    def apply_migrations(self, jobs: int = 1) -> List[Dict[str, Any]]:
+        """Apply pending migrations and return their analytics entries.
+
+        With ``jobs`` above one, migrations whose ``DEPENDS`` headers allow it
+        run concurrently, each on its own connection.
+        """
+        with self._migration_lock() as acquired:
+            if not acquired:
+                print(LOCK_SKIPPED)
+                return []
+            return self._apply_pending(jobs)
+
+    def _apply_pending(self, jobs: int) -> List[Dict[str, Any]]:
+        """Apply the baseline (on an empty database) and pending migrations."""
+        try:
+            entries = []
+            baseline = self._find_baseline()
+            if baseline is not None and self.version_control.get_last_applied() is None:
+                entries.append(self._apply_baseline(baseline))
+
+            files = self._get_migration_files()
+            pending, applied = self._split_pending(files, self.version_control.get_pending_versions(
+                filename.split('_')[0] for filename in files
+            ))
+            # SQLite takes one writer at a time, and in memory each connection is its own database
+            if jobs > 1 and len(pending) > 1 and self.db_type != 'sqlite':
+                return entries + self._apply_parallel(pending, applied, jobs)
+            return entries + [
+                self._apply_migration_file(filename, self.connector, self.version_control)
+                for filename in pending
+            ]
+        finally:
+            self._save_cache()
+
+    def _apply_baseline(self, filename: str) -> Dict[str, Any]:
+        """Bring an empty database up to a squash baseline and record every version it covers."""
+        start_time = time.time()
+        self.connector.reset_metrics()
+        timeline = self._start_timeline(self.connector)
+        success = True
+        error_msg = None
+
+        try:
+            migration = self._load_migration(filename)
+            squashed = self._squashed_files(migration)
+            checksums = [self._checksum(name) for name in squashed]
+            self._execute_migration(
+                migration, migration['up_steps'],
+                lambda: self.version_control.record_migrations(squashed, checksums)
+            )
+            print(f"Applied baseline: {filename} ({len(squashed)} migrations)")
+        except Exception as e:
+            success = False
+            error_msg = str(e)
+            raise Exception(f"Failed to apply baseline {filename}: {str(e)}")
+        finally:
+            entry = self.analytics.log_migration(
+                **self._log_arguments(filename, start_time, success, error_msg, self.connector, timeline)
+            )
+        return entry
+
+    def _apply_parallel(self, pending: List[str], applied: set, jobs: int) -> List[Dict[str, Any]]:
+        """Apply pending migrations concurrently in dependency order."""
+        migrations = {filename: self._load_migration(filename) for filename in pending}
+        graph = build_dependency_graph(
+            pending, {filename: migration['headers'] for filename, migration in migrations.items()},
+            applied
+        )
+
+        workers = queue.Queue()
+        workers.put((self.connector, self.version_control))
+        extra_connectors = []
+        try:
+            for _ in range(min(jobs, len(pending)) - 1):
+                connector = self._open_connector()
+                extra_connectors.append(connector)
+                workers.put((connector, VersionControl(connector)))
+
+            def run(filename: str) -> Dict[str, Any]:
+                connector, version_control = workers.get()
                 try:
-                    migration = self._parse_migration_file(filename)
-                    statements = [(stmt, None) for stmt in self._split_statements(migration['up'])]
-                    
-                    if statements:
-                        self.connector.execute_batch(statements)
-                        self.version_control.record_migration(version, filename)
-                        print(f"Applied migration: {filename}")
-                except Exception as e:
-                    success = False
-                    error_msg = str(e)
-                    self.version_control.record_migration(version, filename, False)
-                    raise Exception(f"Failed to apply migration {filename}: {str(e)}")
-                finally:
-                    end_time = time.time()
-                    metrics = self.connector.get_metrics()
-                    self.analytics.log_migration(
-                        migration_file=filename,
-                        start_time=start_time,
-                        end_time=end_time,
-                        success=success,
-                        error=error_msg,
-                        query_count=metrics['query_count'],
-                        total_rows_affected=metrics['operations_count']
+                    return self._apply_migration_file(
+                        filename, connector, version_control, migrations[filename]
                     )
+                finally:
+                    workers.put((connector, version_control))
+
+            return run_in_dependency_order(graph, run, len(extra_connectors) + 1)
+        finally:
+            for connector in extra_connectors:
+                self._close_connector(connector)
+
+    def _apply_migration_file(self, filename: str, connector: BaseConnector,
+                              version_control: VersionControl,
+                              migration: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Apply one migration on the given connection and log its analytics."""
+        version = filename.split('_')[0]
+        start_time = time.time()
+        connector.reset_metrics()
+        timeline = self._start_timeline(connector)
+        success = True
+        error_msg = None
+        
+        try:
+            if migration is None:
+                migration = self._load_migration(filename)
+            steps = migration['up_steps']
+            checksum = self._checksum(filename)
+            
+            if self._is_backfill(migration):
+                self._run_backfill(
+                    version, migration,
+                    lambda: version_control.record_migration(version, filename, checksum=checksum),
+                    connector
+                )
+                print(f"Applied migration: {filename}")
+            elif steps:
+                self._execute_migration(
+                    migration, steps,
+                    lambda: version_control.record_migration(version, filename, checksum=checksum),
+                    connector
+                )
+                print(f"Applied migration: {filename}")
+        except Exception as e:
+            success = False
+            error_msg = str(e)
+            version_control.record_migration(version, filename, False)
+            raise Exception(f"Failed to apply migration {filename}: {str(e)}")
+        finally:
+            entry = self.analytics.log_migration(
+                **self._log_arguments(filename, start_time, success, error_msg, connector, timeline)
+            )
+        return entry
 
     def rollback_migration(self) -> None:
         """Rollback the last migration."""
-        applied = self.version_control.get_applied_migrations()
-        if not applied:
-            print("No migrations to rollback")
-            return
-            
-        last_version, last_name = applied[-1]
+        self.rollback_migrations(steps=1)
+
+    def rollback_migrations(self, steps: Optional[int] = None, to: Optional[str] = None,
+                            single_transaction: bool = False) -> List[Dict[str, Any]]:
+        """Roll back the last ``steps`` migrations, or all applied after version ``to``.
+
+        The targets are looked up once and their ``DOWN`` blocks run newest
+        first on one connection. Each migration normally commits on its own.
+        With ``single_transaction`` they run in one transaction together with
+        one bulk delete of their history rows, so either all are undone or
+        none is. ``to`` must be an applied version, so a mistyped or
+        shortened one never unwinds the whole schema.
+        """
+        if steps is None and to is None:
+            raise ValueError("Pass the number of steps or a version to roll back to")
+        with self._migration_lock() as acquired:
+            if not acquired:
+                print(LOCK_SKIPPED)
+                return []
+            try:
+                if to is not None and self.version_control.get_pending_versions([to]):
+                    raise Exception(f"Version {to} is not an applied migration; nothing was rolled back")
+                targets = self.version_control.get_latest_applied(limit=steps, after=to)
+                if not targets:
+                    print("No migrations to rollback")
+                    return []
+                if single_transaction:
+                    return self._rollback_together(targets)
+                return [self._rollback_one(version, name) for version, name in targets]
+            finally:
+                self._save_cache()
+
+    def _rollback_one(self, version: str, name: str) -> Dict[str, Any]:
+        """Roll back one migration in its own transaction and log its analytics."""
         start_time = time.time()
         self.connector.reset_metrics()
+        timeline = self._start_timeline(self.connector)
         success = True
         error_msg = None
         
         try:
-            migration = self._parse_migration_file(last_name)
+            migration = self._load_migration(name)
             if migration['down']:
-                statements = [(stmt, None) for stmt in self._split_statements(migration['down'])]
-                if statements:
-                    self.connector.execute_batch(statements)
-                    self.version_control.remove_migration(last_version)
-                    print(f"Rolled back migration: {last_name}")
+                steps = migration['down_steps']
+                if steps:
+                    self._execute_migration(
+                        migration, steps,
+                        lambda: self.version_control.remove_migration(version)
+                    )
+                    print(f"Rolled back migration: {name}")
             else:
                 raise Exception("No down migration specified")
         except Exception as e:
             success = False
             error_msg = str(e)
-            raise Exception(f"Failed to rollback migration {last_name}: {str(e)}")
+            raise Exception(f"Failed to rollback migration {name}: {str(e)}")
         finally:
-            end_time = time.time()
-            metrics = self.connector.get_metrics()
-            self.analytics.log_migration(
-                migration_file=f"{last_name} (rollback)",
-                start_time=start_time,
-                end_time=end_time,
-                success=success,
-                error=error_msg,
-                query_count=metrics['query_count'],
-                total_rows_affected=metrics['operations_count']
+            entry = self.analytics.log_migration(**self._log_arguments(
+                f"{name}{ROLLBACK_SUFFIX}", start_time, success, error_msg, self.connector, timeline
+            ))
+        return entry
+
+    def _rollback_together(self, targets: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Roll back migrations newest first inside a single transaction."""
+        migrations = [(name, self._load_migration(name)) for _, name in targets]
+        for name, migration in migrations:
+            if not migration['down']:
+                raise Exception(f"Failed to rollback migration {name}: No down migration specified")
+            if not self._runs_in_transaction(migration, migration['down_steps'], self.connector):
+                raise Exception(f"Cannot roll back {name} inside a single transaction")
+
+        runs = []
+        current = None
+        try:
+            with self.connector.transaction():
+                for name, migration in migrations:
+                    current = name
+                    start_time = time.time()
+                    self.connector.reset_metrics()
+                    timeline = self._start_timeline(self.connector)
+                    self._ensure_lock_held()
+                    with self._lock_settings(migration, self.connector):
+                        self._run_steps(migration['down_steps'], self.connector)
+                    runs.append(self._log_arguments(
+                        f"{name}{ROLLBACK_SUFFIX}", start_time, True, None, self.connector, timeline
+                    ))
+                current = None
+                self._ensure_lock_held()
+                self.version_control.remove_migrations([version for version, _ in targets])
+        except Exception as e:
+            # Nothing was committed, so every rollback in the batch failed
+            for run in runs:
+                run['success'], run['error'] = False, str(e)
+            if current is not None:
+                runs.append(self._log_arguments(
+                    f"{current}{ROLLBACK_SUFFIX}", start_time, False, str(e), self.connector, timeline
+                ))
+            self.analytics.log_migrations(runs)
+            if current is not None:
+                raise Exception(f"Failed to rollback migration {current}: {str(e)}")
+            raise Exception(f"Failed to rollback migrations: {str(e)}")
+
+        for name, _ in migrations:
+            print(f"Rolled back migration: {name}")
+        return self.analytics.log_migrations(runs)
+
+    def explain_migrations(self) -> List[Dict[str, Any]]:
+        """Capture PostgreSQL query plans for the DML in pending migrations.
+
+        Nothing is applied. Statements that depend on schema changes made
+        earlier in the same pending set cannot be planned yet and are
+        reported with the planner error instead.
+        """
+        if self.db_type != 'postgresql':
+            raise Exception("EXPLAIN dry runs are only supported for PostgreSQL")
+
+        files = self._get_migration_files()
+        pending, _ = self._split_pending(files, self.version_control.get_pending_versions(
+            filename.split('_')[0] for filename in files
+        ))
+        plans = []
+        try:
+            for filename in pending:
+                migration = self._load_migration(filename)
+                for kind, payload in migration['up_steps']:
+                    if kind != 'sql':
+                        continue
+                    for statement, params in payload:
+                        if self._is_backfill(migration):
+                            # Plan a single (empty) chunk of the key range walk
+                            params = {'start': 0, 'end': 0}
+                        if not EXPLAINABLE.match(statement):
+                            continue
+                        entry = {'file': filename, 'statement': statement, 'plan': None, 'error': None}
+                        try:
+                            entry['plan'] = self.connector.explain(statement, params)
+                        except Exception as e:
+                            entry['error'] = str(e)
+                        plans.append(entry)
+        finally:
+            self._save_cache()
+        return plans
+
+    def _classify_migration(self, migration: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Classify every UP statement of a migration for the planner."""
+        from .planner import classify_mongo, classify_sql
+        entries = []
+        for kind, payload in migration['up_steps']:
+            statements = [payload[0]] if kind == 'copy' else [stmt for stmt, _ in payload]
+            for statement in statements:
+                if self._is_backfill(migration):
+                    # Chunks commit one by one, so no lock outlives a chunk
+                    entry = {'kind': 'backfill', 'table': migration['headers'].get('TABLE'),
+                             'lock': None, 'sized': True}
+                elif self.db_type in ('postgresql', 'sqlite'):
+                    # SQLite runs the same PostgreSQL-style migrations offline
+                    entry = classify_sql(statement)
+                else:
+                    entry = classify_mongo(statement)
+                    # Compiled operations carry their arguments; show method and collection
+                    statement = f"{statement[0]}:{statement[1]}"
+                entry['statement'] = statement
+                entries.append(entry)
+        return entries
+
+    def plan_migrations(self) -> List[Dict[str, Any]]:
+        """Estimate the runtime and lock footprint of each pending migration.
+
+        Nothing is applied. Statements are classified as table rewrites,
+        index builds, validating scans, DML or metadata-only changes and
+        costed from current table sizes at the rows per second earlier
+        applies achieved, or ``DEFAULT_ROWS_PER_SECOND`` without history.
+        Migrations already applied elsewhere with the same analytics log also
+        report their measured median duration.
+        """
+        from .planner import (COST_FACTORS, DEFAULT_ROWS_PER_SECOND, assess,
+                              historical_rows_per_second, table_sizes)
+
+        files = self._get_migration_files()
+        pending, _ = self._split_pending(files, self.version_control.get_pending_versions(
+            filename.split('_')[0] for filename in files
+        ))
+        try:
+            migrations = {filename: self._load_migration(filename) for filename in pending}
+        finally:
+            self._save_cache()
+        classified = {filename: self._classify_migration(migrations[filename]) for filename in pending}
+
+        sizes = table_sizes(self.connector, (
+            entry['table'] for entries in classified.values() for entry in entries if entry['table']
+        ))
+        rate = historical_rows_per_second(self.analytics.query_stats()) or DEFAULT_ROWS_PER_SECOND
+        measured = {
+            row['migration']: row['p50_duration']
+            for row in self.analytics.query_stats(by='migration')
+            if row['kind'] == 'apply' and row['outcome'] == 'success'
+        }
+
+        plans = []
+        for filename in pending:
+            migration = migrations[filename]
+            backfill = self._is_backfill(migration)
+            statement_rate = rate
+            if backfill and migration['headers'].get('MAX_ROWS_PER_SECOND'):
+                statement_rate = min(rate, float(migration['headers']['MAX_ROWS_PER_SECOND']))
+
+            statements = []
+            for entry in classified[filename]:
+                size = sizes.get(entry['table'])
+                rows, size_bytes = size or (0, 0)
+                statements.append({
+                    'statement': entry['statement'],
+                    'kind': entry['kind'],
+                    'table': entry['table'],
+                    'lock': entry['lock'],
+                    'new_table': entry['table'] is not None and size is None,
+                    'rows': rows,
+                    'bytes': size_bytes,
+                    'seconds': rows * COST_FACTORS[entry['kind']] / statement_rate if entry['sized'] else 0.0,
+                })
+
+            transactional = not backfill and self._runs_in_transaction(
+                migration, migration['up_steps'], self.connector
             )
+            plan = {'file': filename, 'transactional': transactional, 'statements': statements,
+                    'measured_seconds': measured.get(filename)}
+            plan.update(assess(statements, transactional))
+            plans.append(plan)
+        return plans
+
+    def verify_migrations(self) -> List[Dict[str, Any]]:
+        """Compare applied migration files against the checksums recorded when they ran.
+
+        Returns one entry per problem, with ``issue`` set to ``changed``
+        (edited after it was applied), ``missing`` (applied but deleted, and
+        not covered by the newest baseline), ``renamed`` (same version, other
+        file name) or ``unrecorded`` (applied before checksums were kept).
+        History is read in one query; files are hashed in chunks, and with a
+        cache only those whose mtime or size changed are read at all.
+        """
+        recorded = self.version_control.get_checksums()
+        files = {filename.split('_')[0]: filename for filename in self._get_migration_files()}
+        squashed = set()
+        baseline = self._find_baseline()
+        issues = []
+        try:
+            if baseline is not None:
+                squashed = set(self._squashed_files(self._load_migration(baseline)))
+            for version in sorted(recorded):
+                name, checksum = recorded[version]
+                filename = files.get(version)
+                if filename is None:
+                    if name not in squashed:
+                        issues.append({'file': name, 'version': version, 'issue': 'missing'})
+                    continue
+                if filename != name:
+                    issues.append({'file': filename, 'version': version, 'issue': 'renamed',
+                                   'recorded_name': name})
+                if checksum is None:
+                    issues.append({'file': filename, 'version': version, 'issue': 'unrecorded'})
+                elif self._checksum(filename) != checksum:
+                    issues.append({'file': filename, 'version': version, 'issue': 'changed'})
+        finally:
+            self._save_cache()
+        return issues
 
     def show_status(self) -> List[Dict[str, Any]]:
         """Show migration status."""
-        applied = set(version for version, _ in self.version_control.get_applied_migrations())
         files = self._get_migration_files()
+        unapplied = self.version_control.get_pending_versions(filename.split('_')[0] for filename in files)
+        self._save_cache()
         
         status = []
         for filename in files:
             version = filename.split('_')[0]
             status.append({
                 'file': filename,
-                'applied': version in applied
+                'applied': version not in unapplied
             })
         return status
 
-    def get_analytics(self) -> Dict[str, Any]:
-        """Get migration analytics and statistics."""
-        return self.analytics.get_migration_stats()
+    def close(self) -> None:
+        """Close the database connection, or hand it back to the pool."""
+        if self._connector is not None:
+            self._close_connector(self._connector)
+            self._connector = None
+            self._version_control = None
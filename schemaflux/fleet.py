@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+from .core import MigrationManager
+
+# Target keys passed through to the connector constructor.
+CONNECTION_KEYS = {
+    'postgresql': ('dsn', 'schema'),
+    'mongodb': ('uri', 'database'),
+    'sqlite': ('database',),
+}
+
+SKIPPED = 'Skipped after an earlier failure'
+
+def load_targets(path: str) -> List[Dict[str, Any]]:
+    """Load target definitions from a YAML or JSON file.
+
+    The file holds either a list of targets or a mapping with a ``targets``
+    list. Each target needs a unique ``name`` and may set ``db_type``,
+    ``migrations_dir`` and the connection keys of its database type
+    (``dsn``/``schema`` for PostgreSQL, ``uri``/``database`` for MongoDB).
+    """
+    with open(path, 'r') as f:
+        content = f.read()
+
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise Exception("PyYAML is required for YAML target files: pip install schemaflux[yaml]")
+        data = yaml.safe_load(content)
+    else:
+        data = json.loads(content)
+
+    targets = data.get('targets', []) if isinstance(data, dict) else data
+    names = set()
+    for target in targets:
+        if 'name' not in target:
+            raise ValueError(f"Target without a name in {path}: {target}")
+        if target['name'] in names:
+            raise ValueError(f"Duplicate target name in {path}: {target['name']}")
+        names.add(target['name'])
+    return targets
+
+class FleetRunner:
+    """Apply the same migrations to many databases or schemas concurrently.
+
+    Every target gets its own ``MigrationManager``, so version tracking stays
+    per target. With ``fail_fast`` the first failure cancels targets that
+    have not started yet; otherwise every target is attempted.
+    """
+
+    def __init__(self, targets: List[Dict[str, Any]], migrations_dir: str = "migrations",
+                 jobs: int = 4, fail_fast: bool = True, parallel: int = 1,
+                 **manager_options):
+        self.targets = targets
+        self.migrations_dir = migrations_dir
+        self.jobs = max(1, jobs)
+        self.parallel = parallel
+        self.fail_fast = fail_fast
+        self.manager_options = manager_options
+        self._stop = threading.Event()
+
+    def _create_manager(self, target: Dict[str, Any]) -> MigrationManager:
+        db_type = target.get('db_type', 'postgresql').lower()
+        connection_options = {
+            key: target[key] for key in CONNECTION_KEYS.get(db_type, ()) if key in target
+        }
+        return MigrationManager(
+            migrations_dir=target.get('migrations_dir', self.migrations_dir),
+            db_type=db_type,
+            connection_options=connection_options,
+            **self.manager_options
+        )
+
+    def _empty_result(self, name: str, error: str = None) -> Dict[str, Any]:
+        return {'target': name, 'success': False, 'applied': [], 'error': error,
+                'duration_seconds': 0.0, 'query_count': 0, 'total_rows_affected': 0}
+
+    def _apply_target(self, target: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply pending migrations to one target and summarise the outcome."""
+        if self._stop.is_set():
+            return self._empty_result(target['name'], SKIPPED)
+        result = self._empty_result(target['name'])
+
+        start_time = time.time()
+        manager = None
+        try:
+            manager = self._create_manager(target)
+            entries = manager.apply_migrations(jobs=self.parallel)
+            result['applied'] = [entry['migration_file'] for entry in entries]
+            result['query_count'] = sum(entry['query_count'] for entry in entries)
+            result['total_rows_affected'] = sum(entry['total_rows_affected'] for entry in entries)
+            result['success'] = True
+        except Exception as e:
+            result['error'] = str(e)
+            if self.fail_fast:
+                self._stop.set()
+        finally:
+            if manager:
+                manager.close()
+            result['duration_seconds'] = time.time() - start_time
+        return result
+
+    def apply(self) -> Dict[str, Any]:
+        """Apply pending migrations to every target and aggregate the results."""
+        results = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            futures = [pool.submit(self._apply_target, target) for target in self.targets]
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                results.append(future.result())
+                if self._stop.is_set():
+                    for pending in futures:
+                        pending.cancel()
+
+        finished = {result['target'] for result in results}
+        for target in self.targets:
+            if target['name'] not in finished:
+                results.append(self._empty_result(target['name'], SKIPPED))
+
+        order = {target['name']: index for index, target in enumerate(self.targets)}
+        results.sort(key=lambda result: order[result['target']])
+        return {
+            'targets': results,
+            'total_targets': len(results),
+            'successful_targets': sum(1 for result in results if result['success']),
+            'failed_targets': sum(1 for result in results if not result['success']),
+            'migrations_applied': sum(len(result['applied']) for result in results),
+            'total_queries': sum(result['query_count'] for result in results),
+            'total_rows_affected': sum(result['total_rows_affected'] for result in results),
+            'slowest_target_seconds': max((result['duration_seconds'] for result in results), default=0.0),
+        }
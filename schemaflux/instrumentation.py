@@ -0,0 +1,42 @@
+import time
+from typing import Optional
+
+class StatementHook:
+    """Base class for per-statement instrumentation attached to a connector.
+
+    Connectors only call hooks while at least one is attached, so an
+    uninstrumented connector pays nothing. A DDL statement retried under
+    ``lock_timeout`` is reported once per attempt; the timed-out attempts
+    carry the lock timeout error, and their duration is the time spent
+    queued for the lock.
+    """
+
+    def before_statement(self, operation: str) -> None:
+        """Called right before an operation is sent to the database."""
+        pass
+
+    def after_statement(self, operation: str, duration: float, rows: int,
+                        error: Optional[str] = None) -> None:
+        """Called once an operation finished, successfully or not."""
+        pass
+
+class StatementTimeline(StatementHook):
+    """Records when each statement ran and how long it took."""
+
+    def __init__(self, max_statement_length: int = 200):
+        self.max_statement_length = max_statement_length
+        self.entries = []
+        self._origin = time.perf_counter()
+
+    def after_statement(self, operation: str, duration: float, rows: int,
+                        error: Optional[str] = None) -> None:
+        statement = ' '.join(operation.split())
+        if len(statement) > self.max_statement_length:
+            statement = statement[:self.max_statement_length - 3] + '...'
+        self.entries.append({
+            'statement': statement,
+            'offset_seconds': time.perf_counter() - self._origin - duration,
+            'duration_seconds': duration,
+            'rows': rows,
+            'error': error,
+        })
@@ -0,0 +1,116 @@
+"""
+Streaming SQL statement splitter that understands PostgreSQL quoting rules.
+"""
+import re
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+T = TypeVar('T')
+
+# Characters that may start a quoted section, a comment or end a statement.
+# Everything in between is skipped with a single regex jump.
+_SPECIAL = re.compile(r"[;'\"$]|--|/\*")
+_STRING_BODY = re.compile(r"[^']*(?:''[^']*)*'")
+_ESCAPE_STRING_BODY = re.compile(r"[^'\\]*(?:(?:\\.|'')[^'\\]*)*'", re.DOTALL)
+_IDENTIFIER_BODY = re.compile(r'[^"]*(?:""[^"]*)*"')
+_DOLLAR_TAG = re.compile(r"\$(?:[A-Za-z_\x80-\uffff][A-Za-z0-9_\x80-\uffff]*)?\$")
+_BLOCK_COMMENT_TOKEN = re.compile(r"/\*|\*/")
+_COMMENT_ONLY = re.compile(r"(?:\s+|--[^\n]*|/\*.*?\*/)*", re.DOTALL)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char in '_$'
+
+
+def _skip_block_comment(sql: str, pos: int) -> int:
+    """Return the position after a (possibly nested) block comment starting at ``pos``."""
+    depth = 0
+    for match in _BLOCK_COMMENT_TOKEN.finditer(sql, pos):
+        depth += 1 if match.group() == '/*' else -1
+        if depth == 0:
+            return match.end()
+    return len(sql)
+
+
+def _skip_quoted(sql: str, pos: int) -> int:
+    """Return the position after the quoted section or comment starting at ``pos``.
+
+    Unterminated sections run to the end of the input, matching how the server
+    would reject them as a single malformed statement.
+    """
+    char = sql[pos]
+    if char == "'":
+        is_escape = (
+            pos > 0 and sql[pos - 1] in 'eE'
+            and (pos == 1 or not _is_word_char(sql[pos - 2]))
+        )
+        body = _ESCAPE_STRING_BODY if is_escape else _STRING_BODY
+        match = body.match(sql, pos + 1)
+        return match.end() if match else len(sql)
+    if char == '"':
+        match = _IDENTIFIER_BODY.match(sql, pos + 1)
+        return match.end() if match else len(sql)
+    if char == '$':
+        # ``foo$bar`` identifiers and ``$1`` parameters are not dollar quotes.
+        if pos > 0 and _is_word_char(sql[pos - 1]):
+            return pos + 1
+        tag = _DOLLAR_TAG.match(sql, pos)
+        if not tag:
+            return pos + 1
+        end = sql.find(tag.group(), tag.end())
+        return end + len(tag.group()) if end >= 0 else len(sql)
+    if sql.startswith('--', pos):
+        end = sql.find('\n', pos)
+        return end + 1 if end >= 0 else len(sql)
+    return _skip_block_comment(sql, pos)
+
+
+def _has_code(statement: str) -> bool:
+    if statement[0] not in '-/':
+        return True
+    return _COMMENT_ONLY.fullmatch(statement) is None
+
+
+def iter_statements(sql: str) -> Iterator[str]:
+    """Lazily yield the statements of a SQL script, without trailing semicolons.
+
+    Semicolons inside string literals (including ``E''`` strings), quoted
+    identifiers, dollar-quoted bodies and comments do not split statements.
+    Statements consisting solely of comments are dropped. The scan is a single
+    left-to-right pass, so cost grows linearly with the size of the script.
+    """
+    start = 0
+    pos = 0
+    length = len(sql)
+    while pos < length:
+        match = _SPECIAL.search(sql, pos)
+        if not match:
+            break
+        pos = match.start()
+        if sql[pos] == ';':
+            statement = sql[start:pos].strip()
+            if statement and _has_code(statement):
+                yield statement
+            pos += 1
+            start = pos
+        else:
+            pos = _skip_quoted(sql, pos)
+
+    statement = sql[start:].strip()
+    if statement and _has_code(statement):
+        yield statement
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a SQL script into a list of statements."""
+    return list(iter_statements(sql))
+
+
+def batch_statements(statements: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group an iterable of statements into lists of at most ``size`` items."""
+    iterator = iter(statements)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
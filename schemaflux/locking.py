@@ -0,0 +1,216 @@
+import os
+import platform
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from .connectors.base import BaseConnector
+
+# What apply/rollback do when another process holds the migration lock.
+LOCK_MODES = ('wait', 'skip', 'off')
+
+# First key of the two-key advisory lock; the second is derived from the
+# schema, so fleet targets sharing a database do not block each other.
+ADVISORY_LOCK_NAMESPACE = 0x5346
+
+LEASE_COLLECTION = 'migration_lock'
+
+# Process-wide locks for SQLite database files, by absolute path.
+_LOCAL_LOCKS = {}
+_LOCAL_LOCKS_GUARD = threading.Lock()
+
+class MigrationLock:
+    """Mutual exclusion for migration runs across processes and hosts.
+
+    Followers either give up at once (``wait=False``) or poll with jitter,
+    ``poll_interval`` seconds apart on average, so a fleet of replicas
+    starting together spreads its checks out instead of hitting the
+    database in lockstep.
+    """
+
+    def __init__(self, connector: BaseConnector, poll_interval: float = 1.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.connector = connector
+        self.poll_interval = poll_interval
+        self.sleep = sleep
+
+    def acquire(self, wait: bool = True, timeout: Optional[float] = None) -> bool:
+        """Take the lock, waiting up to ``timeout`` seconds (forever if None) when ``wait`` is set."""
+        if not wait:
+            return self._try_acquire()
+        return self._poll(timeout)
+
+    def _poll(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            delay = random.uniform(0.5, 1.5) * self.poll_interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            self.sleep(delay)
+        return True
+
+    def _try_acquire(self) -> bool:
+        raise NotImplementedError
+
+    def ensure_held(self) -> None:
+        """Raise if the lock was lost since it was acquired; a no-op for session locks."""
+
+    def release(self) -> None:
+        raise NotImplementedError
+
+class AdvisoryLock(MigrationLock):
+    """Session-level PostgreSQL advisory lock, scoped to the current schema.
+
+    Held outside any transaction, so waiting followers keep no snapshot open
+    and the lock goes away by itself if the holder's connection dies.
+    Waiting without a timeout blocks in the server rather than polling.
+    """
+
+    def _statement(self, function: str) -> str:
+        return f"SELECT {function}({ADVISORY_LOCK_NAMESPACE}, hashtext(current_schema()));"
+
+    def _poll(self, timeout: Optional[float]) -> bool:
+        if timeout is None:
+            self.connector.execute(self._statement('pg_advisory_lock'))
+            return True
+        return super()._poll(timeout)
+
+    def _try_acquire(self) -> bool:
+        return bool(self.connector.execute(self._statement('pg_try_advisory_lock')).fetchone()[0])
+
+    def release(self) -> None:
+        self.connector.execute(self._statement('pg_advisory_unlock'))
+
+class LeaseState:
+    """Ownership bookkeeping shared by the sync and async MongoDB leases.
+
+    The holder counts the lease as valid until ``ttl`` after its last
+    successful write, measured on the local monotonic clock from before the
+    write was sent. A renewal that matches no document means another
+    process took the lease over. Either way ``ensure_held`` raises, so a
+    stalled holder stops instead of migrating next to the new one.
+    """
+
+    def _init_lease(self, name: str, ttl: float) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{platform.node()}:{os.getpid()}:{os.urandom(4).hex()}"
+        self._valid_until = 0.0
+        self._lost = False
+
+    def _expiry(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+
+    def _acquire_arguments(self) -> tuple:
+        """Filter and update that take a lapsed or own lease, or collide on ``_id`` with a live one."""
+        now = datetime.now(timezone.utc)
+        return (
+            {'_id': self.name, '$or': [{'expires_at': {'$lt': now}}, {'owner': self.owner}]},
+            {'$set': {'owner': self.owner, 'expires_at': self._expiry(), 'acquired_at': now}},
+        )
+
+    def _renew_arguments(self) -> tuple:
+        return {'_id': self.name, 'owner': self.owner}, {'$set': {'expires_at': self._expiry()}}
+
+    def _written(self, sent_at: float) -> None:
+        """Record a successful acquire or renewal sent at monotonic time ``sent_at``."""
+        self._valid_until = sent_at + self.ttl
+        self._lost = False
+
+    def ensure_held(self) -> None:
+        if self._lost:
+            raise Exception("The migration lease was taken over by another process; stopping")
+        if time.monotonic() >= self._valid_until:
+            raise Exception("The migration lease expired before it could be renewed; stopping")
+
+class MongoLease(LeaseState, MigrationLock):
+    """Lease document in ``migration_lock`` that expires unless renewed.
+
+    MongoDB has no session locks, so the holder renews the lease every
+    ``ttl / 3`` seconds from a background thread. If the holder dies, the
+    lease lapses after ``ttl`` and the next follower takes over. If the
+    holder merely stalls that long, ``ensure_held`` makes it stop.
+    """
+
+    def __init__(self, connector: BaseConnector, name: str = 'migrations', ttl: float = 60.0,
+                 poll_interval: float = 1.0, sleep: Callable[[float], None] = time.sleep):
+        super().__init__(connector, poll_interval, sleep)
+        self._init_lease(name, ttl)
+        self._stop = threading.Event()
+        self._renewer = None
+
+    def _try_acquire(self) -> bool:
+        from pymongo.errors import DuplicateKeyError
+        collection = self.connector.db[LEASE_COLLECTION]
+        sent_at = time.monotonic()
+        try:
+            collection.update_one(*self._acquire_arguments(), upsert=True)
+        except DuplicateKeyError:
+            return False
+        self._written(sent_at)
+        self._stop.clear()
+        self._renewer = threading.Thread(target=self._renew, daemon=True)
+        self._renewer.start()
+        return True
+
+    def _renew(self) -> None:
+        collection = self.connector.db[LEASE_COLLECTION]
+        while not self._stop.wait(self.ttl / 3):
+            sent_at = time.monotonic()
+            try:
+                result = collection.update_one(*self._renew_arguments())
+            except Exception:
+                # Try again on the next tick; the lease outlives a few missed renewals
+                continue
+            if result.matched_count == 0:
+                self._lost = True
+                return
+            self._written(sent_at)
+
+    def release(self) -> None:
+        self._stop.set()
+        if self._renewer is not None:
+            self._renewer.join()
+            self._renewer = None
+        self.connector.db[LEASE_COLLECTION].delete_one({'_id': self.name, 'owner': self.owner})
+
+class LocalLock(MigrationLock):
+    """In-process lock for SQLite databases.
+
+    An in-memory database only exists inside one process, so a thread lock
+    per database is all the exclusion it needs. Managers in separate
+    processes sharing a database file are not serialized.
+    """
+
+    def __init__(self, connector: BaseConnector, poll_interval: float = 1.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        super().__init__(connector, poll_interval, sleep)
+        database = getattr(connector, 'database', ':memory:')
+        if database == ':memory:':
+            # Nothing outside this connection can reach the database
+            self._lock = threading.Lock()
+            return
+        with _LOCAL_LOCKS_GUARD:
+            self._lock = _LOCAL_LOCKS.setdefault(os.path.abspath(database), threading.Lock())
+
+    def _poll(self, timeout: Optional[float]) -> bool:
+        return self._lock.acquire(timeout=-1 if timeout is None else timeout)
+
+    def _try_acquire(self) -> bool:
+        return self._lock.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._lock.release()
+
+def create_migration_lock(connector: BaseConnector, poll_interval: float = 1.0) -> MigrationLock:
+    """Build the migration lock matching the connector's database."""
+    if connector.dialect == 'postgresql':
+        return AdvisoryLock(connector, poll_interval)
+    elif connector.dialect == 'mongodb':
+        return MongoLease(connector, poll_interval=poll_interval)
+    elif connector.dialect == 'sqlite':
+        return LocalLock(connector, poll_interval)
+    raise ValueError(f"No migration lock for database type: {connector.dialect}")
@@ -0,0 +1,95 @@
+import ast
+from typing import Any, Dict, List, Tuple
+from bson import json_util
+
+# Collection methods a MongoDB migration may call, with the arguments each requires.
+OPERATIONS = {
+    'insert_one': ('document',),
+    'insert_many': ('documents',),
+    'update_one': ('filter', 'update'),
+    'update_many': ('filter', 'update'),
+    'replace_one': ('filter', 'replacement'),
+    'delete_one': ('filter',),
+    'delete_many': ('filter',),
+    'find': (),
+    'find_one': (),
+    'count_documents': ('filter',),
+    'aggregate': ('pipeline',),
+    'create_index': ('keys',),
+    'create_indexes': ('indexes',),
+    'drop_index': ('index_or_name',),
+    'drop_indexes': (),
+    'rename': ('new_name',),
+    'drop': (),
+}
+
+# A compiled operation: (method, collection, keyword arguments).
+Operation = Tuple[str, str, Dict[str, Any]]
+
+def validate_operation(op_type: Any, collection: Any, args: Any) -> Operation:
+    """Check an operation against ``OPERATIONS`` and return it in compiled form."""
+    if op_type not in OPERATIONS:
+        raise ValueError(f"Unsupported MongoDB operation: {op_type}")
+    if not isinstance(collection, str) or not collection:
+        raise ValueError(f"MongoDB operation {op_type} needs a collection name")
+    if not isinstance(args, dict):
+        raise ValueError(f"Arguments of {op_type} on {collection} must be an object")
+    missing = [name for name in OPERATIONS[op_type] if name not in args]
+    if missing:
+        raise ValueError(f"{op_type} on {collection} is missing: {', '.join(missing)}")
+    return op_type, collection, args
+
+def parse_operation_string(operation: str) -> Operation:
+    """Parse an ``op:collection:{...}`` line, e.g. ``insert_one:users:{'document': {}}``.
+
+    The arguments are read as a Python literal, never evaluated as code.
+    """
+    try:
+        op_type, collection, query = operation.split(':', 2)
+        args = ast.literal_eval(query.strip())
+    except (ValueError, SyntaxError) as e:
+        raise ValueError(f"Invalid MongoDB operation format: {operation[:80]} ({e})")
+    return validate_operation(op_type.strip(), collection.strip(), args)
+
+def parse_json_migration(content: str) -> Dict[str, Any]:
+    """Parse a ``.json`` migration into validated operation lists.
+
+    The file is MongoDB Extended JSON, so ``{"$date": ...}``, ``{"$oid": ...}``
+    and friends become native BSON values::
+
+        {
+          "headers": {"depends": "20240101000000"},
+          "up": [{"op": "insert_one", "collection": "users", "args": {"document": {"name": "a"}}}],
+          "down": [{"op": "delete_many", "collection": "users", "args": {"filter": {}}}]
+        }
+    """
+    try:
+        document = json_util.loads(content)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON migration: {e}")
+    if not isinstance(document, dict) or set(document) - {'headers', 'up', 'down'}:
+        raise ValueError("A JSON migration must be an object with 'up', 'down' and optional 'headers'")
+
+    headers = document.get('headers') or {}
+    if not isinstance(headers, dict):
+        raise ValueError("JSON migration 'headers' must be an object")
+    return {
+        'up': _json_operations(document.get('up') or [], 'up'),
+        'down': _json_operations(document.get('down') or [], 'down'),
+        'headers': {
+            key.upper(): ', '.join(map(str, value)) if isinstance(value, list) else str(value)
+            for key, value in headers.items()
+        },
+    }
+
+def _json_operations(entries: Any, block: str) -> List[Operation]:
+    if not isinstance(entries, list):
+        raise ValueError(f"JSON migration '{block}' must be a list of operations")
+    operations = []
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict) or set(entry) - {'op', 'collection', 'args'}:
+            raise ValueError(
+                f"Operation {position} in '{block}' must be an object with 'op', 'collection' and 'args'"
+            )
+        operations.append(validate_operation(entry.get('op'), entry.get('collection'), entry.get('args', {})))
+    return operations
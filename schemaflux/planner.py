@@ -0,0 +1,228 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .connectors.base import BaseConnector
+
+# Work per row relative to rewriting it. Metadata-only changes touch no rows,
+# and a validating scan reads the table without writing it.
+COST_FACTORS = {
+    'rewrite': 1.0,
+    'index': 1.0,
+    'dml': 1.0,
+    'backfill': 1.0,
+    'scan': 0.2,
+    'metadata': 0.0,
+    'other': 0.0,
+}
+
+# Rows per second assumed when the analytics log has no throughput to go by.
+DEFAULT_ROWS_PER_SECOND = 50000.0
+
+# Holding a lock that blocks writes for longer than this makes a migration high risk.
+LONG_LOCK_SECONDS = 1.0
+
+# Table locks from weakest to strongest, with the traffic each one blocks.
+# The MongoDB entries are collection locks.
+LOCK_BLOCKS = {
+    'ROW EXCLUSIVE': 'DDL and index builds',
+    'INTENT EXCLUSIVE': 'collection DDL',
+    'SHARE UPDATE EXCLUSIVE': 'DDL and VACUUM',
+    'SHARE': 'writes',
+    'SHARE ROW EXCLUSIVE': 'writes',
+    'EXCLUSIVE': 'reads and writes',
+    'ACCESS EXCLUSIVE': 'reads and writes',
+}
+LOCK_ORDER = list(LOCK_BLOCKS)
+BLOCKS_WRITES = {'SHARE', 'SHARE ROW EXCLUSIVE', 'EXCLUSIVE', 'ACCESS EXCLUSIVE'}
+
+LEADING_COMMENTS = re.compile(r'^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*', re.DOTALL)
+
+_NAME = r'(?:"[^"]+"|[\w$]+)'
+_TABLE = rf'(?P<table>{_NAME}(?:\s*\.\s*{_NAME})?)'
+_CONSTRAINT = rf'(?:CONSTRAINT\s+{_NAME}\s+)?'
+
+ALTER_TABLE = re.compile(
+    rf'^ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?{_TABLE}(?P<actions>.*)$',
+    re.IGNORECASE | re.DOTALL
+)
+
+# ALTER TABLE actions, most expensive first; the first one found classifies
+# the whole statement. Anything else only changes the catalog.
+ALTER_TABLE_ACTIONS = [
+    (r'\bALTER\s+(?:COLUMN\s+)?\S+\s+(?:SET\s+DATA\s+)?TYPE\b', 'rewrite', 'ACCESS EXCLUSIVE'),
+    # Constant defaults are stored in the catalog; volatile ones are computed per row
+    (r'\bADD\s+(?:COLUMN\s+)?(?:IF\s+NOT\s+EXISTS\s+)?\S+\s+[^,]*?'
+     r'(?:\b(?:big|small)?serial\b|\bGENERATED\s+ALWAYS\s+AS\s*\(|\bDEFAULT\s+[^,]*?'
+     r'\b(?:random|gen_random_uuid|uuid_generate_v[14]|clock_timestamp|nextval)\s*\()',
+     'rewrite', 'ACCESS EXCLUSIVE'),
+    (r'\bSET\s+(?:TABLESPACE|LOGGED|UNLOGGED)\b', 'rewrite', 'ACCESS EXCLUSIVE'),
+    (rf'\bADD\s+{_CONSTRAINT}FOREIGN\s+KEY\b[^,]*\bNOT\s+VALID\b', 'metadata', 'SHARE ROW EXCLUSIVE'),
+    (r'\bNOT\s+VALID\b', 'metadata', 'ACCESS EXCLUSIVE'),
+    (rf'\bADD\s+{_CONSTRAINT}(?:PRIMARY\s+KEY|UNIQUE|EXCLUDE)\b(?![^,]*\bUSING\s+INDEX\s)',
+     'index', 'ACCESS EXCLUSIVE'),
+    (rf'\bADD\s+{_CONSTRAINT}FOREIGN\s+KEY\b', 'scan', 'SHARE ROW EXCLUSIVE'),
+    (rf'\bADD\s+{_CONSTRAINT}CHECK\b', 'scan', 'ACCESS EXCLUSIVE'),
+    (r'\bSET\s+NOT\s+NULL\b', 'scan', 'ACCESS EXCLUSIVE'),
+    (r'\bVALIDATE\s+CONSTRAINT\b', 'scan', 'SHARE UPDATE EXCLUSIVE'),
+]
+
+# Other statements that touch an existing table: (pattern, kind, lock).
+STATEMENT_RULES = [
+    (rf'^CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:{_NAME}\s+)?'
+     rf'ON\s+(?:ONLY\s+)?{_TABLE}', 'index', 'SHARE UPDATE EXCLUSIVE'),
+    (rf'^CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:{_NAME}\s+)?'
+     rf'ON\s+(?:ONLY\s+)?{_TABLE}', 'index', 'SHARE'),
+    (rf'^REINDEX\s+(?:\([^)]*\)\s+)?TABLE\s+CONCURRENTLY\s+{_TABLE}', 'index', 'SHARE UPDATE EXCLUSIVE'),
+    (rf'^REINDEX\s+(?:\([^)]*\)\s+)?TABLE\s+{_TABLE}', 'index', 'SHARE'),
+    (rf'^VACUUM\s+(?:FULL|\([^)]*\bFULL\b[^)]*\))\s+(?:VERBOSE\s+)?{_TABLE}', 'rewrite', 'ACCESS EXCLUSIVE'),
+    (rf'^CLUSTER\s+(?:VERBOSE\s+)?{_TABLE}', 'rewrite', 'ACCESS EXCLUSIVE'),
+    (rf'^UPDATE\s+(?:ONLY\s+)?{_TABLE}', 'dml', 'ROW EXCLUSIVE'),
+    (rf'^DELETE\s+FROM\s+(?:ONLY\s+)?{_TABLE}', 'dml', 'ROW EXCLUSIVE'),
+    (rf'^INSERT\s+INTO\s+{_TABLE}', 'dml', 'ROW EXCLUSIVE'),
+    (rf'^COPY\s+{_TABLE}', 'dml', 'ROW EXCLUSIVE'),
+    (rf'^TRUNCATE\s+(?:TABLE\s+)?(?:ONLY\s+)?{_TABLE}', 'metadata', 'ACCESS EXCLUSIVE'),
+    (rf'^DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?{_TABLE}', 'metadata', 'ACCESS EXCLUSIVE'),
+    (rf'^LOCK\s+(?:TABLE\s+)?(?:ONLY\s+)?{_TABLE}', 'metadata', 'ACCESS EXCLUSIVE'),
+    (r'^(?:CREATE|COMMENT|GRANT|REVOKE|DROP|SET|RESET)\b', 'metadata', None),
+]
+STATEMENT_RULES = [(re.compile(pattern, re.IGNORECASE | re.DOTALL), kind, lock)
+                   for pattern, kind, lock in STATEMENT_RULES]
+ALTER_TABLE_ACTIONS = [(re.compile(pattern, re.IGNORECASE | re.DOTALL), kind, lock)
+                       for pattern, kind, lock in ALTER_TABLE_ACTIONS]
+
+POSTGRESQL_TABLE_SIZES = """
+SELECT name, c.reltuples::bigint, pg_total_relation_size(c.oid)
+FROM unnest(%s::text[]) AS name
+LEFT JOIN pg_class c ON c.oid = to_regclass(name);
+"""
+
+def classify_sql(statement: str) -> Dict[str, Any]:
+    """Classify a PostgreSQL statement by the work it does and the table lock it takes.
+
+    Returns ``kind`` (rewrite, index, scan, dml, metadata or other),
+    ``table`` (None when no existing table is involved), ``lock`` and
+    ``sized``, which tells whether the cost grows with the table's size.
+    """
+    text = LEADING_COMMENTS.sub('', statement, count=1)
+    match = ALTER_TABLE.match(text)
+    if match:
+        for pattern, kind, lock in ALTER_TABLE_ACTIONS:
+            if pattern.search(match.group('actions')):
+                break
+        else:
+            kind, lock = 'metadata', 'ACCESS EXCLUSIVE'
+        return {'kind': kind, 'table': match.group('table'), 'lock': lock, 'sized': kind != 'metadata'}
+
+    for pattern, kind, lock in STATEMENT_RULES:
+        match = pattern.match(text)
+        if match:
+            table = match.groupdict().get('table')
+            # A load's cost depends on its source, not the size of its target
+            sized = kind != 'metadata' and not re.match(r'(?:INSERT|COPY)\b', text, re.IGNORECASE)
+            return {'kind': kind, 'table': table, 'lock': lock, 'sized': sized}
+    return {'kind': 'other', 'table': None, 'lock': None, 'sized': False}
+
+def classify_mongo(operation: Tuple[str, str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Classify a compiled MongoDB operation like ``classify_sql``."""
+    op_type, collection, args = operation
+    if op_type in ('create_index', 'create_indexes'):
+        # Index builds hold the exclusive collection lock only at their start and end
+        return {'kind': 'index', 'table': collection, 'lock': 'INTENT EXCLUSIVE', 'sized': True}
+    if op_type in ('update_many', 'delete_many'):
+        return {'kind': 'dml', 'table': collection, 'lock': 'INTENT EXCLUSIVE', 'sized': True}
+    if op_type == 'aggregate':
+        writes = any('$out' in stage or '$merge' in stage for stage in args['pipeline'])
+        return {'kind': 'rewrite' if writes else 'scan', 'table': collection,
+                'lock': 'INTENT EXCLUSIVE' if writes else None, 'sized': True}
+    if op_type in ('find', 'count_documents'):
+        return {'kind': 'scan', 'table': collection, 'lock': None, 'sized': True}
+    if op_type in ('drop', 'rename', 'drop_index', 'drop_indexes'):
+        return {'kind': 'metadata', 'table': collection, 'lock': 'EXCLUSIVE', 'sized': False}
+    return {'kind': 'dml', 'table': collection, 'lock': 'INTENT EXCLUSIVE', 'sized': False}
+
+def table_sizes(connector: BaseConnector,
+                tables: Iterable[str]) -> Dict[str, Optional[Tuple[int, int]]]:
+    """Look up ``(rows, bytes)`` for tables or collections; None for ones that don't exist yet.
+
+    PostgreSQL row counts are the planner's estimate from ``pg_class``, so
+    they are only as fresh as the last ANALYZE. SQLite tables are counted
+    exactly; their size needs the ``dbstat`` table and is 0 without it.
+    """
+    tables = sorted(set(tables))
+    if not tables:
+        return {}
+    if connector.dialect == 'postgresql':
+        return {
+            # Never analyzed tables report -1 rows
+            name: None if rows is None else (max(rows, 0), size)
+            for name, rows, size in connector.execute(POSTGRESQL_TABLE_SIZES, (tables,)).fetchall()
+        }
+    elif connector.dialect == 'mongodb':
+        from pymongo.errors import OperationFailure
+        sizes = {}
+        for name in tables:
+            try:
+                stats = connector.db.command('collStats', name)
+                sizes[name] = (stats.get('count', 0), stats.get('size', 0))
+            except OperationFailure:
+                sizes[name] = None
+        return sizes
+    elif connector.dialect == 'sqlite':
+        sizes = {}
+        for name in tables:
+            # Schema prefixes and quotes of the PostgreSQL-style name
+            bare = name.split('.')[-1].strip('"')
+            if connector.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s;",
+                                 (bare,)).fetchone() is None:
+                sizes[name] = None
+                continue
+            quoted = '"' + bare.replace('"', '""') + '"'
+            rows = connector.execute(f"SELECT count(*) FROM {quoted};").fetchone()[0]
+            try:
+                size = connector.execute("SELECT sum(pgsize) FROM dbstat WHERE name = %s;",
+                                         (bare,)).fetchone()[0] or 0
+            except Exception:
+                size = 0
+            sizes[name] = (rows, size)
+        return sizes
+    raise ValueError(f"No table sizes for database type: {connector.dialect}")
+
+def historical_rows_per_second(stats: List[Dict[str, Any]]) -> Optional[float]:
+    """Overall throughput of successful applies in ``query_stats`` rows, if any was measured."""
+    for row in stats:
+        if row['kind'] == 'apply' and row['outcome'] == 'success' and row['rows_per_second'] > 0:
+            return row['rows_per_second']
+    return None
+
+def assess(statements: List[Dict[str, Any]], transactional: bool) -> Dict[str, Any]:
+    """Sum up the estimated runtime and lock footprint of a migration's statements.
+
+    Inside a transaction every lock is held until commit, so each one lasts
+    as long as the whole migration. Locks on tables the migration creates
+    block nobody and are left out.
+    """
+    total = sum(entry['seconds'] for entry in statements)
+    locks = {}
+    for entry in statements:
+        if entry['table'] is None or entry['lock'] is None or entry['new_table']:
+            continue
+        held = total if transactional else entry['seconds']
+        current = locks.get(entry['table'])
+        if current is None:
+            locks[entry['table']] = {'table': entry['table'], 'lock': entry['lock'], 'seconds': held}
+            continue
+        if LOCK_ORDER.index(entry['lock']) > LOCK_ORDER.index(current['lock']):
+            current['lock'] = entry['lock']
+        current['seconds'] = max(current['seconds'], held)
+    for lock in locks.values():
+        lock['blocks'] = LOCK_BLOCKS[lock['lock']]
+
+    blocking = [lock for lock in locks.values() if lock['lock'] in BLOCKS_WRITES]
+    if any(lock['seconds'] >= LONG_LOCK_SECONDS for lock in blocking) or \
+            any(entry['kind'] == 'rewrite' and entry['rows'] for entry in statements):
+        risk = 'high'
+    elif blocking or total >= LONG_LOCK_SECONDS:
+        risk = 'medium'
+    else:
+        risk = 'low'
+    return {'estimated_seconds': total, 'locks': sorted(locks.values(), key=lambda l: l['table']),
+            'risk': risk}
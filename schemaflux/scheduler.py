@@ -0,0 +1,85 @@
+import heapq
+import re
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Set
+
+def build_dependency_graph(pending: List[str], headers: Dict[str, Dict[str, str]],
+                           applied: Set[str]) -> Dict[str, Set[str]]:
+    """Map each pending migration file to the pending files it must wait for.
+
+    A migration declaring ``DEPENDS: <version>[, <version>...]`` waits only for
+    those versions. A migration without the header keeps strict filename
+    ordering and waits for everything before it.
+    """
+    by_version = {filename.split('_')[0]: filename for filename in pending}
+    graph = {}
+    seen = set()
+    # Earlier migrations nothing depends on yet; waiting for these covers
+    # every earlier migration transitively.
+    sinks = set()
+
+    for filename in pending:
+        declared = headers.get(filename, {}).get('DEPENDS')
+        if declared is None:
+            deps = set(sinks)
+        else:
+            deps = set()
+            for version in re.split(r'[\s,]+', declared.strip()):
+                if not version:
+                    continue
+                if version in by_version:
+                    if by_version[version] not in seen:
+                        raise ValueError(f"{filename} depends on later migration {version}")
+                    deps.add(by_version[version])
+                elif version not in applied:
+                    raise ValueError(f"{filename} depends on unknown migration {version}")
+
+        graph[filename] = deps
+        sinks -= deps
+        sinks.add(filename)
+        seen.add(filename)
+    return graph
+
+def run_in_dependency_order(graph: Dict[str, Set[str]], run: Callable[[str], Any],
+                            jobs: int) -> List[Any]:
+    """Call ``run`` for every item once its dependencies finished, ``jobs`` at a time.
+
+    Ready items start in sorted order. After a failure no new items start and
+    the first error is raised once the running items have finished. Returns
+    the results in completion order.
+    """
+    dependents = {item: [] for item in graph}
+    remaining = {}
+    for item, deps in graph.items():
+        remaining[item] = len(deps)
+        for dep in deps:
+            dependents[dep].append(item)
+
+    ready = [item for item, count in remaining.items() if count == 0]
+    heapq.heapify(ready)
+    results = []
+    error = None
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+        while running or (ready and error is None):
+            while ready and error is None and len(running) < jobs:
+                item = heapq.heappop(ready)
+                running[pool.submit(run, item)] = item
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                item = running.pop(future)
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    error = error or e
+                    continue
+                for dependent in dependents[item]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        heapq.heappush(ready, dependent)
+
+    if error:
+        raise error
+    return results
@@ -1,5 +1,10 @@
 import os
 import re
+from datetime import datetime, timedelta
+
+SINCE_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'min': 60}
 
 def validate_migration_name(name):
     """Validate migration name format."""
@@ -12,6 +17,25 @@ def ensure_migrations_dir(directory):
         os.makedirs(directory)
     return directory
 
+def parse_since(value, now=None):
+    """Parse a relative window such as ``7d``/``12h``/``30m``/``2w`` or an ISO date."""
+    match = re.fullmatch(r'(\d+)([mhdw])', value.strip().lower())
+    if match:
+        amount, unit = match.groups()
+        return (now or datetime.now()) - timedelta(**{SINCE_UNITS[unit]: int(amount)})
+    try:
+        return datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"Invalid time window: {value} (use e.g. 7d, 12h, 30m or 2024-11-05)")
+
+def parse_duration(value):
+    """Parse a duration such as ``500ms``/``2s``/``1min`` (bare numbers are seconds) into seconds."""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*(ms|s|min)?', str(value).strip().lower())
+    if not match:
+        raise ValueError(f"Invalid duration: {value} (use e.g. 500ms, 2s or 1min)")
+    amount, unit = match.groups()
+    return float(amount) * DURATION_UNITS[unit or 's']
+
 def parse_sql_file(content):
     """Parse SQL file content and extract migrations."""
     up_pattern = r'-- UP\n(.*?)(?=-- DOWN|$)'
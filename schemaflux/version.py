@@ -1,7 +1,137 @@
-from typing import List, Tuple
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from .connectors.base import BaseConnector
-from .connectors.postgresql import PostgreSQLConnector
-from .connectors.mongodb import MongoDBConnector
+
+# Stored as the table comment, so startup costs one catalog lookup instead
+# of DDL. Bump it and extend POSTGRESQL_HISTORY_UPGRADE when the schema changes.
+POSTGRESQL_HISTORY_VERSION = 'schemaflux migration_history v3'
+
+POSTGRESQL_HISTORY_STATE = """
+SELECT obj_description(to_regclass('migration_history'), 'pg_class');
+"""
+
+# Brings a missing or older table up to date: version 1 had no constraints
+# and one row per attempt, version 2 no checksums. Every statement is safe to rerun, and the table lock makes
+# concurrent upgrades wait for each other.
+POSTGRESQL_HISTORY_UPGRADE = [
+    """
+    CREATE TABLE IF NOT EXISTS migration_history (
+        id SERIAL PRIMARY KEY,
+        version VARCHAR(255) NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        success BOOLEAN DEFAULT TRUE
+    );
+    """,
+    "LOCK TABLE migration_history IN SHARE ROW EXCLUSIVE MODE;",
+    # Keep one row per version: the latest successful one, else the latest failure
+    """
+    DELETE FROM migration_history h USING migration_history newer
+    WHERE h.version = newer.version
+      AND (COALESCE(newer.success, FALSE), newer.id) > (COALESCE(h.success, FALSE), h.id);
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS migration_history_version_key ON migration_history (version);",
+    "ALTER TABLE migration_history ADD COLUMN IF NOT EXISTS checksum VARCHAR(64);",
+    # Byte-order collation so MAX(version) agrees with the sorted file listing
+    """
+    CREATE INDEX IF NOT EXISTS migration_history_applied
+    ON migration_history (version COLLATE "C") WHERE success;
+    """,
+    f"COMMENT ON TABLE migration_history IS '{POSTGRESQL_HISTORY_VERSION}';",
+]
+
+POSTGRESQL_LAST_APPLIED = """
+SELECT version, name FROM migration_history WHERE success
+ORDER BY version COLLATE "C" DESC LIMIT 1;
+"""
+
+# SQLite (see SQLiteConnector) keeps the same table and runs the PostgreSQL
+# history queries through its dialect shim; only set-based statements differ.
+SQL_DIALECTS = ('postgresql', 'sqlite')
+
+SQLITE_HISTORY_TABLE = [
+    """
+    CREATE TABLE IF NOT EXISTS migration_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        version VARCHAR(255) NOT NULL UNIQUE,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        success BOOLEAN DEFAULT TRUE,
+        checksum VARCHAR(64)
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS migration_history_applied ON migration_history (version) WHERE success;",
+]
+
+# Shared with AsyncVersionControl so both engines track history the same way.
+MONGODB_APPLIED_QUERY = ('find', 'migration_history', {'filter': {'success': True}, 'sort': [('version', 1)]})
+
+MONGODB_LAST_APPLIED = ('find', 'migration_history', {
+    'filter': {'success': True}, 'sort': [('version', -1)], 'limit': 1
+})
+
+# MongoDB has no collection comments, so the history version lives in a
+# document of its own. Bump it and extend mongodb_history_upgrade when the
+# collection changes.
+MONGODB_HISTORY_VERSION = 'schemaflux migration_history v2'
+
+MONGODB_HISTORY_STATE = ('find', 'migration_meta', {'filter': {'_id': 'migration_history'}, 'limit': 1})
+
+# Versions with more than one document, as left by version 1's per-attempt
+# inserts. Each group keeps the latest successful document, else the latest
+# failure, like the PostgreSQL upgrade does.
+MONGODB_HISTORY_DUPLICATES = ('aggregate', 'migration_history', {'pipeline': [
+    {'$sort': {'version': 1, 'success': -1, '_id': -1}},
+    {'$group': {'_id': '$version', 'keep': {'$first': '$_id'}, 'ids': {'$push': '$_id'}}},
+    {'$match': {'ids.1': {'$exists': True}}},
+]})
+
+def mongodb_history_upgrade(duplicates: Iterable[dict]) -> List[tuple]:
+    """Operations bringing the history collection up to date, given ``MONGODB_HISTORY_DUPLICATES``.
+
+    Every operation is safe to rerun. An upgrade that races a concurrent
+    one fails on the unique index and succeeds when run again.
+    """
+    extra = [id_ for group in duplicates for id_ in group['ids'] if id_ != group['keep']]
+    operations = []
+    if extra:
+        operations.append(('delete_many', 'migration_history', {'filter': {'_id': {'$in': extra}}}))
+    return operations + [
+        ('create_index', 'migration_history', {'keys': [('version', 1)], 'unique': True,
+                                               'name': 'migration_history_version_key'}),
+        ('create_index', 'migration_history', {'keys': [('success', 1), ('version', 1)]}),
+        ('update_one', 'migration_meta', {'filter': {'_id': 'migration_history'},
+                                          'update': {'$set': {'version': MONGODB_HISTORY_VERSION}},
+                                          'upsert': True}),
+    ]
+
+def mongodb_history_document(version: str, name: str, success: bool,
+                             checksum: Optional[str] = None) -> dict:
+    """Build the ``migration_history`` document recording one migration run."""
+    return {'version': version, 'name': name, 'success': success, 'applied_at': datetime.now(),
+            'checksum': checksum}
+
+def mongodb_record_operation(version: str, name: str, success: bool,
+                             checksum: Optional[str] = None) -> tuple:
+    """Upsert the history document for a version, so retries don't add rows."""
+    return ('update_one', 'migration_history', {
+        'filter': {'version': version},
+        'update': {'$set': mongodb_history_document(version, name, success, checksum)},
+        'upsert': True
+    })
+
+def split_at_high_water_mark(versions: Iterable[str],
+                             high_water_mark: Optional[str]) -> Tuple[Set[str], List[str]]:
+    """Split versions into those above the last applied one, which are pending,
+    and those at or below it, which need a history lookup."""
+    above, below = set(), []
+    for version in versions:
+        if high_water_mark is None or version > high_water_mark:
+            above.add(version)
+        else:
+            below.append(version)
+    return above, below
 
 class VersionControl:
     def __init__(self, connector: BaseConnector):
@@ -10,62 +140,162 @@ class VersionControl:
 
     def _init_version_table(self):
         """Initialize version control table/collection."""
-        if isinstance(self.connector, PostgreSQLConnector):
+        if self.connector.dialect == 'postgresql':
             self._init_postgresql_version()
-        elif isinstance(self.connector, MongoDBConnector):
+        elif self.connector.dialect == 'mongodb':
             self._init_mongodb_version()
+        elif self.connector.dialect == 'sqlite':
+            self.connector.execute_batch([(statement, None) for statement in SQLITE_HISTORY_TABLE])
 
     def _init_postgresql_version(self):
-        """Initialize PostgreSQL version table."""
-        sql = """
-        CREATE TABLE IF NOT EXISTS migration_history (
-            id SERIAL PRIMARY KEY,
-            version VARCHAR(255) NOT NULL,
-            name VARCHAR(255) NOT NULL,
-            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            success BOOLEAN DEFAULT TRUE
-        );
-        """
-        self.connector.execute(sql)
+        """Create or upgrade the PostgreSQL history table if it is not current."""
+        if self.connector.execute(POSTGRESQL_HISTORY_STATE).fetchone()[0] == POSTGRESQL_HISTORY_VERSION:
+            return
+        with self.connector.transaction():
+            self.connector.execute_batch([(statement, None) for statement in POSTGRESQL_HISTORY_UPGRADE])
 
     def _init_mongodb_version(self):
-        """Initialize MongoDB version collection."""
-        op = "create_collection:migration_history:{'validator': {'$jsonSchema': {'bsonType': 'object','required': ['version', 'name', 'applied_at', 'success']}}}"
-        try:
-            self.connector.execute(op)
-        except Exception:
-            # Collection might already exist
-            pass
+        """Deduplicate and index the MongoDB history collection if it is not current."""
+        for state in self.connector.execute(MONGODB_HISTORY_STATE):
+            if state.get('version') == MONGODB_HISTORY_VERSION:
+                return
+        duplicates = self.connector.execute(MONGODB_HISTORY_DUPLICATES)
+        for operation in mongodb_history_upgrade(duplicates):
+            self.connector.execute(operation)
 
     def get_applied_migrations(self) -> List[Tuple[str, str]]:
         """Get list of applied migrations."""
-        if isinstance(self.connector, PostgreSQLConnector):
+        if self.connector.dialect in SQL_DIALECTS:
             sql = "SELECT version, name FROM migration_history WHERE success = TRUE ORDER BY version;"
             return [row for row in self.connector.execute(sql)]
-        elif isinstance(self.connector, MongoDBConnector):
-            op = "find:migration_history:{'filter': {'success': True}, 'sort': [('version', 1)]}"
-            result = self.connector.execute(op)
+        elif self.connector.dialect == 'mongodb':
+            result = self.connector.execute(MONGODB_APPLIED_QUERY)
             return [(doc['version'], doc['name']) for doc in result]
 
-    def record_migration(self, version: str, name: str, success: bool = True):
-        """Record a migration execution."""
-        if isinstance(self.connector, PostgreSQLConnector):
+    def get_last_applied(self) -> Optional[Tuple[str, str]]:
+        """Get the (version, name) of the newest applied migration, or None."""
+        if self.connector.dialect in SQL_DIALECTS:
+            return self.connector.execute(POSTGRESQL_LAST_APPLIED).fetchone()
+        elif self.connector.dialect == 'mongodb':
+            for doc in self.connector.execute(MONGODB_LAST_APPLIED):
+                return doc['version'], doc['name']
+            return None
+
+    def get_latest_applied(self, limit: Optional[int] = None,
+                           after: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Get applied migrations newest first: at most ``limit``, and only versions above ``after``."""
+        if self.connector.dialect in SQL_DIALECTS:
+            sql = "SELECT version, name FROM migration_history WHERE success"
+            params = []
+            if after is not None:
+                sql += ' AND version COLLATE "C" > %s'
+                params.append(after)
+            sql += ' ORDER BY version COLLATE "C" DESC'
+            if limit is not None:
+                sql += " LIMIT %s"
+                params.append(limit)
+            return [tuple(row) for row in self.connector.execute(sql + ";", tuple(params) or None)]
+        elif self.connector.dialect == 'mongodb':
+            query = {'filter': {'success': True}, 'sort': [('version', -1)]}
+            if after is not None:
+                query['filter']['version'] = {'$gt': after}
+            if limit is not None:
+                query['limit'] = limit
+            return [(doc['version'], doc['name']) for doc in self.connector.execute(('find', 'migration_history', query))]
+
+    def get_pending_versions(self, versions: Iterable[str]) -> Set[str]:
+        """Return the versions among ``versions`` that have not been applied.
+
+        Versions above the high-water mark (the newest applied version) are
+        pending without reading history. The rest are checked in a single
+        indexed query, which only finds migrations merged out of order.
+        """
+        last = self.get_last_applied()
+        pending, below = split_at_high_water_mark(versions, last[0] if last else None)
+        if not below:
+            return pending
+        if self.connector.dialect == 'postgresql':
+            sql = """
+            SELECT v FROM unnest(%s::varchar[]) AS v
+            WHERE NOT EXISTS (SELECT 1 FROM migration_history h WHERE h.version = v AND h.success);
+            """
+            pending.update(row[0] for row in self.connector.execute(sql, (below,)))
+        elif self.connector.dialect == 'sqlite':
             sql = """
-            INSERT INTO migration_history (version, name, success)
-            VALUES (%s, %s, %s);
+            SELECT value FROM json_each(?) AS v
+            WHERE NOT EXISTS (SELECT 1 FROM migration_history h WHERE h.version = v.value AND h.success);
             """
-            self.connector.execute(sql, (version, name, success))
-        elif isinstance(self.connector, MongoDBConnector):
-            op = "insert_one:migration_history:{'document': {'version': '%s', 'name': '%s', 'success': %s, 'applied_at': {'$date': '%s'}}}" % (
-                version, name, str(success).lower(), datetime.now().isoformat()
-            )
-            self.connector.execute(op)
+            pending.update(row[0] for row in self.connector.execute(sql, (json.dumps(below),)))
+        elif self.connector.dialect == 'mongodb':
+            applied = self.connector.execute(('find', 'migration_history', {
+                'filter': {'version': {'$in': below}, 'success': True}, 'projection': {'version': 1}
+            }))
+            pending.update(set(below) - {doc['version'] for doc in applied})
+        return pending
+
+    def record_migration(self, version: str, name: str, success: bool = True,
+                         checksum: Optional[str] = None):
+        """Record a migration execution, with the SHA-256 of the file that ran."""
+        if self.connector.dialect in SQL_DIALECTS:
+            sql = """
+            INSERT INTO migration_history (version, name, success, checksum)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (version) DO UPDATE
+            SET name = EXCLUDED.name, success = EXCLUDED.success, checksum = EXCLUDED.checksum,
+                applied_at = CURRENT_TIMESTAMP;
+            """
+            self.connector.execute(sql, (version, name, success, checksum))
+        elif self.connector.dialect == 'mongodb':
+            self.connector.execute(mongodb_record_operation(version, name, success, checksum))
+
+    def record_migrations(self, names: List[str], checksums: Optional[List[Optional[str]]] = None):
+        """Record many migration files as applied at once, e.g. those a baseline squashed."""
+        versions = [name.split('_')[0] for name in names]
+        checksums = checksums or [None] * len(names)
+        if self.connector.dialect == 'postgresql':
+            sql = """
+            INSERT INTO migration_history (version, name, success, checksum)
+            SELECT version, name, TRUE, checksum
+            FROM unnest(%s::varchar[], %s::varchar[], %s::varchar[]) AS squashed(version, name, checksum)
+            ON CONFLICT (version) DO UPDATE
+            SET name = EXCLUDED.name, success = TRUE, checksum = EXCLUDED.checksum,
+                applied_at = CURRENT_TIMESTAMP;
+            """
+            self.connector.execute(sql, (versions, names, checksums))
+        elif self.connector.dialect == 'sqlite':
+            for version, name, checksum in zip(versions, names, checksums):
+                self.record_migration(version, name, checksum=checksum)
+        elif self.connector.dialect == 'mongodb':
+            self.connector.execute_batch([
+                (mongodb_record_operation(version, name, True, checksum), None)
+                for version, name, checksum in zip(versions, names, checksums)
+            ])
+
+    def get_checksums(self) -> Dict[str, Tuple[str, Optional[str]]]:
+        """Map every applied version to its file name and recorded checksum, in one query."""
+        if self.connector.dialect in SQL_DIALECTS:
+            sql = "SELECT version, name, checksum FROM migration_history WHERE success;"
+            return {version: (name, checksum) for version, name, checksum in self.connector.execute(sql)}
+        elif self.connector.dialect == 'mongodb':
+            result = self.connector.execute(('find', 'migration_history', {
+                'filter': {'success': True}, 'projection': {'version': 1, 'name': 1, 'checksum': 1}
+            }))
+            return {doc['version']: (doc['name'], doc.get('checksum')) for doc in result}
 
     def remove_migration(self, version: str):
         """Remove a migration record during rollback."""
-        if isinstance(self.connector, PostgreSQLConnector):
+        if self.connector.dialect in SQL_DIALECTS:
             sql = "DELETE FROM migration_history WHERE version = %s;"
             self.connector.execute(sql, (version,))
-        elif isinstance(self.connector, MongoDBConnector):
-            op = "delete_many:migration_history:{'filter': {'version': '%s'}}" % version
-            self.connector.execute(op)
+        elif self.connector.dialect == 'mongodb':
+            self.connector.execute(('delete_many', 'migration_history', {'filter': {'version': version}}))
+
+    def remove_migrations(self, versions: List[str]):
+        """Remove the records of several rolled back migrations in one statement."""
+        if self.connector.dialect == 'postgresql':
+            self.connector.execute("DELETE FROM migration_history WHERE version = ANY(%s);", (versions,))
+        elif self.connector.dialect == 'sqlite':
+            self.connector.execute("DELETE FROM migration_history WHERE version IN (SELECT value FROM json_each(?));",
+                                   (json.dumps(versions),))
+        elif self.connector.dialect == 'mongodb':
+            self.connector.execute(('delete_many', 'migration_history', {'filter': {'version': {'$in': versions}}}))
@@ -0,0 +1,38 @@
+import json
+
+from schemaflux.analytics import MigrationAnalytics
+
+ENTRY = {'timestamp': '2024-01-01T00:00:00', 'migration_file': '20240101000000_users.sql',
+         'duration_seconds': 0.5, 'success': True}
+
+
+def trace_statements(monkeypatch):
+    statements = []
+    connect = MigrationAnalytics._connect
+
+    def traced(self):
+        conn = connect(self)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(MigrationAnalytics, '_connect', traced)
+    return statements
+
+
+def test_legacy_logs_are_imported_once(tmp_path):
+    (tmp_path / 'migration_log_20240101.json').write_text(json.dumps([ENTRY, ENTRY]))
+    analytics = MigrationAnalytics(log_dir=str(tmp_path))
+    assert analytics.import_json_logs() == 0
+    assert MigrationAnalytics(log_dir=str(tmp_path)).get_migration_stats()['total_migrations'] == 2
+
+
+def test_imported_logs_are_not_locked_again(tmp_path, monkeypatch):
+    (tmp_path / 'migration_log_20240101.json').write_text(json.dumps([ENTRY]))
+    MigrationAnalytics(log_dir=str(tmp_path))
+    statements = trace_statements(monkeypatch)
+    MigrationAnalytics(log_dir=str(tmp_path))
+    assert 'BEGIN IMMEDIATE' not in statements
+
+    (tmp_path / 'migration_log_20240102.json').write_text(json.dumps([ENTRY]))
+    assert MigrationAnalytics(log_dir=str(tmp_path)).get_migration_stats()['total_migrations'] == 2
+    assert statements.count('BEGIN IMMEDIATE') == 1
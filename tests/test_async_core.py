@@ -0,0 +1,255 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from schemaflux.async_core import AsyncMigrationManager
+from schemaflux.async_version import AsyncVersionControl
+from schemaflux.connectors.async_base import AsyncBaseConnector
+from schemaflux.connectors.async_mongodb import AsyncMongoDBConnector
+from schemaflux.version import POSTGRESQL_HISTORY_VERSION
+
+MIGRATIONS = {
+    '20240101000000_users.sql': "-- UP\nCREATE TABLE users (id int);\n\n-- DOWN\nDROP TABLE users;\n",
+    '20240102000000_index.sql': "-- UP\nCREATE INDEX CONCURRENTLY users_id ON users (id);\n\n"
+                                "-- DOWN\nDROP INDEX CONCURRENTLY users_id;\n",
+}
+
+
+class FakeAsyncPostgres(AsyncBaseConnector):
+    """Keeps migration_history in a dict and records every other statement.
+
+    Statements and history changes made inside ``transaction()`` are undone
+    when it fails, like a real transaction.
+    """
+
+    dialect = 'postgresql'
+
+    def __init__(self, fail_on=None):
+        super().__init__()
+        self.history = {}
+        self.statements = []
+        self.fail_on = fail_on
+        self.in_transaction = []
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def fetch(self, sql, params=()):
+        if 'obj_description' in sql:
+            return [(POSTGRESQL_HISTORY_VERSION,)]
+        applied = sorted(v for v, (_, success, _) in self.history.items() if success)
+        if 'LIMIT 1' in sql:
+            return [{'version': applied[-1], 'name': self.history[applied[-1]][0]}] if applied else []
+        if 'unnest' in sql:
+            return [(version,) for version in params[0] if version not in applied]
+        raise AssertionError(f"Unexpected query: {sql}")
+
+    async def execute(self, sql, params=None):
+        if sql.lstrip().startswith('INSERT INTO migration_history'):
+            version, name, success, checksum = params
+            self.history[version] = (name, success, checksum)
+        elif sql.startswith('DELETE FROM migration_history'):
+            self.history.pop(params[0])
+        elif 'advisory' in sql:
+            self.statements.append(sql.split('(')[0].split()[-1])
+        else:
+            if self.fail_on and self.fail_on in sql:
+                raise Exception(f"Query execution failed: {self.fail_on}")
+            self.statements.append(sql)
+        return 'OK'
+
+    async def execute_batch(self, operations):
+        for operation, params in operations:
+            await self.execute(operation, params)
+
+    def can_run_in_transaction(self, operation):
+        return 'CONCURRENTLY' not in operation
+
+    @asynccontextmanager
+    async def transaction(self):
+        history, statements = dict(self.history), list(self.statements)
+        self.in_transaction.append(True)
+        try:
+            yield
+        except BaseException:
+            self.history, self.statements = history, statements
+            raise
+        finally:
+            self.in_transaction.pop()
+
+
+def make_manager(tmp_path, connector, migrations=MIGRATIONS, **options):
+    directory = tmp_path / 'migrations'
+    directory.mkdir(exist_ok=True)
+    for name, content in migrations.items():
+        (directory / name).write_text(content)
+    manager = AsyncMigrationManager(migrations_dir=str(directory), cache_dir=None,
+                                    log_dir=str(tmp_path / 'logs'), **options)
+    manager.connector = connector
+    manager.version_control = AsyncVersionControl(connector)
+    asyncio.run(manager.version_control.init())
+    return manager
+
+
+def test_apply_runs_pending_migrations_under_the_lock(tmp_path):
+    connector = FakeAsyncPostgres()
+    manager = make_manager(tmp_path, connector)
+
+    entries = asyncio.run(manager.apply_migrations())
+
+    assert [entry['migration_file'] for entry in entries] == list(MIGRATIONS)
+    assert all(entry['success'] for entry in entries)
+    assert connector.statements == [
+        'pg_advisory_lock', 'CREATE TABLE users (id int)',
+        'CREATE INDEX CONCURRENTLY users_id ON users (id)', 'pg_advisory_unlock',
+    ]
+    assert {version: success for version, (_, success, _) in connector.history.items()} == {
+        '20240101000000': True, '20240102000000': True
+    }
+    assert all(checksum for _, _, checksum in connector.history.values())
+    assert asyncio.run(manager.apply_migrations()) == []
+    assert [item['applied'] for item in asyncio.run(manager.show_status())] == [True, True]
+
+
+def test_failed_migration_is_rolled_back_and_recorded(tmp_path):
+    connector = FakeAsyncPostgres(fail_on='CREATE TABLE posts')
+    manager = make_manager(tmp_path, connector, {
+        '20240101000000_posts.sql': "-- UP\nCREATE TABLE tags (id int);\nCREATE TABLE posts (id int);\n\n-- DOWN\n",
+    }, migration_lock='off')
+
+    with pytest.raises(Exception, match='Failed to apply migration 20240101000000_posts.sql'):
+        asyncio.run(manager.apply_migrations())
+
+    assert connector.statements == []
+    assert connector.history == {'20240101000000': ('20240101000000_posts.sql', False, None)}
+    [stats] = manager.analytics.query_stats()
+    assert (stats['kind'], stats['outcome']) == ('apply', 'failure')
+
+
+def test_rollback_undoes_the_newest_migration_only(tmp_path):
+    connector = FakeAsyncPostgres()
+    manager = make_manager(tmp_path, connector, migration_lock='off')
+    asyncio.run(manager.apply_migrations())
+    del connector.statements[:]
+
+    asyncio.run(manager.rollback_migration())
+    assert connector.statements == ['DROP INDEX CONCURRENTLY users_id']
+    assert list(connector.history) == ['20240101000000']
+
+    asyncio.run(manager.rollback_migration())
+    asyncio.run(manager.rollback_migration())
+    assert connector.history == {}
+    assert connector.statements[1:] == ['DROP TABLE users']
+
+
+def test_rollback_without_down_block_fails(tmp_path):
+    connector = FakeAsyncPostgres()
+    manager = make_manager(tmp_path, connector, {
+        '20240101000000_seed.sql': "-- UP\nINSERT INTO settings VALUES (1);\n",
+    }, migration_lock='off')
+    asyncio.run(manager.apply_migrations())
+
+    with pytest.raises(Exception, match='No down migration specified'):
+        asyncio.run(manager.rollback_migration())
+    assert '20240101000000' in connector.history
+
+
+def test_backfill_needs_the_sync_manager(tmp_path):
+    manager = make_manager(tmp_path, FakeAsyncPostgres(), {
+        '20240101000000_fill.sql': "-- TYPE: backfill\n-- TABLE: users\n-- UP\n"
+                                   "UPDATE users SET x = 1 WHERE id >= %(start)s AND id < %(end)s;\n",
+    }, migration_lock='off')
+    with pytest.raises(Exception, match='not supported by the async engine'):
+        asyncio.run(manager.apply_migrations())
+
+
+class FakeMotorCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length=None):
+        return self.documents
+
+
+class FakeMotorCollection:
+    """Enough of motor's collection API for the history and simple writes."""
+
+    def __init__(self, name, database):
+        self.name = name
+        self.database = database
+        self.documents = []
+
+    def find(self, filter=None, sort=None, limit=0, projection=None):
+        def matches(document):
+            for key, condition in (filter or {}).items():
+                value = document.get(key)
+                if isinstance(condition, dict):
+                    if '$in' in condition and value not in condition['$in']:
+                        return False
+                    if '$gt' in condition and not value > condition['$gt']:
+                        return False
+                elif value != condition:
+                    return False
+            return True
+
+        documents = [document for document in self.documents if matches(document)]
+        for key, direction in reversed(sort or []):
+            documents.sort(key=lambda document: document[key], reverse=direction < 0)
+        return FakeMotorCursor(documents[:limit] if limit else documents)
+
+    def aggregate(self, pipeline):
+        return FakeMotorCursor([])
+
+    async def update_one(self, filter, update, upsert=False):
+        for document in self.documents:
+            if all(document.get(key) == value for key, value in filter.items()):
+                document.update(update['$set'])
+                return None
+        self.documents.append({**filter, **update['$set']})
+
+    async def delete_many(self, filter):
+        self.documents = [d for d in self.documents if d.get('version') != filter['version']]
+
+    async def bulk_write(self, requests, ordered):
+        self.database.calls.append(('bulk_write', self.name, len(requests)))
+
+    def __getattr__(self, method):
+        async def call(**arguments):
+            self.database.calls.append((method, self.name, arguments))
+        return call
+
+
+class FakeMotorDatabase:
+    def __init__(self):
+        self.calls = []
+        self.collections = {}
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeMotorCollection(name, self)
+        return self.collections[name]
+
+
+def test_mongodb_apply_and_rollback(tmp_path):
+    connector = AsyncMongoDBConnector()
+    connector.db = FakeMotorDatabase()
+    manager = make_manager(tmp_path, connector, {
+        '20240101000000_users.js': "// UP\ninsert_one:users:{'document': {'name': 'ada'}}\n"
+                                   "create_index:users:{'keys': [('name', 1)]}\n// DOWN\ndrop:users:{}\n",
+    }, db_type='mongodb', migration_lock='off')
+    history = connector.db['migration_history']
+
+    [entry] = asyncio.run(manager.apply_migrations())
+    assert entry['success']
+    assert [call[:2] for call in connector.db.calls if call[1] == 'users'] == [
+        ('bulk_write', 'users'), ('create_index', 'users')
+    ]
+    assert [(d['version'], d['success']) for d in history.documents] == [('20240101000000', True)]
+
+    asyncio.run(manager.rollback_migration())
+    assert connector.db.calls[-1][:2] == ('drop', 'users')
+    assert history.documents == []
@@ -0,0 +1,153 @@
+from contextlib import contextmanager
+
+import pytest
+
+from schemaflux import backfill as backfill_module
+from schemaflux.backfill import BackfillRunner
+from schemaflux.connectors.base import BaseConnector
+
+STATEMENT = "UPDATE users SET email_lower = lower(email) WHERE id >= %(start)s AND id < %(end)s"
+
+
+class Result:
+    def __init__(self, row=None, rowcount=-1):
+        self.row = row
+        self.rowcount = rowcount
+
+    def fetchone(self):
+        return self.row
+
+
+class FakeBackfillConnector(BaseConnector):
+    """A table of integer keys plus the progress table, with commit-or-discard transactions."""
+
+    dialect = 'postgresql'
+
+    def __init__(self, keys, fail_at_chunk=None, lag=()):
+        super().__init__()
+        self.keys = sorted(keys)
+        self.progress = {}
+        self.chunks = []
+        self.fail_at_chunk = fail_at_chunk
+        self.lag = list(lag)
+        self._pending = None
+
+    def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    def execute_batch(self, operations):
+        for operation, params in operations:
+            self.execute(operation, params)
+
+    @contextmanager
+    def transaction(self):
+        self._pending = {}
+        try:
+            yield
+            self.progress.update(self._pending)
+        finally:
+            self._pending = None
+
+    def execute(self, operation, params=None):
+        text = repr(operation) if not isinstance(operation, str) else operation
+        if 'MIN(' in text:
+            return Result((self.keys[0], self.keys[-1]) if self.keys else (None, None))
+        if 'OFFSET' in text:
+            start, offset = params
+            following = [key for key in self.keys if key >= start]
+            return Result((following[offset],) if offset < len(following) else None)
+        if 'pg_stat_replication' in text:
+            return Result((self.lag.pop(0) if self.lag else 0,))
+        if 'SELECT last_key' in text:
+            return Result(self.progress.get(params[0]))
+        if 'INSERT INTO migration_backfill_progress' in text:
+            version, last_key, rows_done = params
+            self._pending[version] = (last_key, rows_done)
+            return Result()
+        if 'DELETE FROM migration_backfill_progress' in text:
+            self.progress.pop(params[0], None)
+            return Result()
+        if text == STATEMENT:
+            if self.fail_at_chunk == len(self.chunks):
+                raise Exception('connection lost')
+            self.chunks.append((params['start'], params['end']))
+            rows = sum(1 for key in self.keys if params['start'] <= key < params['end'])
+            return Result(rowcount=rows)
+        return Result()
+
+
+def runner(connector, **options):
+    sleeps = []
+    options.setdefault('chunk_size', 3)
+    backfill = BackfillRunner(connector, '20240101000000', STATEMENT, 'users', sleep=sleeps.append, **options)
+    return backfill, sleeps
+
+
+def test_walks_sparse_keys_in_full_chunks():
+    connector = FakeBackfillConnector([1, 2, 5, 9, 10, 40, 41, 100])
+    backfill, _ = runner(connector)
+
+    assert backfill.run() == 8
+    assert connector.chunks == [(1, 9), (9, 41), (41, 101)]
+    assert connector.progress['20240101000000'] == (101, 8)
+
+
+def test_empty_table_runs_no_chunk():
+    connector = FakeBackfillConnector([])
+    assert runner(connector)[0].run() == 0
+    assert connector.chunks == []
+
+
+def test_resumes_after_the_last_committed_chunk():
+    connector = FakeBackfillConnector(range(1, 11), fail_at_chunk=2)
+    with pytest.raises(Exception, match='connection lost'):
+        runner(connector)[0].run()
+    assert connector.progress['20240101000000'] == (7, 6)
+
+    connector.fail_at_chunk = None
+    connector.chunks = []
+    assert runner(connector)[0].run() == 4
+    assert connector.chunks == [(7, 10), (10, 11)]
+    assert connector.progress['20240101000000'] == (11, 10)
+
+
+def test_throttles_to_max_rows_per_second(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(backfill_module.time, 'monotonic', lambda: now[0])
+    connector = FakeBackfillConnector(range(1, 10))
+    backfill = BackfillRunner(connector, '20240101000000', STATEMENT, 'users', chunk_size=3,
+                              max_rows_per_second=3, sleep=lambda seconds: now.__setitem__(0, now[0] + seconds))
+
+    backfill.run()
+    # Each 3-row chunk is worth a second, and chunks themselves take no time here
+    assert now[0] == pytest.approx(3)
+
+
+def test_waits_while_replicas_lag():
+    connector = FakeBackfillConnector(range(1, 4), lag=[5, 2, 0.5])
+    backfill, sleeps = runner(connector, max_replication_lag=1, lag_poll_interval=0.25)
+
+    backfill.run()
+    assert sleeps == [0.25, 0.25]
+
+
+def test_finish_drops_the_checkpoint():
+    connector = FakeBackfillConnector(range(1, 4))
+    backfill, _ = runner(connector)
+    backfill.run()
+
+    backfill.finish()
+    assert connector.progress == {}
+
+
+def test_from_headers():
+    backfill = BackfillRunner.from_headers(FakeBackfillConnector([]), '20240101000000', STATEMENT, {
+        'TABLE': 'public.users', 'KEY': 'user_id', 'CHUNK_SIZE': '500', 'MAX_ROWS_PER_SECOND': '1000',
+    })
+    assert (backfill.table, backfill.key, backfill.chunk_size, backfill.max_rows_per_second,
+            backfill.max_replication_lag) == ('public.users', 'user_id', 500, 1000.0, None)
+    with pytest.raises(Exception, match='TABLE'):
+        BackfillRunner.from_headers(FakeBackfillConnector([]), '20240101000000', STATEMENT, {})
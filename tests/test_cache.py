@@ -0,0 +1,70 @@
+import json
+import os
+
+from schemaflux.cache import MigrationCache
+
+
+def write(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def test_round_trips_tuples_and_bson_values(tmp_path):
+    source = tmp_path / 'm.sql'
+    write(source, 'CREATE TABLE a (id int);')
+    value = {'steps': [('sql', [(('insert_one', 'users', {'at': None}), None)])]}
+    first = MigrationCache(str(tmp_path / 'cache'))
+    first.load(str(source), 'postgresql', lambda content: value)
+    first.save()
+
+    cache = MigrationCache(str(tmp_path / 'cache'))
+    cached = cache.load(str(source), 'postgresql', lambda content: None)
+    assert cached == value
+    assert isinstance(cached['steps'][0], tuple)
+
+
+def test_cache_files_are_json(tmp_path):
+    source = tmp_path / 'm.sql'
+    write(source, 'SELECT 1;')
+    cache = MigrationCache(str(tmp_path / 'cache'))
+    cache.load(str(source), 'postgresql', lambda content: {'up': content})
+    cache.save()
+
+    for name in os.listdir(tmp_path / 'cache'):
+        assert name.endswith('.json')
+        with open(tmp_path / 'cache' / name) as f:
+            json.load(f)
+
+
+def test_malformed_index_is_discarded(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    index = MigrationCache(str(cache_dir))._empty_index()
+    index['entries']['../../outside'] = 1
+    write(cache_dir / MigrationCache.INDEX_FILE, json.dumps(index))
+
+    assert MigrationCache(str(cache_dir))._index['entries'] == {}
+
+
+def test_rejected_entries_are_parsed_again(tmp_path):
+    source = tmp_path / 'm.sql'
+    write(source, 'SELECT 1;')
+    first = MigrationCache(str(tmp_path / 'cache'))
+    first.load(str(source), 'postgresql', lambda content: 'bad')
+    first.save()
+
+    cache = MigrationCache(str(tmp_path / 'cache'))
+    value = cache.load(str(source), 'postgresql', lambda content: {'up': content},
+                       validate=lambda value: isinstance(value, dict))
+    assert value == {'up': 'SELECT 1;'}
+
+
+def test_checksums_are_evicted(tmp_path):
+    cache = MigrationCache(str(tmp_path / 'cache'), max_entries=2)
+    for n in range(4):
+        path = tmp_path / f'{n}.sql'
+        write(path, str(n))
+        cache.checksum(str(path))
+    cache.save()
+
+    assert sorted(os.path.basename(path) for path in cache._index['checksums']) == ['2.sql', '3.sql']
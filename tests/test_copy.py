@@ -0,0 +1,105 @@
+import pytest
+from click.testing import CliRunner
+
+from schemaflux.cli import cli
+from schemaflux.connectors.postgresql import PostgreSQLConnector
+from schemaflux.core import MigrationManager
+
+
+class CopyCursor:
+    """Reads what ``copy_expert`` is handed and reports one row per line."""
+
+    def __init__(self):
+        self.copied = []
+        self.rowcount = -1
+
+    def copy_expert(self, operation, data, size):
+        content = data.read()
+        self.copied.append((operation, content))
+        self.rowcount = content.count(b'\n')
+
+
+class Connection:
+    autocommit = True
+
+
+def manager(tmp_path, db_type='postgresql'):
+    migrations = tmp_path / 'migrations'
+    migrations.mkdir(exist_ok=True)
+    return MigrationManager(migrations_dir=str(migrations), db_type=db_type, cache_dir=None,
+                            log_dir=str(tmp_path / 'logs'))
+
+
+@pytest.mark.parametrize('directive, expected', [
+    ("-- COPY countries (code, name) FROM 'countries.csv' WITH (FORMAT csv, HEADER true)",
+     ("COPY countries (code, name) FROM STDIN (FORMAT csv, HEADER true)", 'countries.csv')),
+    ("-- COPY countries FROM 'data/countries.csv';",
+     ("COPY countries FROM STDIN (FORMAT csv)", 'data/countries.csv')),
+    ("-- COPY blobs FROM 'blobs.bin'", ("COPY blobs FROM STDIN (FORMAT binary)", 'blobs.bin')),
+    ("-- COPY public.notes FROM 'notes.txt' with (DELIMITER '|')",
+     ("COPY public.notes FROM STDIN (DELIMITER '|')", 'notes.txt')),
+])
+def test_directive_becomes_a_copy_step(tmp_path, directive, expected):
+    steps = manager(tmp_path)._build_steps(f"CREATE TABLE countries (code text);\n{directive}\nANALYZE countries;\n")
+    assert [kind for kind, _ in steps] == ['sql', 'copy', 'sql']
+    assert steps[1][1] == expected
+
+
+def test_copy_lines_inside_statements_are_left_alone(tmp_path):
+    steps = manager(tmp_path)._build_steps("INSERT INTO notes VALUES ('-- COPY a FROM ''b''');\n")
+    assert [kind for kind, _ in steps] == ['sql']
+
+
+def test_data_file_is_read_relative_to_the_migrations_directory(tmp_path, monkeypatch):
+    schemaflux = manager(tmp_path)
+    (tmp_path / 'migrations' / 'countries.csv').write_text("code,name\nfr,France\nde,Germany\n")
+    monkeypatch.chdir(tmp_path)
+    connector = PostgreSQLConnector()
+    connector.conn = Connection()
+    connector.cursor = CopyCursor()
+
+    steps = schemaflux._build_steps("-- COPY countries FROM 'countries.csv' WITH (FORMAT csv, HEADER true)\n")
+    schemaflux._run_steps(steps, connector)
+
+    [(operation, content)] = connector.cursor.copied
+    assert operation == "COPY countries FROM STDIN (FORMAT csv, HEADER true)"
+    assert content.startswith(b'code,name')
+    assert connector.get_metrics()['query_count'] == 1
+    assert connector.get_metrics()['operations_count'] == 3
+
+
+def test_missing_data_file_fails_before_copying(tmp_path):
+    schemaflux = manager(tmp_path)
+    connector = PostgreSQLConnector()
+    connector.cursor = CopyCursor()
+
+    with pytest.raises(FileNotFoundError, match='missing.csv'):
+        schemaflux._run_steps(schemaflux._build_steps("-- COPY t FROM 'missing.csv'\n"), connector)
+    assert connector.cursor.copied == []
+
+
+def test_sqlite_reports_copy_as_skipped(tmp_path):
+    schemaflux = manager(tmp_path, db_type='sqlite')
+    (tmp_path / 'migrations' / 'countries.csv').write_text("fr,France\n")
+    (tmp_path / 'migrations' / '20240101000000_countries.sql').write_text(
+        "-- UP\nCREATE TABLE countries (code text, name text);\n"
+        "-- COPY countries FROM 'countries.csv'\n\n-- DOWN\nDROP TABLE countries;\n"
+    )
+    schemaflux.apply_migrations()
+    [skipped] = schemaflux.connector.skipped
+    assert skipped.startswith("COPY countries FROM STDIN (FORMAT csv)")
+
+
+def test_validate_strict_fails_on_copy(tmp_path, monkeypatch):
+    migrations = tmp_path / 'migrations'
+    migrations.mkdir()
+    (migrations / 'countries.csv').write_text("fr,France\n")
+    (migrations / '20240101000000_countries.sql').write_text(
+        "-- UP\nCREATE TABLE countries (code text, name text);\n"
+        "-- COPY countries FROM 'countries.csv'\n\n-- DOWN\nDROP TABLE countries;\n"
+    )
+    monkeypatch.chdir(tmp_path)
+
+    result = CliRunner().invoke(cli, ['validate', '--strict'])
+    assert result.exit_code == 1
+    assert 'COPY countries FROM STDIN' in result.output
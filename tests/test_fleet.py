@@ -0,0 +1,98 @@
+import json
+import sys
+
+import pytest
+
+from schemaflux.fleet import SKIPPED, FleetRunner, load_targets
+
+GOOD = "-- UP\nCREATE TABLE t (id integer);\nINSERT INTO t VALUES (1), (2);\n\n-- DOWN\nDROP TABLE t;\n"
+BROKEN = "-- UP\nCREATE TABLE t (id integer);\nINSERT INTO missing VALUES (1);\n\n-- DOWN\nDROP TABLE t;\n"
+
+
+@pytest.fixture
+def directories(tmp_path):
+    for name, content in (('good', GOOD), ('broken', BROKEN)):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / '20240101000000_t.sql').write_text(content)
+    return tmp_path
+
+
+def target(tmp_path, name, migrations='good'):
+    return {'name': name, 'db_type': 'sqlite', 'database': str(tmp_path / f'{name}.sqlite'),
+            'migrations_dir': str(tmp_path / migrations)}
+
+
+def runner(tmp_path, targets, **options):
+    return FleetRunner(targets, cache_dir=None, log_dir=str(tmp_path / 'logs'), **options)
+
+
+def test_reports_each_target_in_order(directories):
+    summary = runner(directories, [
+        target(directories, 'tenant_a'),
+        target(directories, 'tenant_b', 'broken'),
+        target(directories, 'tenant_c'),
+    ], jobs=3, fail_fast=False).apply()
+
+    a, b, c = summary['targets']
+    assert [r['target'] for r in summary['targets']] == ['tenant_a', 'tenant_b', 'tenant_c']
+    assert a['success'] and a['applied'] == ['20240101000000_t.sql']
+    # Two migration statements plus the history row
+    assert (a['query_count'], a['total_rows_affected']) == (3, 3)
+    assert not b['success'] and 'missing' in b['error'] and b['applied'] == []
+    assert c['success']
+    assert (summary['successful_targets'], summary['failed_targets'], summary['migrations_applied']) == (2, 1, 2)
+
+
+def test_fail_fast_skips_targets_that_have_not_started(directories):
+    summary = runner(directories, [
+        target(directories, 'tenant_a', 'broken'),
+        target(directories, 'tenant_b'),
+        target(directories, 'tenant_c'),
+    ], jobs=1).apply()
+
+    assert [r['error'] == SKIPPED for r in summary['targets']] == [False, True, True]
+    assert summary['failed_targets'] == 3
+    assert not (directories / 'tenant_b.sqlite').exists()
+
+
+def test_targets_keep_their_own_history(directories):
+    targets = [target(directories, 'tenant_a'), target(directories, 'tenant_b')]
+    runner(directories, targets[:1]).apply()
+
+    summary = runner(directories, targets).apply()
+    assert [r['applied'] for r in summary['targets']] == [[], ['20240101000000_t.sql']]
+
+
+def test_load_targets_from_json(tmp_path):
+    path = tmp_path / 'targets.json'
+    path.write_text(json.dumps({'targets': [{'name': 'a', 'dsn': 'postgresql://db/a'}, {'name': 'b'}]}))
+    assert [t['name'] for t in load_targets(str(path))] == ['a', 'b']
+
+    path.write_text(json.dumps([{'name': 'a'}]))
+    assert load_targets(str(path)) == [{'name': 'a'}]
+
+
+@pytest.mark.parametrize('targets, message', [
+    ([{'dsn': 'postgresql://db/a'}], 'without a name'),
+    ([{'name': 'a'}, {'name': 'a'}], 'Duplicate target name'),
+])
+def test_load_targets_rejects_bad_names(tmp_path, targets, message):
+    path = tmp_path / 'targets.json'
+    path.write_text(json.dumps(targets))
+    with pytest.raises(ValueError, match=message):
+        load_targets(str(path))
+
+
+def test_yaml_targets_without_pyyaml(tmp_path, monkeypatch):
+    path = tmp_path / 'targets.yaml'
+    path.write_text("targets:\n  - name: a\n")
+    monkeypatch.setitem(sys.modules, 'yaml', None)
+    with pytest.raises(Exception, match=r'schemaflux\[yaml\]'):
+        load_targets(str(path))
+
+
+def test_yaml_targets(tmp_path):
+    pytest.importorskip('yaml')
+    path = tmp_path / 'targets.yml'
+    path.write_text("targets:\n  - name: a\n    dsn: postgresql://db/a\n  - name: b\n    schema: b\n")
+    assert load_targets(str(path)) == [{'name': 'a', 'dsn': 'postgresql://db/a'}, {'name': 'b', 'schema': 'b'}]
@@ -0,0 +1,51 @@
+import pytest
+
+from schemaflux.lexer import batch_statements, split_statements
+
+
+@pytest.mark.parametrize('sql, expected', [
+    ("SELECT 1; SELECT 2;", ["SELECT 1", "SELECT 2"]),
+    ("SELECT 1", ["SELECT 1"]),
+    ("  ;; ; ", []),
+    # Dollar quotes, tagged and untagged
+    ("CREATE FUNCTION f() RETURNS int AS $$ SELECT 1; $$ LANGUAGE sql; SELECT 2;",
+     ["CREATE FUNCTION f() RETURNS int AS $$ SELECT 1; $$ LANGUAGE sql", "SELECT 2"]),
+    ("DO $body$ BEGIN PERFORM 1; $$ still body; END $body$; SELECT 2",
+     ["DO $body$ BEGIN PERFORM 1; $$ still body; END $body$", "SELECT 2"]),
+    # Parameters and identifiers containing $ are not dollar quotes
+    ("SELECT $1; SELECT a$b; SELECT 2", ["SELECT $1", "SELECT a$b", "SELECT 2"]),
+    # Nested block comments
+    ("SELECT 1 /* outer ; /* inner ; */ still comment ; */; SELECT 2",
+     ["SELECT 1 /* outer ; /* inner ; */ still comment ; */", "SELECT 2"]),
+    # Standard strings double their quotes, E'' strings also take backslash escapes
+    ("SELECT 'it''s; fine'; SELECT 2", ["SELECT 'it''s; fine'", "SELECT 2"]),
+    ("SELECT E'it\\'s; fine'; SELECT 2", ["SELECT E'it\\'s; fine'", "SELECT 2"]),
+    ("SELECT e'\\\\'; SELECT 2", ["SELECT e'\\\\'", "SELECT 2"]),
+    # A backslash ends a standard string normally
+    ("SELECT 'C:\\'; SELECT 2", ["SELECT 'C:\\'", "SELECT 2"]),
+    # ...and a word ending in e is no E'' prefix
+    ("SELECT some'\\'; SELECT 2", ["SELECT some'\\'", "SELECT 2"]),
+    # Quoted identifiers
+    ('SELECT "a;b", "say ""hi"";" FROM t; SELECT 2', ['SELECT "a;b", "say ""hi"";" FROM t', "SELECT 2"]),
+    # Line comments, trailing and comment-only statements
+    ("SELECT 1; -- done; really\nSELECT 2 -- trailing; comment", ["SELECT 1", "-- done; really\nSELECT 2 -- trailing; comment"]),
+    ("SELECT 1;\n-- only a comment\n;\n/* and a block */;", ["SELECT 1"]),
+    ("SELECT 1 -- no newline at the end", ["SELECT 1 -- no newline at the end"]),
+])
+def test_split_statements(sql, expected):
+    assert split_statements(sql) == expected
+
+
+@pytest.mark.parametrize('sql', [
+    "SELECT 'unterminated; SELECT 2",
+    'SELECT "unterminated; SELECT 2',
+    "SELECT $$ unterminated; SELECT 2",
+    "SELECT 1 /* unterminated; SELECT 2",
+])
+def test_unterminated_sections_run_to_the_end(sql):
+    assert split_statements(sql) == [sql]
+
+
+def test_batch_statements():
+    assert list(batch_statements(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batch_statements([], 3)) == []
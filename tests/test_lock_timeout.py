@@ -0,0 +1,110 @@
+import time
+
+import pytest
+from psycopg2 import errors
+
+from schemaflux.connectors import postgresql
+from schemaflux.connectors.postgresql import PostgreSQLConnector
+
+SLEEP = time.sleep
+
+
+class TimingOutCursor:
+    """Each of the first ``failures`` executes queues for ``wait`` seconds, then times out."""
+
+    def __init__(self, failures, wait):
+        self.failures = failures
+        self.wait = wait
+
+    def mogrify(self, operation, params=None):
+        return operation.encode()
+
+    def execute(self, operation, params=None):
+        if self.failures:
+            self.failures -= 1
+            SLEEP(self.wait)
+            raise errors.LockNotAvailable('canceling statement due to lock timeout')
+
+
+class Connection:
+    autocommit = True
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def slow_backoff(monkeypatch):
+    monkeypatch.setattr(postgresql.random, 'uniform', lambda low, high: high)
+    sleep = time.sleep
+    monkeypatch.setattr(postgresql.time, 'sleep', lambda seconds: sleep(0.2))
+
+
+def test_lock_wait_excludes_backoff(slow_backoff):
+    connector = PostgreSQLConnector(lock_timeout=0.05, lock_retries=5)
+    connector.conn = Connection()
+    connector.cursor = TimingOutCursor(failures=2, wait=0.02)
+
+    connector.execute("ALTER TABLE t ADD COLUMN c int")
+
+    metrics = connector.get_metrics()
+    assert metrics['lock_timeouts'] == 2
+    assert 0.04 <= metrics['lock_wait_seconds'] < 0.2
+
+
+def test_timeline_reports_every_attempt(slow_backoff):
+    from schemaflux.instrumentation import StatementTimeline
+
+    connector = PostgreSQLConnector(lock_timeout=0.05, lock_retries=5)
+    connector.conn = Connection()
+    connector.cursor = TimingOutCursor(failures=2, wait=0.02)
+    timeline = StatementTimeline()
+    connector.add_hook(timeline)
+
+    connector.execute("ALTER TABLE t ADD COLUMN c int")
+
+    assert [bool(entry['error']) for entry in timeline.entries] == [True, True, False]
+    assert all(entry['duration_seconds'] >= 0.02 for entry in timeline.entries[:2])
+
+
+def test_exhausted_retries_count_every_attempt(slow_backoff):
+    connector = PostgreSQLConnector(lock_timeout=0.05, lock_retries=2)
+    connector.conn = Connection()
+    connector.cursor = TimingOutCursor(failures=5, wait=0.02)
+
+    with pytest.raises(Exception, match="lock timeout"):
+        connector.execute("ALTER TABLE t ADD COLUMN c int")
+
+    metrics = connector.get_metrics()
+    assert metrics['lock_timeouts'] == 3
+    assert 0.06 <= metrics['lock_wait_seconds'] < 0.2
+
+
+def test_async_exhausted_retries_count_every_attempt(monkeypatch):
+    asyncpg = pytest.importorskip('asyncpg')
+    import asyncio
+    from schemaflux.connectors import async_postgresql
+    from schemaflux.connectors.async_postgresql import AsyncPostgreSQLConnector
+
+    class TimingOutConnection:
+        attempts = 0
+
+        def is_in_transaction(self):
+            return False
+
+        async def execute(self, sql):
+            self.attempts += 1
+            raise asyncpg.exceptions.LockNotAvailableError('canceling statement due to lock timeout')
+
+    async def no_backoff(seconds):
+        pass
+
+    monkeypatch.setattr(async_postgresql.asyncio, 'sleep', no_backoff)
+    connector = AsyncPostgreSQLConnector(lock_timeout=0.05, lock_retries=2)
+    connector.conn = TimingOutConnection()
+
+    with pytest.raises(Exception, match="lock timeout"):
+        asyncio.run(connector.execute("ALTER TABLE t ADD COLUMN c int"))
+
+    assert connector.conn.attempts == 3
+    assert connector.get_metrics()['lock_timeouts'] == 3
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from schemaflux.async_locking import AsyncAdvisoryLock
+from schemaflux.locking import MongoLease
+
+
+class LeaseCollection:
+    def __init__(self):
+        self.matched = 1
+
+    def update_one(self, filter, update, upsert=False):
+        return SimpleNamespace(matched_count=self.matched)
+
+    def delete_one(self, filter):
+        pass
+
+
+def lease(ttl):
+    collection = LeaseCollection()
+    connector = SimpleNamespace(db={'migration_lock': collection})
+    return MongoLease(connector, ttl=ttl), collection
+
+
+def test_lease_is_held_while_renewed():
+    lock, _ = lease(ttl=0.3)
+    assert lock.acquire(wait=False)
+    try:
+        time.sleep(0.5)
+        lock.ensure_held()
+    finally:
+        lock.release()
+
+
+def test_lease_taken_over_stops_the_holder():
+    lock, collection = lease(ttl=0.3)
+    assert lock.acquire(wait=False)
+    collection.matched = 0
+    try:
+        time.sleep(0.2)
+        with pytest.raises(Exception, match='taken over'):
+            lock.ensure_held()
+    finally:
+        lock.release()
+
+
+def test_lease_expires_when_renewals_fail():
+    lock, collection = lease(ttl=0.3)
+    assert lock.acquire(wait=False)
+    collection.update_one = lambda *args, **kwargs: (_ for _ in ()).throw(OSError('down'))
+    try:
+        time.sleep(0.4)
+        with pytest.raises(Exception, match='expired'):
+            lock.ensure_held()
+    finally:
+        lock.release()
+
+
+class AdvisoryConnector:
+    def __init__(self, free):
+        self.free = free
+        self.executed = []
+
+    async def fetch(self, operation, params=None):
+        self.executed.append(operation)
+        return [(self.free,)]
+
+    async def execute(self, operation, params=None):
+        self.executed.append(operation)
+
+
+def test_async_advisory_lock():
+    async def scenario():
+        busy = AsyncAdvisoryLock(AdvisoryConnector(free=False), poll_interval=0.01)
+        assert not await busy.acquire(wait=True, timeout=0.05)
+
+        connector = AdvisoryConnector(free=True)
+        lock = AsyncAdvisoryLock(connector)
+        assert await lock.acquire(wait=False)
+        await lock.release()
+        return connector.executed
+
+    executed = asyncio.run(scenario())
+    assert 'pg_try_advisory_lock' in executed[0] and 'pg_advisory_unlock' in executed[1]
@@ -0,0 +1,34 @@
+import pytest
+
+from schemaflux.core import MigrationManager
+
+FILES = ['20240101000000_users.sql', '20240102000000_seed.js', '20240103000000_rows.json']
+
+
+@pytest.fixture
+def migrations(tmp_path):
+    directory = tmp_path / 'migrations'
+    directory.mkdir()
+    for name in FILES:
+        (directory / name).write_text('')
+    return directory
+
+
+@pytest.mark.parametrize('db_type, expected', [
+    ('postgresql', FILES[:2]),
+    ('sqlite', FILES[:2]),
+    ('mongodb', FILES),
+])
+def test_json_files_are_migrations_only_for_mongodb(tmp_path, migrations, db_type, expected):
+    manager = MigrationManager(migrations_dir=str(migrations), db_type=db_type,
+                               cache_dir=str(tmp_path / 'cache'), log_dir=str(tmp_path / 'logs'))
+    assert manager._get_migration_files() == expected
+
+
+def test_cached_listing_depends_on_db_type(tmp_path, migrations):
+    options = dict(migrations_dir=str(migrations), cache_dir=str(tmp_path / 'cache'),
+                   log_dir=str(tmp_path / 'logs'))
+    mongo = MigrationManager(db_type='mongodb', **options)
+    assert mongo._get_migration_files() == FILES
+    mongo.cache.save()
+    assert MigrationManager(db_type='postgresql', **options)._get_migration_files() == FILES[:2]
@@ -0,0 +1,126 @@
+import pytest
+from pymongo import DeleteMany, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+from schemaflux.connectors.mongodb import MongoDBConnector
+
+
+class FakeCollection:
+    def __init__(self, name, database):
+        self.name = name
+        self.calls = database.calls
+        self.bulk_error = database.bulk_error
+
+    def bulk_write(self, requests, ordered):
+        self.calls.append(('bulk_write', self.name, list(requests)))
+        if self.bulk_error:
+            raise self.bulk_error
+        inserted = sum(isinstance(request, InsertOne) for request in requests)
+        return BulkWriteResult({'nInserted': inserted, 'nModified': len(requests) - inserted,
+                                'nRemoved': 0, 'nUpserted': 0, 'upserted': []}, True)
+
+    def __getattr__(self, method):
+        def call(**arguments):
+            self.calls.append((method, self.name, arguments))
+            if method == 'create_index':
+                return 'index'
+            return []
+        return call
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.calls = []
+        self.bulk_error = None
+
+    def __getitem__(self, name):
+        return FakeCollection(name, self)
+
+
+def connector(batch_size=1000):
+    connector = MongoDBConnector(batch_size=batch_size)
+    connector.db = FakeDatabase()
+    return connector
+
+
+def insert(collection, n):
+    return ('insert_one', collection, {'document': {'n': n}}), None
+
+
+def test_consecutive_writes_share_one_bulk_write():
+    mongo = connector()
+    mongo.execute_batch([
+        insert('users', 1),
+        (('update_one', 'users', {'filter': {'n': 1}, 'update': {'$set': {'seen': True}}}), None),
+        (('insert_many', 'users', {'documents': [{'n': 2}, {'n': 3}]}), None),
+    ])
+
+    [(method, collection, requests)] = mongo.db.calls
+    assert (method, collection) == ('bulk_write', 'users')
+    assert [type(request) for request in requests] == [InsertOne, UpdateOne, InsertOne, InsertOne]
+    assert mongo.get_metrics()['query_count'] == 3
+    assert mongo.get_metrics()['operations_count'] == 4
+
+
+def test_non_bulk_operation_or_other_collection_breaks_the_group():
+    mongo = connector()
+    mongo.execute_batch([
+        insert('users', 1),
+        insert('users', 2),
+        (('create_index', 'users', {'keys': [('n', 1)]}), None),
+        insert('users', 3),
+        insert('orders', 4),
+        (('insert_many', 'orders', {'documents': [{'n': 5}], 'ordered': False}), None),
+    ])
+
+    assert [(method, collection) for method, collection, _ in mongo.db.calls] == [
+        ('bulk_write', 'users'), ('create_index', 'users'), ('bulk_write', 'users'),
+        ('bulk_write', 'orders'), ('insert_many', 'orders'),
+    ]
+    assert [len(call[2]) for call in mongo.db.calls if call[0] == 'bulk_write'] == [2, 1, 1]
+
+
+def test_batch_size_splits_groups():
+    mongo = connector(batch_size=2)
+    mongo.execute_batch([insert('users', n) for n in range(5)])
+    assert [len(requests) for _, _, requests in mongo.db.calls] == [2, 2, 1]
+
+
+def test_large_insert_many_is_not_split_mid_operation():
+    mongo = connector(batch_size=2)
+    mongo.execute_batch([(('insert_many', 'users', {'documents': [{'n': n} for n in range(3)]}), None),
+                         insert('users', 3)])
+    assert [len(requests) for _, _, requests in mongo.db.calls] == [3, 1]
+
+
+def test_partial_bulk_failure_counts_written_documents():
+    mongo = connector()
+    mongo.db.bulk_error = BulkWriteError({
+        'nInserted': 2, 'nModified': 0, 'nRemoved': 0, 'nUpserted': 0,
+        'writeErrors': [{'index': 2, 'code': 11000, 'errmsg': 'duplicate key'}],
+    })
+    with pytest.raises(Exception, match='MongoDB batch operation failed'):
+        mongo.execute_batch([insert('users', n) for n in range(3)])
+    assert mongo.get_metrics()['operations_count'] == 2
+
+
+@pytest.mark.parametrize('result, rows', [
+    (BulkWriteResult({'nInserted': 2, 'nModified': 3, 'nRemoved': 4, 'nUpserted': 1, 'upserted': []}, True), 10),
+    (UpdateResult({'n': 3, 'nModified': 2}, True), 2),
+    (UpdateResult({'n': 1, 'nModified': 0, 'upserted': 'new-id'}, True), 1),
+    (DeleteResult({'n': 5}, True), 5),
+    (InsertManyResult(['a', 'b', 'c'], True), 3),
+    (InsertOneResult('a', True), 1),
+    ('index', 0),
+])
+def test_row_counts_come_from_driver_results(result, rows):
+    assert connector()._count_rows(result) == rows
+
+
+def test_bulk_requests_keep_their_arguments():
+    mongo = connector()
+    [delete] = mongo._bulk_requests('delete_many', {'filter': {'n': {'$gt': 1}}})
+    assert delete == DeleteMany({'n': {'$gt': 1}})
+    assert mongo._bulk_requests('update_one', {'filter': {}, 'update': {}, 'session': None}) is None
+    assert mongo._bulk_requests('find', {'filter': {}}) is None
@@ -0,0 +1,55 @@
+import sys
+
+from click.testing import CliRunner
+
+import schemaflux.cli
+from schemaflux.connectors.mongodb import MongoDBConnector
+from schemaflux.core import MigrationManager
+
+# The package re-exports the ``cli`` group under the module's name
+cli_module = sys.modules['schemaflux.cli']
+
+
+class FakeDatabase:
+    def command(self, name, collection):
+        return {'count': 1000, 'size': 64000}
+
+
+class FakeVersionControl:
+    def get_pending_versions(self, versions):
+        return set(versions)
+
+
+def mongo_manager(tmp_path):
+    migrations = tmp_path / 'migrations'
+    migrations.mkdir()
+    (migrations / '20240101000000_users.js').write_text(
+        "// UP\ninsert_one:users:{'document': {'name': 'ada'}}\n"
+        "create_index:users:{'keys': [['name', 1]]}\n// DOWN\ndrop:users:{}\n"
+    )
+    manager = MigrationManager(migrations_dir=str(migrations), db_type='mongodb', cache_dir=None,
+                               log_dir=str(tmp_path / 'logs'))
+    manager._connector = MongoDBConnector()
+    manager._connector.db = FakeDatabase()
+    manager._version_control = FakeVersionControl()
+    return manager
+
+
+def test_mongo_plan_shows_operations_outside_a_transaction(tmp_path):
+    [plan] = mongo_manager(tmp_path).plan_migrations()
+    assert plan['transactional'] is False
+    assert [(s['statement'], s['kind'], s['rows']) for s in plan['statements']] == [
+        ('insert_one:users', 'dml', 1000),
+        ('create_index:users', 'index', 1000),
+    ]
+
+
+def test_plan_command_on_mongo(tmp_path, monkeypatch):
+    manager = mongo_manager(tmp_path)
+    monkeypatch.setattr(cli_module, 'MigrationManager', lambda: manager)
+
+    result = CliRunner().invoke(cli_module.cli, ['plan'])
+    assert 'Error' not in result.output
+    assert '20240101000000_users.js' in result.output
+    assert '(no transaction)' in result.output
+    assert 'create_index:users' in result.output
@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+from schemaflux.connectors import pool as pool_module
+from schemaflux.connectors.base import BaseConnector
+from schemaflux.connectors.pool import ConnectorPool
+from schemaflux.connectors.sqlite import SQLiteConnector
+from schemaflux.core import MigrationManager
+
+
+class FakeConnector(BaseConnector):
+    def __init__(self):
+        super().__init__()
+        self.connected = False
+        self.closed = False
+        self.healthy = True
+        self.pings = 0
+
+    def connect(self):
+        self.connected = True
+
+    def execute(self, operation, params=None):
+        pass
+
+    def execute_batch(self, operations):
+        pass
+
+    def ping(self):
+        self.pings += 1
+        return self.healthy
+
+    def close(self):
+        self.closed = True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(pool_module.time, 'monotonic', clock)
+    return clock
+
+
+def test_opens_min_size_connected_connectors():
+    created = []
+    pool = ConnectorPool(lambda: created.append(FakeConnector()) or created[-1], min_size=2)
+    assert len(created) == 2 and all(c.connected for c in created)
+    assert pool.acquire() is created[1]
+
+
+def test_released_connector_is_reused():
+    pool = ConnectorPool(FakeConnector, min_size=0, max_size=2)
+    first = pool.acquire()
+    first._query_count = 7
+    pool.release(first)
+    assert pool.acquire() is first
+    assert first.get_metrics()['query_count'] == 0
+
+
+def test_acquire_times_out_at_max_size():
+    pool = ConnectorPool(FakeConnector, min_size=0, max_size=1)
+    pool.acquire()
+    started = time.monotonic()
+    with pytest.raises(Exception, match='Timed out waiting for a pooled connection'):
+        pool.acquire(timeout=0.05)
+    assert time.monotonic() - started >= 0.05
+
+
+def test_acquire_blocks_until_a_connector_is_released():
+    pool = ConnectorPool(FakeConnector, min_size=0, max_size=1)
+    held = pool.acquire()
+    threading.Timer(0.05, pool.release, (held,)).start()
+    assert pool.acquire(timeout=5) is held
+
+
+def test_idle_connectors_are_pruned_down_to_min_size(clock):
+    pool = ConnectorPool(FakeConnector, min_size=1, max_size=3, idle_timeout=60)
+    connectors = [pool.acquire() for _ in range(3)]
+    for connector in connectors:
+        pool.release(connector)
+
+    clock.now += 61
+    kept = pool.acquire()
+    assert [c.closed for c in connectors] == [True, True, False]
+    assert kept is connectors[2]
+
+
+def test_stale_connector_is_health_checked_and_replaced(clock):
+    pool = ConnectorPool(FakeConnector, min_size=1, max_size=1, health_check_interval=30)
+    broken = pool.acquire()
+    pool.release(broken)
+
+    clock.now += 10
+    assert pool.acquire() is broken and broken.pings == 0
+    pool.release(broken)
+
+    broken.healthy = False
+    clock.now += 31
+    replacement = pool.acquire()
+    assert replacement is not broken and replacement.connected
+    assert broken.closed
+
+
+def test_connection_discards_broken_connector_on_error():
+    pool = ConnectorPool(FakeConnector, min_size=0, max_size=1)
+    with pytest.raises(RuntimeError):
+        with pool.connection() as connector:
+            connector.healthy = False
+            raise RuntimeError('boom')
+    assert connector.closed
+    assert pool.acquire(timeout=0) is not connector
+
+
+def test_closed_pool_refuses_to_lend():
+    pool = ConnectorPool(FakeConnector, min_size=1)
+    [(idle, _)] = pool._idle
+    pool.close()
+    assert idle.closed
+    with pytest.raises(Exception, match='closed'):
+        pool.acquire()
+
+
+def test_failed_migration_returns_its_connector(tmp_path):
+    migrations = tmp_path / 'migrations'
+    migrations.mkdir()
+    (migrations / '20240101000000_broken.sql').write_text("-- UP\nCREATE TABLE t (id int);\nSELECT * FROM missing;\n")
+    database = str(tmp_path / 'db.sqlite')
+    pool = ConnectorPool(lambda: SQLiteConnector(database=database), min_size=0, max_size=1)
+
+    manager = MigrationManager(migrations_dir=str(migrations), db_type='sqlite', cache_dir=None,
+                               log_dir=str(tmp_path / 'logs'), pool=pool)
+    with pytest.raises(Exception, match='missing'):
+        manager.apply_migrations()
+    connector = manager.connector
+    manager.close()
+
+    reused = pool.acquire(timeout=0)
+    assert reused is connector and reused.ping()
+    assert reused.execute("SELECT count(*) FROM sqlite_master WHERE name = 't';").fetchone() == (0,)
+
+
+@pytest.mark.parametrize('option', [{'batch_size': 50}, {'lock_timeout': 2}, {'lock_retries': 1},
+                                    {'connection_options': {'dsn': 'postgresql://db/app'}}])
+def test_connector_options_are_rejected_with_a_pool(option):
+    pool = ConnectorPool(FakeConnector, min_size=0)
+    with pytest.raises(ValueError, match="pool's factory"):
+        MigrationManager(pool=pool, **option)
@@ -0,0 +1,124 @@
+import asyncio
+import sys
+
+from click.testing import CliRunner
+
+import schemaflux.cli
+from schemaflux.connectors.async_postgresql import AsyncPostgreSQLConnector
+from schemaflux.connectors.postgresql import PostgreSQLConnector
+
+# The package re-exports the ``cli`` group under the module's name
+cli_module = sys.modules['schemaflux.cli']
+
+
+class RecordingCursor:
+    rowcount = 1
+
+    def __init__(self):
+        self.sent = []
+
+    def mogrify(self, operation, params=None):
+        return operation.encode()
+
+    def execute(self, operation, params=None):
+        self.sent.append(operation.decode() if isinstance(operation, bytes) else operation)
+
+
+class Connection:
+    autocommit = True
+
+
+def connector(batch_size):
+    connector = PostgreSQLConnector(batch_size=batch_size)
+    connector.conn = Connection()
+    connector.cursor = RecordingCursor()
+    return connector
+
+
+def test_consecutive_statements_share_a_send():
+    db = connector(batch_size=10)
+    db.execute_batch([(f"INSERT INTO t VALUES ({n})", None) for n in range(3)])
+    assert len(db.cursor.sent) == 1
+    assert db.get_metrics()['query_count'] == 3
+
+
+def test_non_transactional_statements_are_sent_alone():
+    db = connector(batch_size=10)
+    db.execute_batch([
+        ("INSERT INTO t VALUES (1)", None),
+        ("CREATE INDEX CONCURRENTLY t_id ON t (id)", None),
+        ("VACUUM t", None),
+        ("INSERT INTO t VALUES (2)", None),
+        ("INSERT INTO t VALUES (3)", None),
+    ])
+    assert db.cursor.sent == [
+        "INSERT INTO t VALUES (1)",
+        "CREATE INDEX CONCURRENTLY t_id ON t (id)",
+        "VACUUM t",
+        "INSERT INTO t VALUES (2)\n;\nINSERT INTO t VALUES (3)",
+    ]
+
+
+def test_row_counts_of_batched_sends_are_flagged_approximate():
+    db = connector(batch_size=1)
+    db.execute_batch([(f"INSERT INTO t VALUES ({n})", None) for n in range(3)])
+    assert db.get_metrics()['operations_count'] == 3
+    assert not db.get_metrics()['operations_count_approximate']
+
+    db = connector(batch_size=10)
+    db.execute_batch([(f"INSERT INTO t VALUES ({n})", None) for n in range(3)])
+    assert db.get_metrics()['operations_count'] == 1
+    assert db.get_metrics()['operations_count_approximate']
+    db.reset_metrics()
+    assert not db.get_metrics()['operations_count_approximate']
+
+
+def test_single_statement_send_stays_exact():
+    db = connector(batch_size=10)
+    db.execute_batch([("INSERT INTO t VALUES (1)", None), ("VACUUM t", None)])
+    assert not db.get_metrics()['operations_count_approximate']
+
+
+class AsyncConnection:
+    def __init__(self):
+        self.sent = []
+
+    async def execute(self, sql, *params):
+        self.sent.append(sql)
+        return 'INSERT 0 1'
+
+
+def test_async_non_transactional_statements_are_sent_alone():
+    db = AsyncPostgreSQLConnector(batch_size=10)
+    db.conn = AsyncConnection()
+    asyncio.run(db.execute_batch([
+        ("INSERT INTO t VALUES (1)", None),
+        ("INSERT INTO t VALUES (2)", None),
+        ("CREATE INDEX CONCURRENTLY t_id ON t (id)", None),
+        ("INSERT INTO t VALUES (3)", None),
+    ]))
+    assert db.conn.sent == [
+        "INSERT INTO t VALUES (1)\n;\nINSERT INTO t VALUES (2)",
+        "CREATE INDEX CONCURRENTLY t_id ON t (id)",
+        "INSERT INTO t VALUES (3)",
+    ]
+    assert db.get_metrics()['operations_count_approximate']
+
+
+class IdleManager:
+    def __init__(self, **options):
+        pass
+
+    def apply_migrations(self, jobs=1):
+        return []
+
+    def rollback_migrations(self, **options):
+        return []
+
+
+def test_batch_size_above_one_warns_about_row_counts(monkeypatch):
+    monkeypatch.setattr(cli_module, 'MigrationManager', IdleManager)
+    runner = CliRunner()
+    for command in ('up', 'down'):
+        assert 'under-report rows' not in runner.invoke(cli_module.cli, [command]).output
+        assert 'under-report rows' in runner.invoke(cli_module.cli, [command, '--batch-size', '50']).output
@@ -0,0 +1,37 @@
+import pytest
+
+from schemaflux.core import MigrationManager
+
+VERSIONS = ['20240101000000', '20240102000000', '20240103000000']
+
+
+@pytest.fixture
+def manager(tmp_path):
+    migrations = tmp_path / 'migrations'
+    migrations.mkdir()
+    for version in VERSIONS:
+        (migrations / f'{version}_t.sql').write_text(
+            f"-- UP\nCREATE TABLE t{version} (id integer);\n\n-- DOWN\nDROP TABLE t{version};\n"
+        )
+    manager = MigrationManager(migrations_dir=str(migrations), db_type='sqlite', cache_dir=None,
+                               log_dir=str(tmp_path / 'logs'),
+                               connection_options={'database': str(tmp_path / 'db.sqlite')})
+    manager.apply_migrations()
+    yield manager
+    manager.close()
+
+
+def applied(manager):
+    return [item['applied'] for item in manager.show_status()]
+
+
+def test_rollback_to_keeps_the_target(manager):
+    manager.rollback_migrations(to=VERSIONS[0])
+    assert applied(manager) == [True, False, False]
+
+
+@pytest.mark.parametrize('to', ['20240101', '20250101000000'])
+def test_rollback_to_unknown_version_is_rejected(manager, to):
+    with pytest.raises(Exception, match='not an applied migration'):
+        manager.rollback_migrations(to=to)
+    assert applied(manager) == [True, True, True]
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+from schemaflux.scheduler import build_dependency_graph, run_in_dependency_order
+
+FILES = ['001_a.sql', '002_b.sql', '003_c.sql', '004_d.sql']
+
+
+def test_files_without_depends_keep_filename_order():
+    graph = build_dependency_graph(FILES, {}, set())
+    assert graph == {'001_a.sql': set(), '002_b.sql': {'001_a.sql'},
+                     '003_c.sql': {'002_b.sql'}, '004_d.sql': {'003_c.sql'}}
+
+
+def test_depends_headers():
+    headers = {
+        '002_b.sql': {'DEPENDS': '001'},
+        '003_c.sql': {'DEPENDS': '001, 000'},
+    }
+    graph = build_dependency_graph(FILES, headers, applied={'000'})
+    assert graph['002_b.sql'] == {'001_a.sql'}
+    assert graph['003_c.sql'] == {'001_a.sql'}
+    # A file without the header waits for every earlier one, via the sinks
+    assert graph['004_d.sql'] == {'002_b.sql', '003_c.sql'}
+
+
+@pytest.mark.parametrize('headers, message', [
+    # A cycle needs a dependency on a later file, which is rejected
+    ({'001_a.sql': {'DEPENDS': '002'}, '002_b.sql': {'DEPENDS': '001'}}, 'depends on later migration 002'),
+    ({'002_b.sql': {'DEPENDS': '002'}}, 'depends on later migration 002'),
+    ({'002_b.sql': {'DEPENDS': '999'}}, 'depends on unknown migration 999'),
+])
+def test_invalid_depends(headers, message):
+    with pytest.raises(ValueError, match=message):
+        build_dependency_graph(FILES, headers, set())
+
+
+def test_runs_dependencies_first_and_in_parallel():
+    graph = {'a': set(), 'b': set(), 'c': {'a', 'b'}}
+    started = []
+    both_running = threading.Barrier(2, timeout=5)
+
+    def run(item):
+        started.append(item)
+        if item in ('a', 'b'):
+            both_running.wait()
+        return item
+
+    results = run_in_dependency_order(graph, run, jobs=2)
+    assert sorted(results[:2]) == ['a', 'b'] and results[2] == 'c'
+    assert started[-1] == 'c'
+
+
+def test_failure_stops_new_work_and_propagates():
+    graph = {'a': set(), 'b': set(), 'c': {'a'}, 'd': {'b'}}
+    ran = []
+
+    def run(item):
+        ran.append(item)
+        if item == 'a':
+            raise RuntimeError('a failed')
+        time.sleep(0.05)
+        return item
+
+    with pytest.raises(RuntimeError, match='a failed'):
+        run_in_dependency_order(graph, run, jobs=2)
+    # b was already running and finishes; nothing starts after the failure
+    assert sorted(ran) == ['a', 'b']
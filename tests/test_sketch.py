@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from schemaflux.sketch import LogHistogram
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize('accuracy', [0.01, 0.05])
+@pytest.mark.parametrize('distribution', ['uniform', 'lognormal'])
+def test_quantiles_within_relative_accuracy(accuracy, distribution):
+    rng = random.Random(42)
+    if distribution == 'uniform':
+        values = [rng.uniform(0.001, 100) for _ in range(20000)]
+    else:
+        values = [rng.lognormvariate(0, 2) for _ in range(20000)]
+    sketch = LogHistogram(accuracy)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.0, 0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 1.0):
+        exact = exact_quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(exact, rel=accuracy)
+
+
+def test_merge_matches_a_single_sketch():
+    rng = random.Random(7)
+    values = [rng.expovariate(1) for _ in range(5000)]
+    whole, left, right = LogHistogram(), LogHistogram(), LogHistogram()
+    for n, value in enumerate(values):
+        whole.add(value)
+        (left if n % 2 else right).add(value)
+    left.merge(right)
+
+    assert (left.count, left.min, left.max) == (whole.count, whole.min, whole.max)
+    for q in (0.5, 0.95, 0.99):
+        assert left.quantile(q) == whole.quantile(q)
+
+
+def test_zeros_empty_and_invalid_input():
+    sketch = LogHistogram()
+    assert sketch.quantile(0.5) == 0.0
+    for value in (0, 0, 0, 5):
+        sketch.add(value)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == 5
+
+    with pytest.raises(ValueError):
+        sketch.add(-1)
+    with pytest.raises(ValueError):
+        sketch.quantile(1.5)
+    with pytest.raises(ValueError):
+        sketch.merge(LogHistogram(0.05))
@@ -0,0 +1,95 @@
+import pytest
+from click.testing import CliRunner
+
+from schemaflux.cli import cli
+from schemaflux.core import MigrationManager
+
+MIGRATIONS = {
+    '20240101000000_users.sql': """-- UP
+CREATE TABLE users (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+CREATE INDEX CONCURRENTLY users_email ON users (email);
+
+-- DOWN
+DROP INDEX users_email;
+DROP TABLE users;
+""",
+    '20240102000000_posts.sql': """-- UP
+CREATE TABLE posts (id BIGSERIAL PRIMARY KEY, user_id INTEGER REFERENCES users (id), tags TEXT[]);
+INSERT INTO posts (user_id, tags) VALUES (NULL, '{}'::text[]);
+
+-- DOWN
+DROP TABLE posts;
+""",
+}
+
+
+def write_migrations(directory, migrations):
+    directory.mkdir()
+    for name, content in migrations.items():
+        (directory / name).write_text(content)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    write_migrations(tmp_path / 'migrations', MIGRATIONS)
+    manager = MigrationManager(migrations_dir=str(tmp_path / 'migrations'), db_type='sqlite',
+                               cache_dir=None, log_dir=str(tmp_path / 'logs'))
+    yield manager
+    manager.close()
+
+
+def tables(manager):
+    return [name for kind, name in manager.connector.schema_objects() if kind == 'table']
+
+
+def test_up_down_up_round_trip(manager):
+    assert len(manager.apply_migrations()) == 2
+    assert tables(manager) == ['posts', 'users']
+
+    manager.rollback_migrations(steps=2)
+    assert manager.connector.schema_objects() == []
+    assert not any(item['applied'] for item in manager.show_status())
+
+    assert len(manager.apply_migrations()) == 2
+    assert all(item['applied'] for item in manager.show_status())
+    assert manager.connector.skipped == []
+
+
+def test_plan_on_sqlite(manager):
+    manager.apply_migrations()
+    with open(f"{manager.migrations_dir}/20240103000000_backfill.sql", 'w') as f:
+        f.write("-- UP\nUPDATE posts SET tags = NULL;\n\n-- DOWN\n")
+
+    [plan] = manager.plan_migrations()
+    [statement] = plan['statements']
+    assert (statement['kind'], statement['table'], statement['rows']) == ('dml', 'posts', 1)
+
+
+@pytest.mark.parametrize('strict, exit_code', [(False, 0), (True, 1)])
+def test_validate_strict_fails_on_skipped_statements(tmp_path, monkeypatch, strict, exit_code):
+    write_migrations(tmp_path / 'migrations', {
+        '20240101000000_users.sql': "-- UP\nCREATE TABLE users (id int);\n"
+                                    "ALTER TABLE users ALTER COLUMN id SET NOT NULL;\n\n"
+                                    "-- DOWN\nDROP TABLE users;\n",
+    })
+    monkeypatch.chdir(tmp_path)
+
+    result = CliRunner().invoke(cli, ['validate'] + (['--strict'] if strict else []))
+    assert result.exit_code == exit_code
+    assert 'ALTER TABLE users ALTER COLUMN id SET NOT NULL' in result.output
+
+
+def test_validate_reports_objects_left_by_down(tmp_path, monkeypatch):
+    write_migrations(tmp_path / 'migrations', {
+        '20240101000000_users.sql': "-- UP\nCREATE TABLE users (id int);\nCREATE TABLE audit (id int);\n\n"
+                                    "-- DOWN\nDROP TABLE users;\n",
+    })
+    monkeypatch.chdir(tmp_path)
+
+    result = CliRunner().invoke(cli, ['validate', '--strict'])
+    assert result.exit_code == 1
+    assert 'table audit' in result.output
@@ -0,0 +1,35 @@
+import pytest
+
+from schemaflux.connectors.postgresql import PostgreSQLConnector
+from schemaflux.core import MigrationManager
+
+
+def make_manager(tmp_path, files):
+    migrations = tmp_path / 'migrations'
+    migrations.mkdir()
+    for name, content in files.items():
+        (migrations / name).write_text(content)
+    return MigrationManager(migrations_dir=str(migrations), cache_dir=None, log_dir=str(tmp_path / 'logs'))
+
+
+def test_baseline_drops_concurrently_and_vacuum(tmp_path):
+    manager = make_manager(tmp_path, {
+        '20240101000000_t.sql': "-- UP\nCREATE TABLE t (id int);\n\n-- DOWN\nDROP TABLE t;\n",
+        '20240102000000_i.sql': "-- TRANSACTION: off\n-- UP\nCREATE INDEX CONCURRENTLY t_id ON t (id);\n"
+                                "VACUUM t;\n\n-- DOWN\nDROP INDEX CONCURRENTLY t_id;\n",
+    })
+    baseline = manager._load_migration(manager.squash_migrations('20240102000000'))
+
+    statements = [statement for statement, _ in baseline['up_steps'][0][1]]
+    assert [statement.splitlines()[-1] for statement in statements] == [
+        'CREATE TABLE t (id int)', 'CREATE INDEX t_id ON t (id)'
+    ]
+    assert manager._runs_in_transaction(baseline, baseline['up_steps'], PostgreSQLConnector())
+
+
+def test_statements_that_need_no_transaction_are_not_squashed(tmp_path):
+    manager = make_manager(tmp_path, {
+        '20240101000000_s.sql': "-- UP\nALTER SYSTEM SET work_mem = '64MB';\n\n-- DOWN\n",
+    })
+    with pytest.raises(Exception, match='Cannot squash 20240101000000_s.sql'):
+        manager.squash_migrations('20240101000000')
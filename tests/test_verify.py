@@ -0,0 +1,100 @@
+import os
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+import schemaflux.cli
+from schemaflux.core import MigrationManager
+
+# The package re-exports the ``cli`` group under the module's name
+cli_module = sys.modules['schemaflux.cli']
+
+VERSIONS = ['20240101000000', '20240102000000', '20240103000000']
+
+
+def migration(version):
+    return f"-- UP\nCREATE TABLE t{version} (id integer);\n\n-- DOWN\nDROP TABLE t{version};\n"
+
+
+@pytest.fixture(params=[False, True], ids=['no-cache', 'cache'])
+def manager(request, tmp_path):
+    migrations = tmp_path / 'migrations'
+    migrations.mkdir()
+    for version in VERSIONS:
+        (migrations / f'{version}_t.sql').write_text(migration(version))
+    manager = MigrationManager(migrations_dir=str(migrations), db_type='sqlite',
+                               cache_dir=str(tmp_path / 'cache') if request.param else None,
+                               log_dir=str(tmp_path / 'logs'),
+                               connection_options={'database': str(tmp_path / 'db.sqlite')})
+    manager.apply_migrations()
+    yield manager
+    manager.close()
+
+
+def path(manager, version, name='t'):
+    return os.path.join(manager.migrations_dir, f'{version}_{name}.sql')
+
+
+def issues(manager):
+    return [(issue['issue'], issue['file']) for issue in manager.verify_migrations()]
+
+
+def test_untouched_files_verify(manager):
+    assert issues(manager) == []
+
+
+def test_edited_file_is_changed(manager):
+    with open(path(manager, VERSIONS[1]), 'a') as f:
+        f.write("-- edited\n")
+    assert issues(manager) == [('changed', f'{VERSIONS[1]}_t.sql')]
+
+
+def test_deleted_file_is_missing(manager):
+    os.remove(path(manager, VERSIONS[0]))
+    assert issues(manager) == [('missing', f'{VERSIONS[0]}_t.sql')]
+
+
+def test_renamed_file_keeps_its_checksum(manager):
+    os.rename(path(manager, VERSIONS[2]), path(manager, VERSIONS[2], 'renamed'))
+    [issue] = manager.verify_migrations()
+    assert (issue['issue'], issue['file'], issue['recorded_name']) == (
+        'renamed', f'{VERSIONS[2]}_renamed.sql', f'{VERSIONS[2]}_t.sql'
+    )
+
+
+def test_legacy_rows_without_checksum_are_unrecorded(manager):
+    manager.connector.execute("UPDATE migration_history SET checksum = NULL WHERE version = %s;",
+                              (VERSIONS[0],))
+    assert issues(manager) == [('unrecorded', f'{VERSIONS[0]}_t.sql')]
+
+
+def test_squashed_files_may_be_deleted(manager):
+    manager.squash_migrations(VERSIONS[1])
+    for version in VERSIONS[:2]:
+        os.remove(path(manager, version))
+    assert issues(manager) == []
+
+
+@pytest.mark.parametrize('damage, exit_code', [
+    (None, 0),
+    ('unrecorded', 0),
+    ('changed', 1),
+    ('missing', 1),
+])
+def test_verify_command_exit_code(manager, monkeypatch, damage, exit_code):
+    if damage == 'unrecorded':
+        manager.connector.execute("UPDATE migration_history SET checksum = NULL;")
+    elif damage == 'changed':
+        with open(path(manager, VERSIONS[0]), 'a') as f:
+            f.write("-- edited\n")
+    elif damage == 'missing':
+        os.remove(path(manager, VERSIONS[0]))
+    monkeypatch.setattr(cli_module, 'MigrationManager', lambda: manager)
+
+    result = CliRunner().invoke(cli_module.cli, ['verify'])
+    assert result.exit_code == exit_code
+    if damage:
+        assert damage.upper() in result.output
+    else:
+        assert 'match their recorded checksums' in result.output
@@ -0,0 +1,169 @@
+import pytest
+
+from schemaflux.connectors.base import BaseConnector
+from schemaflux.connectors.postgresql import PostgreSQLConnector
+from schemaflux.connectors.sqlite import SQLiteConnector
+from schemaflux.version import (MONGODB_HISTORY_DUPLICATES, MONGODB_HISTORY_VERSION,
+                                POSTGRESQL_HISTORY_UPGRADE, POSTGRESQL_HISTORY_VERSION, VersionControl)
+
+
+class RecordingCursor:
+    """Records statements; ``fetchone`` answers from ``rows`` by statement fragment."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.rowcount = 0
+
+    def execute(self, operation, params=None):
+        self.executed.append((' '.join(str(operation).split()), params))
+
+    def fetchone(self):
+        statement = self.executed[-1][0]
+        return next((row for fragment, row in self.rows.items() if fragment in statement), None)
+
+    def __iter__(self):
+        return iter(self.rows.get('unnest', []))
+
+
+class Connection:
+    autocommit = True
+    commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def postgresql(rows):
+    connector = PostgreSQLConnector()
+    connector.conn = Connection()
+    connector.cursor = RecordingCursor(rows)
+    return connector
+
+
+def test_current_postgresql_history_costs_one_lookup():
+    connector = postgresql({'obj_description': (POSTGRESQL_HISTORY_VERSION,)})
+    VersionControl(connector)
+    assert len(connector.cursor.executed) == 1
+
+
+@pytest.mark.parametrize('comment', [None, 'schemaflux migration_history v2'])
+def test_old_postgresql_history_is_upgraded_in_one_transaction(comment):
+    connector = postgresql({'obj_description': (comment,)})
+    VersionControl(connector)
+
+    statements = [statement for statement, _ in connector.cursor.executed[1:]]
+    assert statements == [' '.join(statement.split()) for statement in POSTGRESQL_HISTORY_UPGRADE]
+    assert connector.conn.commits == 1
+    # Duplicates go before the unique index that would reject them
+    dedupe = next(i for i, s in enumerate(statements) if s.startswith('DELETE FROM migration_history'))
+    assert statements[dedupe - 1].startswith('LOCK TABLE migration_history')
+    assert statements[dedupe + 1].startswith('CREATE UNIQUE INDEX')
+    assert 'newer.success' in statements[dedupe] and 'newer.id' in statements[dedupe]
+
+
+def test_pending_versions_above_high_water_mark_skip_history():
+    connector = postgresql({'obj_description': (POSTGRESQL_HISTORY_VERSION,),
+                            'LIMIT 1': ('20240102000000', '20240102000000_b.sql')})
+    control = VersionControl(connector)
+    del connector.cursor.executed[:]
+
+    assert control.get_pending_versions(['20240103000000', '20240104000000']) == {
+        '20240103000000', '20240104000000'
+    }
+    assert len(connector.cursor.executed) == 1
+
+
+def test_pending_versions_below_high_water_mark_use_one_query():
+    connector = postgresql({'obj_description': (POSTGRESQL_HISTORY_VERSION,),
+                            'LIMIT 1': ('20240102000000', '20240102000000_b.sql'),
+                            'unnest': [('20240101000000',)]})
+    control = VersionControl(connector)
+    del connector.cursor.executed[:]
+
+    pending = control.get_pending_versions(['20240101000000', '20240102000000', '20240103000000'])
+    assert pending == {'20240101000000', '20240103000000'}
+    [_, (statement, params)] = connector.cursor.executed
+    assert 'unnest' in statement and params == (['20240101000000', '20240102000000'],)
+
+
+def test_high_water_mark_on_sqlite(tmp_path):
+    connector = SQLiteConnector(database=str(tmp_path / 'db.sqlite'))
+    connector.connect()
+    control = VersionControl(connector)
+    assert control.get_pending_versions(['20240101000000']) == {'20240101000000'}
+
+    # 20240102 merged after 20240103 was applied, and a failed 20240104
+    control.record_migration('20240101000000', '20240101000000_a.sql')
+    control.record_migration('20240103000000', '20240103000000_c.sql')
+    control.record_migration('20240104000000', '20240104000000_d.sql', success=False)
+    assert control.get_last_applied() == ('20240103000000', '20240103000000_c.sql')
+
+    versions = ['20240101000000', '20240102000000', '20240103000000', '20240104000000', '20240105000000']
+    assert control.get_pending_versions(versions) == {'20240102000000', '20240104000000', '20240105000000'}
+    connector.close()
+
+
+class FakeMongoConnector(BaseConnector):
+    dialect = 'mongodb'
+
+    def __init__(self, meta=None, duplicates=()):
+        super().__init__()
+        self.meta = meta
+        self.duplicates = list(duplicates)
+        self.operations = []
+
+    def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    def execute(self, operation, params=None):
+        self.operations.append(operation)
+        op_type, collection, _ = operation
+        if collection == 'migration_meta' and op_type == 'find':
+            return [self.meta] if self.meta else []
+        if op_type == 'aggregate':
+            return self.duplicates
+        return None
+
+    def execute_batch(self, operations):
+        for operation, params in operations:
+            self.execute(operation, params)
+
+
+def test_current_mongodb_history_costs_one_lookup():
+    connector = FakeMongoConnector(meta={'_id': 'migration_history', 'version': MONGODB_HISTORY_VERSION})
+    VersionControl(connector)
+    assert [(op, collection) for op, collection, _ in connector.operations] == [('find', 'migration_meta')]
+
+
+def test_mongodb_history_is_deduplicated_and_uniquely_indexed():
+    connector = FakeMongoConnector(duplicates=[
+        {'_id': '20240101000000', 'keep': 2, 'ids': [2, 1, 3]},
+        {'_id': '20240102000000', 'keep': 5, 'ids': [5, 4]},
+    ])
+    VersionControl(connector)
+
+    _, _, delete, unique, _, stamp = connector.operations
+    assert delete == ('delete_many', 'migration_history', {'filter': {'_id': {'$in': [1, 3, 4]}}})
+    assert unique[0] == 'create_index' and unique[2]['keys'] == [('version', 1)] and unique[2]['unique']
+    assert stamp[1] == 'migration_meta'
+    assert stamp[2]['update'] == {'$set': {'version': MONGODB_HISTORY_VERSION}}
+
+
+def test_mongodb_dedupe_keeps_the_latest_success():
+    sort, group, _ = MONGODB_HISTORY_DUPLICATES[2]['pipeline']
+    # Successful documents first, newest first, and the first one per version is kept
+    assert list(sort['$sort'].items()) == [('version', 1), ('success', -1), ('_id', -1)]
+    assert group['$group']['keep'] == {'$first': '$_id'}
+
+
+def test_mongodb_history_without_duplicates_deletes_nothing():
+    connector = FakeMongoConnector()
+    VersionControl(connector)
+    assert 'delete_many' not in [op for op, _, _ in connector.operations]